@@ -0,0 +1,11 @@
+"""
+Reproducible benchmarks of the REST API.
+
+    python -m benchmarks.seed --movies 2000 --seances 50000 --reset   # synthetic dataset
+    python -m benchmarks.load --concurrency 8 --duration 30 -o run.json
+    python -m benchmarks.compare baseline.json run.json              # exit 1 on regression
+
+The seed and the in-process load test use the database configured by the
+DB_* variables (MySQL, or a compatible server such as MariaDB). Point them at
+a dedicated database: --reset empties the application tables.
+"""
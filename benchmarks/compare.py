@@ -0,0 +1,61 @@
+"""
+Compare two load test reports.
+
+    python -m benchmarks.compare baseline.json candidate.json --tolerance 10
+
+Exits with status 1 when an endpoint of the candidate is slower (p95) or
+serves less (throughput) than the baseline by more than the tolerance.
+"""
+
+import argparse
+import json
+import sys
+
+
+def compare(baseline: dict, candidate: dict, tolerance: float) -> list:
+    """(endpoint, metric, baseline, candidate, change %) of every regression"""
+    regressions = []
+    for name, before in baseline["endpoints"].items():
+        after = candidate["endpoints"].get(name)
+        if after is None:
+            continue
+        for metric, higher_is_worse in (("p95_ms", True), ("throughput_rps", False)):
+            old, new = before[metric], after[metric]
+            if not old:
+                continue
+            change = (new - old) / old * 100
+            if (change if higher_is_worse else -change) > tolerance:
+                regressions.append((name, metric, old, new, round(change, 1)))
+    return regressions
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Compare two load test reports")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--tolerance", type=float, default=10, help="accepted change, in percent")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding="utf-8") as stream:
+        baseline = json.load(stream)
+    with open(args.candidate, encoding="utf-8") as stream:
+        candidate = json.load(stream)
+
+    print(f"{'endpoint':<18}{'p95 ms':>22}{'throughput rps':>26}")
+    for name, before in baseline["endpoints"].items():
+        after = candidate["endpoints"].get(name)
+        if after is not None:
+            print(
+                f"{name:<18}{before['p95_ms']:>10} -> {after['p95_ms']:<10}"
+                f"{before['throughput_rps']:>12} -> {after['throughput_rps']:<10}"
+            )
+
+    regressions = compare(baseline, candidate, args.tolerance)
+    for name, metric, old, new, change in regressions:
+        print(f"REGRESSION {name} {metric}: {old} -> {new} ({change:+}%)", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Load test of the REST API at a fixed concurrency.
+Each worker thread loops over the endpoints (picked by weight) until the
+duration is over. By default the requests go through the Flask test client
+of the real app, in-process, so the numbers cover the app and the database
+without any HTTP server; --base-url sends them to a running server instead.
+Prints (or writes with -o) a JSON report with the throughput and the latency
+percentiles of each endpoint.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+
+from benchmarks.seed import BENCH_LOGIN, BENCH_PASSWORD
+
+# name: (method, weight)
+ENDPOINTS = {
+    "movie_all": ("GET", 20),
+    "movie_details": ("GET", 25),
+    "movie_search": ("GET", 5),
+    "seance_upcoming": ("GET", 20),
+    "seance_city": ("GET", 20),
+    "seance_stats": ("GET", 10),
+    "seance_search": ("GET", 5),
+    "report_week": ("GET", 5),
+    "movie_create": ("POST", 5),
+}
+PERCENTILES = (50, 90, 95, 99)
+
+
+class InProcessClient:
+    """Requests through the Flask test client, one per worker thread"""
+
+    def __init__(self, app, access_token):
+        self.client = app.test_client()
+        self.client.set_cookie("access_token_cookie", access_token)
+
+    def request(self, method, path, payload=None):
+        """Send a request, returns the status code"""
+        return self.client.open(path, method=method, json=payload).status_code
+
+
+class HttpClient:
+    """Requests to a running server, one keep-alive session per worker thread"""
+
+    def __init__(self, base_url, cookies):
+        import requests  # pylint: disable=import-outside-toplevel
+
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        self.session.cookies.update(cookies)
+
+    def request(self, method, path, payload=None):
+        """Send a request, returns the status code"""
+        return self.session.request(method, f"{self.base_url}{path}", json=payload, timeout=30).status_code
+
+
+def in_process_clients(disable_cache: bool):
+    """Factory of test clients on the real app, with every blueprint registered like rest_api"""
+    # pylint: disable=import-outside-toplevel
+    from flask_jwt_extended import create_access_token
+    from ethiens_sme import app
+    from ethiens_sme.route.admin_route import admin
+    from ethiens_sme.route.export_route import export
+    from ethiens_sme.route.frontend_route import frontend
+    from ethiens_sme.route.metrics_route import metrics
+    from ethiens_sme.route.movie_route import movie
+    from ethiens_sme.route.report_route import report
+    from ethiens_sme.route.seance_route import seance
+    from ethiens_sme.route.user_route import user
+
+    for blueprint in (user, seance, movie, frontend, admin, metrics, export, report):
+        if blueprint.name not in app.blueprints:
+            app.register_blueprint(blueprint)
+    if disable_cache:
+        app.config["CACHE_TIMEOUTS"] = {}
+
+    with app.app_context():
+        access_token = create_access_token(identity="0", additional_claims={"is_admin": True})
+    return lambda: InProcessClient(app, access_token)
+
+
+def http_clients(base_url: str, login: str, password: str):
+    """Factory of HTTP clients, authenticated once with /user/auth"""
+    import requests  # pylint: disable=import-outside-toplevel
+
+    response = requests.post(
+        f"{base_url.rstrip('/')}/user/auth", json={"login": login, "password": password}, timeout=30
+    )
+    response.raise_for_status()
+    cookies = response.cookies.get_dict()
+    return lambda: HttpClient(base_url, cookies)
+
+
+def _get_json(client, path):
+    """Body of a GET, through either client"""
+    if isinstance(client, InProcessClient):
+        return client.client.get(path).get_json()
+    return client.session.get(f"{client.base_url}{path}", timeout=30).json()
+
+
+def discover(client) -> dict:
+    """Movie IDs and cities to request, read from the API itself"""
+    movies = _get_json(client, "/movie/list") or []
+    movie_ids = [movie["id"] for movie in movies]
+    words = sorted({word for movie in movies for word in (movie.get("title") or "").split() if len(word) > 3})
+    cinemas = _get_json(client, "/seance/cinemas") or []
+    cities = sorted({cinema["ci_city"] for cinema in cinemas})
+    if not movie_ids or not cities:
+        raise SystemExit("No movie or cinema found, run python -m benchmarks.seed first")
+    return {
+        "movie_ids": movie_ids,
+        "title_words": words or ["film"],
+        "cities": cities,
+        "cinema_ids": [cinema["ci_id_cinema"] for cinema in cinemas],
+    }
+
+
+def build_request(name: str, rng: random.Random, targets: dict, worker: int, sequence: int):
+    """(path, payload) of one request to the endpoint `name`"""
+    if name == "movie_all":
+        return f"/movie/all?limit=20&offset={rng.randrange(0, max(1, len(targets['movie_ids']) - 20))}", None
+    if name == "movie_details":
+        return f"/movie/details/{rng.choice(targets['movie_ids'])}", None
+    if name == "movie_search":
+        return f"/movie/search?q={rng.choice(targets['title_words'])}", None
+    if name == "seance_upcoming":
+        return f"/seance/upcoming?limit=20&offset={rng.randrange(0, 200)}", None
+    if name == "seance_city":
+        return f"/seance/{rng.choice(targets['cities'])}", None
+    if name == "seance_stats":
+        return "/seance/stats", None
+    if name == "report_week":
+        return f"/report/cinema/{rng.choice(targets['cinema_ids'])}/week", None
+    if name == "seance_search":
+        city = rng.choice(targets["cities"])
+        return f"/seance/search?q={city[:rng.randint(1, len(city))]}", None
+    payload = {
+        "title": f"Bench {worker}-{sequence}-{rng.getrandbits(32):08x}",
+        "length_minutes": rng.randint(80, 160),
+        "synopsis": "Created by the load test",
+        "country": "France",
+        "actor_names": [f"Bench Actor {rng.randint(1, 50)}" for _ in range(3)],
+    }
+    return "/movie/", payload
+
+
+def percentile(sorted_values: list, percent: float) -> float:
+    """Nearest-rank percentile"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(percent / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: list, errors: int, seconds: float) -> dict:
+    """Count, throughput and latency percentiles (ms) of one endpoint"""
+    latencies = sorted(latencies)
+    summary = {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / seconds, 2) if seconds else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+    for percent in PERCENTILES:
+        summary[f"p{percent}_ms"] = round(percentile(latencies, percent) * 1000, 3)
+    return summary
+
+
+def run(client_factory, concurrency: int, duration: float, warmup: float, endpoints: dict, seed: int) -> dict:
+    """Drive the endpoints from `concurrency` threads, returns the per-endpoint results"""
+    targets = discover(client_factory())
+    names = list(endpoints)
+    weights = [endpoints[name][1] for name in names]
+    results = {name: {"latencies": [], "errors": 0} for name in names}
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency + 1)
+    timing = {}
+
+    def worker(index):
+        client = client_factory()
+        rng = random.Random(seed + index)
+        local = {name: {"latencies": [], "errors": 0} for name in names}
+        start_barrier.wait()
+        sequence = 0
+        while time.perf_counter() < timing["end"]:
+            name = rng.choices(names, weights)[0]
+            path, payload = build_request(name, rng, targets, index, sequence)
+            sequence += 1
+            request_start = time.perf_counter()
+            try:
+                failed = client.request(endpoints[name][0], path, payload) >= 400
+            except Exception:  # pylint: disable=broad-except
+                failed = True
+            elapsed = time.perf_counter() - request_start
+            if request_start < timing["measure_from"]:
+                continue
+            local[name]["latencies"].append(elapsed)
+            local[name]["errors"] += failed
+        with lock:
+            for name, data in local.items():
+                results[name]["latencies"].extend(data["latencies"])
+                results[name]["errors"] += data["errors"]
+
+    threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    begin = time.perf_counter()
+    timing["measure_from"] = begin + warmup
+    timing["end"] = begin + warmup + duration
+    start_barrier.wait()
+    for thread in threads:
+        thread.join()
+    measured = time.perf_counter() - timing["measure_from"]
+
+    report = {name: summarize(data["latencies"], data["errors"], measured) for name, data in results.items()}
+    every_latency = [latency for data in results.values() for latency in data["latencies"]]
+    report["total"] = summarize(every_latency, sum(data["errors"] for data in results.values()), measured)
+    return report
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Load test of the REST API at a fixed concurrency")
+    parser.add_argument("--concurrency", type=int, default=8, help="worker threads")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds run before measuring")
+    parser.add_argument("--endpoints", help="comma-separated subset of " + ",".join(ENDPOINTS))
+    parser.add_argument("--no-write", action="store_true", help="skip POST /movie/")
+    parser.add_argument("--no-cache", action="store_true", help="disable the response cache (in-process only)")
+    parser.add_argument("--base-url", help="load a running server instead of the in-process app")
+    parser.add_argument("--login", default=BENCH_LOGIN, help="admin login for --base-url")
+    parser.add_argument("--password", default=BENCH_PASSWORD, help="admin password for --base-url")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", help="write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    endpoints = dict(ENDPOINTS)
+    if args.endpoints:
+        endpoints = {name: ENDPOINTS[name] for name in args.endpoints.split(",")}
+    if args.no_write:
+        endpoints.pop("movie_create", None)
+
+    if args.base_url:
+        client_factory = http_clients(args.base_url, args.login, args.password)
+    else:
+        client_factory = in_process_clients(args.no_cache)
+
+    results = run(client_factory, args.concurrency, args.duration, args.warmup, endpoints, args.seed)
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "mode": "http" if args.base_url else "in-process",
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "cache": not args.no_cache,
+            "database": os.environ.get("DB_NAME"),
+        },
+        "endpoints": results,
+    }
+
+    document = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as stream:
+            stream.write(document + "\n")
+    print(document)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Fake connection pool and cases of the row mapping and JSON serialization
+micro-benchmarks (benchmarks/test_mappers.py).
+
+The service functions run against a fake connection pool whose cursors return
+prebuilt rows, so only the Python side is measured: get_query, the dict and
+dataclass building loops, and app.json.response for the serialization cases.
+"""
+
+import random
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from ethiens_sme import app, connect_mysql
+from ethiens_sme.service import movie_service, place_index, schedule_index, seance_service
+
+MOVIE_COLUMNS = (
+    "mo_id_movie", "mo_title", "mo_poster", "mo_date_publication", "mo_length_minutes", "mo_synopsis",
+    "mo_country", "mo_producer", "mo_minimum_age", "mo_begin_date", "mo_end_date",
+)
+CAST_COLUMNS = ("mo_id_movie", "ac_id_actor", "ac_actor_name", "ac_actor_picture")
+UPCOMING_COLUMNS = (
+    "se_id_seance", "mo_id_movie", "Titre_Film", "Affiche_Film", "Date_Heure", "Salle", "Langue",
+    "ci_id_cinema", "Cinema", "Ville",
+)
+CITY_COLUMNS = ("Titre_Film", "Date_Heure", "Salle", "Langue", "Cinema", "Ville")
+CINEMA_COLUMNS = ("ci_id_cinema", "ci_cinema_name", "ci_city")
+INDEX_COLUMNS = (
+    "se_id_seance", "se_date_time", "se_room", "se_language", "mo_id_movie", "mo_title",
+    "ci_id_cinema", "ci_cinema_name", "ci_city",
+)
+
+
+class FakeCursor:
+    """Cursor returning the rows registered for the first matching query fragment"""
+
+    def __init__(self, tables, dictionary=False):
+        self.tables = tables
+        self.dictionary = dictionary
+        self.description = None
+        self.column_names = ()
+        self.rowcount = 0
+        self.lastrowid = None
+        self._rows = []
+
+    def execute(self, query, params=None):  # pylint: disable=unused-argument
+        """Select the rows of the query"""
+        for fragment, (columns, rows) in self.tables.items():
+            if fragment in query:
+                break
+        else:
+            columns, rows = (), []
+        self.column_names = columns
+        self.description = [(column,) for column in columns]
+        if self.dictionary:
+            self._rows = [dict(zip(columns, row)) for row in rows]
+        else:
+            self._rows = list(rows)
+        self.rowcount = len(self._rows)
+
+    def fetchall(self):
+        """Every remaining row"""
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size=1):
+        """The next `size` rows"""
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def close(self):
+        """Nothing to release"""
+
+
+class FakeConnection:
+    """Connection handing out FakeCursor"""
+
+    in_transaction = False
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def cursor(self, dictionary=False, **_kwargs):
+        """New cursor on the registered rows"""
+        return FakeCursor(self.tables, dictionary)
+
+    def commit(self):
+        """Nothing to commit"""
+
+    def rollback(self):
+        """Nothing to roll back"""
+
+
+class FakePool:
+    """Pool always lending the same fake connection"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def acquire(self):
+        """The fake connection"""
+        return self.conn
+
+    def release(self, conn, discard=False):
+        """Nothing to release"""
+
+    def stats(self) -> dict:
+        """No usage counters"""
+        return {}
+
+
+def generate_tables(row_count: int, seed: int = 42) -> dict:
+    """{query fragment: (columns, tuple rows)} for every benchmarked query"""
+    rng = random.Random(seed)
+    today = date(2025, 1, 1)
+    # The seances must still be upcoming for the schedule index
+    now = datetime.combine(date.today() + timedelta(days=1), datetime.min.time()).replace(hour=20)
+
+    movies = []
+    for movie_id in range(1, row_count + 1):
+        begin = today + timedelta(days=rng.randint(0, 60))
+        movies.append(
+            (
+                movie_id,
+                f"Film {movie_id}",
+                f"https://image.tmdb.org/t/p/w500/{movie_id}.jpg",
+                begin - timedelta(days=rng.randint(0, 365)),
+                rng.randint(80, 180),
+                "Synopsis " * 30,
+                "France",
+                "Producteur",
+                "-12",
+                begin,
+                begin + timedelta(days=30),
+            )
+        )
+    cast = [
+        (movie_id, actor_id, f"Acteur {actor_id}", None)
+        for movie_id in range(1, row_count + 1)
+        for actor_id in range(movie_id, movie_id + 5)
+    ]
+    upcoming = [
+        (
+            seance_id,
+            seance_id % 500 + 1,
+            f"Film {seance_id % 500 + 1}",
+            None,
+            now + timedelta(minutes=15 * seance_id),
+            f"Salle {seance_id % 10 + 1}",
+            "VF",
+            seance_id % 20 + 1,
+            f"Cinéma {seance_id % 20 + 1}",
+            "Paris",
+        )
+        for seance_id in range(1, row_count + 1)
+    ]
+    city = [row[2:3] + row[4:7] + row[8:10] for row in upcoming]
+    index = [row[0:1] + row[4:7] + row[1:3] + row[7:8] + row[8:10] for row in upcoming]
+    cinemas = sorted({row[7:10] for row in upcoming})
+
+    return {
+        # Before "s.se_date_time >= NOW()", which the schedule index query contains too
+        "s.mo_id_movie, m.mo_title": (INDEX_COLUMNS, index),
+        "ci_city FROM et_cinema": (CINEMA_COLUMNS, cinemas),
+        "FROM et_movie": (MOVIE_COLUMNS, movies),
+        "et_casting AS c": (CAST_COLUMNS, cast),
+        "s.se_date_time >= NOW()": (UPCOMING_COLUMNS, upcoming),
+        "c.ci_city = %s": (CITY_COLUMNS, city),
+    }
+
+
+def with_fake_pool(tables: dict):
+    """Route connect_mysql.borrow() to a fake connection returning `tables`"""
+    connect_mysql._pool = FakePool(FakeConnection(tables))  # pylint: disable=protected-access
+
+
+def _json(value):
+    """Serialize like jsonify, in an app context"""
+    with app.app_context():
+        return app.json.response(value).get_data()
+
+
+CASES = (
+    "movie_all",
+    "movie_all_actors",
+    "seance_upcoming",
+    "seance_city",
+    "schedule_index_load",
+    "json_movies",
+    "json_movies_actors",
+    "json_seances",
+    "json_city_seances",
+)
+
+
+def build_cases(row_count: int) -> dict:
+    """{name: function} of the benchmarked calls, for pages of `row_count` rows"""
+    with_fake_pool(generate_tables(row_count))
+    movies = movie_service.get_all_movies_paginated(row_count, 0)
+    movies_with_actors = movie_service.get_all_movies_paginated(row_count, 0, True)
+    seances = seance_service.get_upcoming_seances(row_count, 0)
+    schedule_index.reload()
+    place_index.refresh()
+    city_seances = seance_service.get_seance_info_by_city_name("Paris")
+
+    return {
+        "movie_all": lambda: movie_service.get_all_movies_paginated(row_count, 0),
+        "movie_all_actors": lambda: movie_service.get_all_movies_paginated(row_count, 0, True),
+        "seance_upcoming": lambda: seance_service.get_upcoming_seances(row_count, 0),
+        "seance_city": lambda: seance_service.get_seance_info_by_city_name("Paris"),
+        "schedule_index_load": schedule_index.reload,
+        "json_movies": lambda: _json(movies),
+        "json_movies_actors": lambda: _json(movies_with_actors),
+        "json_seances": lambda: _json(seances),
+        "json_city_seances": lambda: _json(city_seances),
+    }
+
+
+def memory(function) -> dict:
+    """Peak memory of one call under tracemalloc, and the blocks still allocated by its result"""
+    function()  # warm-up, so that caches are not counted
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = function()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    retained = [stat for stat in after.compare_to(before, "filename") if stat.size_diff > 0]
+    del result
+
+    return {
+        "peak_kib": round(peak / 1024, 1),
+        "retained_kib": round(sum(stat.size_diff for stat in retained) / 1024, 1),
+        "retained_blocks": sum(stat.count_diff for stat in retained),
+    }
@@ -0,0 +1,204 @@
+"""
+Seed the database with a synthetic dataset of configurable size.
+The same --seed gives the same rows and IDs (dates relative to the day of the
+run), so runs stay comparable.
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import bcrypt
+
+from ethiens_sme import connect_mysql, migrate
+from ethiens_sme.service import report_service
+
+CITIES = (
+    "Paris", "Lyon", "Marseille", "Toulouse", "Nice", "Nantes", "Montpellier", "Strasbourg", "Bordeaux", "Lille",
+    "Rennes", "Reims", "Saint-Étienne", "Le Havre", "Toulon", "Grenoble", "Dijon", "Angers", "Nîmes", "Orléans",
+)
+TITLE_WORDS = (
+    "Nuit", "Ombre", "Retour", "Voyage", "Secret", "Dernier", "Été", "Ciel", "Mémoire", "Éclat", "Silence", "Rivière",
+    "Cœur", "Fantôme", "Lumière", "Horizon", "Tempête", "Jardin", "Miroir", "Frontière",
+)
+FIRST_NAMES = ("Camille", "Léa", "Hugo", "Inès", "Louis", "Chloé", "Jules", "Manon", "Théo", "Zoé", "Noé", "Maël")
+LAST_NAMES = ("Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy", "Moreau")
+LANGUAGES = ("VF", "VOSTFR", "VO")
+AGES = ("Tous publics", "-12", "-16", "-18")
+
+BENCH_LOGIN = "bench"
+BENCH_PASSWORD = "bench"
+
+TABLES = (
+    "et_report_dirty",
+    "et_report_movie_week",
+    "et_report_room_week",
+    "et_casting",
+    "et_seance",
+    "et_actors",
+    "et_movie",
+    "et_cinema",
+)
+
+
+def _batches(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def _insert(conn, query, rows, batch_size):
+    for batch in _batches(rows, batch_size):
+        connect_mysql.execute_many(conn, query, batch)
+
+
+def generate(cinemas: int, movies: int, actors: int, cast_size: int, seances: int, seed: int) -> dict:
+    """Rows of every table, with explicit IDs"""
+    rng = random.Random(seed)
+    today = date.today()
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+
+    cinema_rows = [
+        (
+            cinema_id,
+            f"Cinéma {CITIES[(cinema_id - 1) % len(CITIES)]} {cinema_id}",
+            CITIES[(cinema_id - 1) % len(CITIES)],
+            f"{rng.randint(1, 200)} rue du Cinéma",
+            None,
+        )
+        for cinema_id in range(1, cinemas + 1)
+    ]
+
+    movie_rows = []
+    for movie_id in range(1, movies + 1):
+        begin = today - timedelta(days=rng.randint(0, 60))
+        movie_rows.append(
+            (
+                movie_id,
+                f"{rng.choice(TITLE_WORDS)} {rng.choice(TITLE_WORDS).lower()} {movie_id}",
+                begin - timedelta(days=rng.randint(0, 30)),
+                rng.randint(75, 180),
+                rng.choice(AGES),
+                " ".join(rng.choice(TITLE_WORDS).lower() for _ in range(40)),
+                None,
+                "France",
+                f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                begin,
+                begin + timedelta(days=rng.randint(14, 90)),
+            )
+        )
+
+    actor_rows = [
+        (actor_id, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {actor_id}")
+        for actor_id in range(1, actors + 1)
+    ]
+
+    casting_rows = []
+    for movie_id in range(1, movies + 1):
+        for actor_id in rng.sample(range(1, actors + 1), min(cast_size, actors)):
+            casting_rows.append((movie_id, actor_id))
+
+    seance_rows = []
+    for seance_id in range(1, seances + 1):
+        # A week of past seances and a month of upcoming ones
+        date_time = now + timedelta(hours=rng.randint(-7 * 24, 30 * 24))
+        seance_rows.append(
+            (
+                seance_id,
+                date_time,
+                f"Salle {rng.randint(1, 10)}",
+                rng.choice(LANGUAGES),
+                rng.randint(1, movies),
+                rng.randint(1, cinemas),
+            )
+        )
+
+    return {
+        "et_cinema": cinema_rows,
+        "et_movie": movie_rows,
+        "et_actors": actor_rows,
+        "et_casting": casting_rows,
+        "et_seance": seance_rows,
+    }
+
+
+QUERIES = {
+    "et_cinema": """
+        INSERT INTO et_cinema (ci_id_cinema, ci_cinema_name, ci_city, ci_address, ci_cinema_picture)
+        VALUES (%s, %s, %s, %s, %s)
+    """,
+    "et_movie": """
+        INSERT INTO et_movie (
+            mo_id_movie, mo_title, mo_date_publication, mo_length_minutes, mo_minimum_age, mo_synopsis,
+            mo_poster, mo_country, mo_producer, mo_begin_date, mo_end_date
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """,
+    "et_actors": "INSERT INTO et_actors (ac_id_actor, ac_actor_name) VALUES (%s, %s)",
+    "et_casting": "INSERT INTO et_casting (mo_id_movie, ac_id_actor) VALUES (%s, %s)",
+    "et_seance": """
+        INSERT INTO et_seance (se_id_seance, se_date_time, se_room, se_language, mo_id_movie, ci_id_cinema)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """,
+}
+
+
+def seed(cinemas, movies, actors, cast_size, seances, seed_value=42, reset=False, batch_size=1000) -> dict:
+    """Create the schema if needed and load the dataset, returns the row counts and the time taken"""
+    migrate.upgrade()
+    rows = generate(cinemas, movies, actors, cast_size, seances, seed_value)
+    start = time.perf_counter()
+
+    with connect_mysql.borrow() as conn:
+        if reset:
+            connect_mysql.execute_command(conn, "SET FOREIGN_KEY_CHECKS = 0")
+            for table in TABLES:
+                connect_mysql.execute_command(conn, f"TRUNCATE TABLE {table}")
+            connect_mysql.execute_command(conn, "SET FOREIGN_KEY_CHECKS = 1")
+        else:
+            existing = connect_mysql.get_query(conn, "SELECT COUNT(*) FROM et_movie")
+            if existing and existing[0][0]:
+                raise SystemExit("et_movie is not empty, run with --reset to replace the data")
+
+        with connect_mysql.transaction(conn):
+            for table in ("et_cinema", "et_movie", "et_actors", "et_casting", "et_seance"):
+                _insert(conn, QUERIES[table], rows[table], batch_size)
+            # The seances are inserted directly: their weeks are reported at the next refresh
+            report_service.mark_seances(conn, [(row[5], row[1]) for row in rows["et_seance"]])
+
+            password = bcrypt.hashpw(BENCH_PASSWORD.encode("utf8"), bcrypt.gensalt()).decode("utf-8")
+            connect_mysql.execute_command(
+                conn,
+                """
+                INSERT INTO et_user (us_pseudo, us_password, us_is_admin) VALUES (%s, %s, 1)
+                ON DUPLICATE KEY UPDATE us_password = VALUES(us_password), us_is_admin = 1
+                """,
+                (BENCH_LOGIN, password),
+            )
+
+    counts = {table: len(table_rows) for table, table_rows in rows.items()}
+    counts["seconds"] = round(time.perf_counter() - start, 3)
+    return counts
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Seed the database with a synthetic dataset")
+    parser.add_argument("--cinemas", type=int, default=20)
+    parser.add_argument("--movies", type=int, default=1000)
+    parser.add_argument("--actors", type=int, default=3000)
+    parser.add_argument("--cast-size", type=int, default=8, help="actors per movie")
+    parser.add_argument("--seances", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per INSERT")
+    parser.add_argument("--reset", action="store_true", help="empty the application tables first")
+    args = parser.parse_args(argv)
+
+    counts = seed(
+        args.cinemas, args.movies, args.actors, args.cast_size, args.seances, args.seed, args.reset, args.batch_size
+    )
+    print(json.dumps(counts))
+
+
+if __name__ == "__main__":
+    main()
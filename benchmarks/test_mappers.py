@@ -0,0 +1,40 @@
+"""
+Micro-benchmarks of the service-layer row mapping and of the JSON serialization,
+on fake cursors of 1k, 10k and 100k rows (pytest-benchmark):
+
+    pytest benchmarks/test_mappers.py --benchmark-autosave
+    pytest benchmarks/test_mappers.py -k "seance and 10000rows" --benchmark-compare
+
+Besides the timings, extra_info holds the peak memory and the blocks still
+allocated by the result, from one run under tracemalloc.
+"""
+
+# pylint: disable=protected-access
+
+import pytest
+
+from benchmarks import mappers
+from ethiens_sme import connect_mysql
+from ethiens_sme.service import place_index, schedule_index
+
+ROW_COUNTS = (1000, 10000, 100000)
+
+
+@pytest.fixture(scope="module", params=ROW_COUNTS, ids=lambda row_count: f"{row_count}rows")
+def cases(request):
+    """(row count, {case name: function}) on a fake pool returning that many rows"""
+    saved_pool = connect_mysql._pool
+    yield request.param, mappers.build_cases(request.param)
+    connect_mysql._pool = saved_pool
+    schedule_index.clear()
+    place_index._index = None
+
+
+@pytest.mark.parametrize("name", mappers.CASES)
+def test_mapper(benchmark, cases, name):
+    row_count, functions = cases
+    function = functions[name]
+    benchmark.extra_info["rows"] = row_count
+    benchmark.extra_info.update(mappers.memory(function))
+
+    benchmark(function)
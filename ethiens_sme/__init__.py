@@ -1,16 +1,26 @@
 """Initialisation of the api"""
 
 from flask import Flask
+from flask_caching import Cache
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_restful import Api
 from flask_rq2 import RQ
 
 from ethiens_sme.config import Config
+from ethiens_sme import connect_mysql
+from ethiens_sme.utils import metrics, profiler
+from ethiens_sme.utils.json_provider import FastJSONProvider
 
 app = Flask(__name__)
 app.config.from_object(Config)
+if Config.JSON_FAST_ENCODER:
+    app.json = FastJSONProvider(app)
 CORS(app, resources={r"*": {"origins": Config.FRONT_END_URL}}, supports_credentials=True)
 api = Api(app)
 jwt = JWTManager(app)
 rq = RQ(app)
+cache = Cache(app)
+connect_mysql.init_app(app)
+metrics.init_app(app)
+profiler.init_app(app)
@@ -3,6 +3,7 @@
 # !/usr/bin/python
 import dataclasses
 import os
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -23,6 +24,52 @@ class Config:
     DB_PWD = os.getenv("DB_PWD")
     DB_PORT = os.getenv("DB_PORT")
 
+    # DB connection pool
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    DB_POOL_IDLE_TIMEOUT = float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+    # SQL instrumentation: level and share of the statements logged, slow queries are always logged
+    SQL_LOG_LEVEL = os.getenv("SQL_LOG_LEVEL", "DEBUG")
+    SQL_LOG_SAMPLE_RATE = float(os.getenv("SQL_LOG_SAMPLE_RATE", "1.0"))
+    SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "500"))
+    SQL_STATS_SAMPLES = int(os.getenv("SQL_STATS_SAMPLES", "1000"))
+
+    # Request, SQL, pool, cache and TMDB metrics exported on GET /metrics
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+    # In-memory index of the upcoming seances serving GET /seance/<city>, reloaded every TTL seconds
+    SCHEDULE_INDEX_ENABLED = os.getenv("SCHEDULE_INDEX_ENABLED", "true").lower() == "true"
+    SCHEDULE_INDEX_TTL = float(os.getenv("SCHEDULE_INDEX_TTL", "300"))
+
+    # In-memory city/cinema search index (GET /seance/search), synced with et_cinema every TTL seconds
+    PLACE_INDEX_TTL = float(os.getenv("PLACE_INDEX_TTL", "600"))
+
+    # Dashboard stats: "query" counts movies and cinemas on each call, "counters" keeps them
+    # in memory, reconciled with the database every STATS_RECONCILE_INTERVAL seconds
+    STATS_MODE = os.getenv("STATS_MODE", "query")
+    STATS_RECONCILE_INTERVAL = float(os.getenv("STATS_RECONCILE_INTERVAL", "300"))
+
+    # Catalogue full-text search (GET /movie/search): index file, check against et_movie and save intervals
+    MOVIE_SEARCH_INDEX_PATH = os.getenv(
+        "MOVIE_SEARCH_INDEX_PATH", os.path.join(tempfile.gettempdir(), "ethiens_sme_movie_index.json")
+    )
+    MOVIE_SEARCH_TTL = float(os.getenv("MOVIE_SEARCH_TTL", "60"))
+    MOVIE_SEARCH_SAVE_INTERVAL = float(os.getenv("MOVIE_SEARCH_SAVE_INTERVAL", "30"))
+
+    # Encode the JSON responses with orjson when it is installed (pip install ethiens-sme[fast])
+    JSON_FAST_ENCODER = os.getenv("JSON_FAST_ENCODER", "true").lower() == "true"
+
+    # Per-request profiling: requests sending PROFILING_HEADER: 1, or a sample of all requests
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_HEADER = os.getenv("PROFILING_HEADER", "X-Ethiens-Profile")
+    PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+    PROFILING_CPROFILE = os.getenv("PROFILING_CPROFILE", "true").lower() == "true"
+    PROFILING_SLOW_MS = float(os.getenv("PROFILING_SLOW_MS", "500"))
+    PROFILING_DUMP_DIR = os.getenv("PROFILING_DUMP_DIR", os.path.join(tempfile.gettempdir(), "ethiens_sme_profiles"))
+
     # FLask configuration
     FLASK_DEBUG = os.getenv("FLASK_DEBUG")
     FLASK_HOST = os.getenv("FLASK_HOST")
@@ -33,5 +80,51 @@ class Config:
     JWT_COOKIE_CSRF_PROTECT = False
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
 
+    # Response cache (flask_caching). CACHE_TYPE is one of
+    # "ethiens_sme.utils.cache_backend.LRUCache" (in-process), "FileSystemCache" (CACHE_DIR)
+    # or "RedisCache" (CACHE_REDIS_URL, any Redis-compatible server)
+    CACHE_TYPE = os.getenv("CACHE_TYPE", "ethiens_sme.utils.cache_backend.LRUCache")
+    CACHE_DEFAULT_TIMEOUT = int(os.getenv("CACHE_DEFAULT_TIMEOUT", "60"))
+    CACHE_THRESHOLD = int(os.getenv("CACHE_THRESHOLD", "1000"))
+    CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(tempfile.gettempdir(), "ethiens_sme_cache"))
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "ethiens_sme:")
+    # Redis holding the invalidation generations when CACHE_TYPE is process-local, so the writes of
+    # the other processes (RQ worker, import scripts) evict the responses cached by every web worker
+    CACHE_GENERATIONS_REDIS_URL = os.getenv("CACHE_GENERATIONS_REDIS_URL")
+    # TTL in seconds of each cached endpoint, 0 disables caching for it
+    CACHE_TIMEOUTS = {
+        "movie_list": int(os.getenv("CACHE_TIMEOUT_MOVIE_LIST", "300")),
+        "movie_all": int(os.getenv("CACHE_TIMEOUT_MOVIE_ALL", "120")),
+        "seance_cinemas": int(os.getenv("CACHE_TIMEOUT_SEANCE_CINEMAS", "600")),
+        "seance_stats": int(os.getenv("CACHE_TIMEOUT_SEANCE_STATS", "30")),
+        "seance_upcoming": int(os.getenv("CACHE_TIMEOUT_SEANCE_UPCOMING", "60")),
+        "seance_city": int(os.getenv("CACHE_TIMEOUT_SEANCE_CITY", "60")),
+    }
+
+    # Maximum number of seances accepted by one bulk scheduling request
+    SEANCE_BULK_MAX_ROWS = int(os.getenv("SEANCE_BULK_MAX_ROWS", "5000"))
+
     # TMDB API Key
     TMDB_API_KEY = os.getenv("TMDB_API_KEY")
+    TMDB_BASE_URL = os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3")
+    TMDB_TIMEOUT = float(os.getenv("TMDB_TIMEOUT", "5"))
+    TMDB_RETRIES = int(os.getenv("TMDB_RETRIES", "3"))
+    TMDB_BACKOFF = float(os.getenv("TMDB_BACKOFF", "0.3"))
+    TMDB_POOL_SIZE = int(os.getenv("TMDB_POOL_SIZE", "10"))
+    TMDB_CACHE_PATH = os.getenv("TMDB_CACHE_PATH", os.path.join(tempfile.gettempdir(), "ethiens_sme_tmdb.sqlite3"))
+    TMDB_CACHE_MAX_ENTRIES = int(os.getenv("TMDB_CACHE_MAX_ENTRIES", "5000"))
+    TMDB_CACHE_TTL_SEARCH = int(os.getenv("TMDB_CACHE_TTL_SEARCH", "3600"))
+    TMDB_CACHE_TTL_DETAILS = int(os.getenv("TMDB_CACHE_TTL_DETAILS", "86400"))
+    TMDB_IMPORT_CAST_LIMIT = int(os.getenv("TMDB_IMPORT_CAST_LIMIT", "20"))
+
+    # Background jobs (flask_rq2)
+    RQ_REDIS_URL = os.getenv("RQ_REDIS_URL", "redis://localhost:6379/0")
+    RQ_IMPORT_TIMEOUT = int(os.getenv("RQ_IMPORT_TIMEOUT", "300"))
+
+    # Weekly reports (python -m ethiens_sme.job.report_job): the seance writes mark their week,
+    # the job computes the marked weeks every REPORT_REFRESH_INTERVAL seconds, REPORT_REFRESH_BATCH at a time
+    REPORTS_ENABLED = os.getenv("REPORTS_ENABLED", "true").lower() == "true"
+    REPORT_REFRESH_INTERVAL = float(os.getenv("REPORT_REFRESH_INTERVAL", "60"))
+    REPORT_REFRESH_BATCH = int(os.getenv("REPORT_REFRESH_BATCH", "200"))
+    RQ_REPORT_TIMEOUT = int(os.getenv("RQ_REPORT_TIMEOUT", "600"))
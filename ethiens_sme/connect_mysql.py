@@ -1,14 +1,45 @@
 """MySQL database interactions"""
 
+import logging
+import operator
 import os
+import threading
+import time
+import weakref
+from collections import deque
 from configparser import NoSectionError
+from contextlib import contextmanager
 import mysql.connector
+from flask import g, has_app_context
 from mysql.connector import Error
 
+from ethiens_sme.config import Config
+from ethiens_sme.utils import query_stats
+from ethiens_sme.utils.exception.exceptions import DatabaseUnavailableException
+
+logger = logging.getLogger(__name__)
+
+
+_connection_listeners = []
+
+
+def add_connection_listener(listener):
+    """
+    Call `listener(event, seconds)` on each "acquire" from the pool, each "release"
+    back to it and each "connect" to the server
+    """
+    _connection_listeners.append(listener)
+
+
+def _notify_connection(event, seconds):
+    for listener in _connection_listeners:
+        listener(event, seconds)
+
 
 def connect():
     """Connect to the MySQL database server"""
     conn = None
+    start = time.perf_counter()
     try:
         # read connection parameters
         params = {}
@@ -21,62 +52,362 @@ def connect():
             params["port"] = int(db_port_str)
         else:
             params["port"] = 3306  # Port MySQL par défaut si non spécifié
-        # connect to the PostgreSQL server
-        print("Connecting to the Mysql database...")
+        logger.debug("Connecting to the Mysql database %s:%s", params["host"], params["port"])
         conn = mysql.connector.connect(**params)
-
-        # create a cursor
-        cur = conn.cursor()
-
-        # execute a statement
-        print("Mysql database version:")
-        cur.execute("SELECT version()")
-
-        # display the PostgreSQL database server version
-        db_version = cur.fetchone()
-        print(db_version)
-
-        # close the communication with the PostgreSQL
-        cur.close()
     except (FileNotFoundError, NoSectionError, Error) as error:
-        print("Database connection failed:", error)
+        logger.error("Database connection failed: %s", error)
         conn = None
+    _notify_connection("connect", time.perf_counter() - start)
     return conn
 
 
 def disconnect(conn):
     """Close the connexion"""
     conn.close()
-    print("Database connection closed.")
+    logger.debug("Database connection closed.")
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of MySQL connections.
+    Keeps up to `size` idle connections open and allows `max_overflow` extra
+    connections under load, which are closed as soon as they are released.
+    """
+
+    def __init__(self, size, max_overflow=0, timeout=10, idle_timeout=300, pre_ping=True):
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.pre_ping = pre_ping
+
+        self._idle = deque()  # (connection, released_at)
+        self._cond = threading.Condition()
+        self._opened = 0
+        self._borrowed = 0
+
+        self._borrow_count = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+        self._discarded = 0
+
+    def acquire(self):
+        """Borrow a connection, waiting up to `timeout` seconds when the pool is exhausted"""
+        start = time.monotonic()
+        conn = None
+        must_open = False
+
+        with self._cond:
+            while True:
+                conn = self._pop_idle()
+                if conn is not None:
+                    break
+                if self._opened < self.size + self.max_overflow:
+                    self._opened += 1
+                    must_open = True
+                    break
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise DatabaseUnavailableException("DATABASE_POOL_EXHAUSTED")
+                self._cond.wait(remaining)
+            self._borrowed += 1
+
+        try:
+            if must_open:
+                conn = self._open()
+            elif self.pre_ping and not self._is_alive(conn):
+                self._close(conn)
+                conn = self._open()
+        except Exception:
+            with self._cond:
+                self._opened -= 1
+                self._borrowed -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._borrow_count += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        _notify_connection("acquire", waited)
+        return conn
+
+    def release(self, conn, discard=False):
+        """Give a connection back to the pool, closing it if it is broken or in overflow"""
+        start = time.perf_counter()
+        if not discard:
+            try:
+                # Never hand over a connection with a pending transaction
+                if conn.in_transaction:
+                    conn.rollback()
+            except Error:
+                discard = True
+
+        with self._cond:
+            self._borrowed -= 1
+            if discard or len(self._idle) >= self.size:
+                self._opened -= 1
+                self._discarded += 1
+                to_close = conn
+            else:
+                self._idle.append((conn, time.monotonic()))
+                to_close = None
+            self._cond.notify()
+
+        if to_close is not None:
+            self._close(to_close)
+        _notify_connection("release", time.perf_counter() - start)
+
+    def stats(self) -> dict:
+        """Usage counters, useful to size the pool"""
+        with self._cond:
+            return {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "opened": self._opened,
+                "borrowed": self._borrowed,
+                "idle": len(self._idle),
+                "borrows": self._borrow_count,
+                "timeouts": self._timeouts,
+                "discarded": self._discarded,
+                "wait_total_ms": round(self._wait_total * 1000, 3),
+                "wait_max_ms": round(self._wait_max * 1000, 3),
+                "wait_avg_ms": round(self._wait_total * 1000 / self._borrow_count, 3) if self._borrow_count else 0.0,
+            }
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._opened -= len(idle)
+        for conn in idle:
+            self._close(conn)
+
+    def _pop_idle(self):
+        """Take the most recently used idle connection, dropping the expired ones. Lock must be held."""
+        now = time.monotonic()
+        while self._idle:
+            conn, released_at = self._idle.pop()
+            if self.idle_timeout and now - released_at > self.idle_timeout:
+                self._opened -= 1
+                self._discarded += 1
+                self._close(conn)
+                continue
+            return conn
+        return None
+
+    @staticmethod
+    def _open():
+        conn = connect()
+        if conn is None:
+            raise DatabaseUnavailableException()
+        return conn
+
+    @staticmethod
+    def _is_alive(conn) -> bool:
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Error:
+            pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool  # pylint: disable=global-statement
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    size=Config.DB_POOL_SIZE,
+                    max_overflow=Config.DB_POOL_MAX_OVERFLOW,
+                    timeout=Config.DB_POOL_TIMEOUT,
+                    idle_timeout=Config.DB_POOL_IDLE_TIMEOUT,
+                    pre_ping=Config.DB_POOL_PRE_PING,
+                )
+    return _pool
+
+
+@contextmanager
+def borrow():
+    """
+    Borrow a pooled connection for the duration of a `with` block.
+    Inside a Flask request (or any app context) the connection is bound to `g`
+    so every service call of the request shares it; it is released by the
+    teardown registered in `init_app`. Elsewhere the connection is returned to
+    the pool at the end of the block, or closed if the block failed on a
+    database error.
+    """
+    if has_app_context():
+        conn = g.get("_db_conn")
+        if conn is None:
+            conn = get_pool().acquire()
+            g._db_conn = conn  # pylint: disable=protected-access
+        try:
+            yield conn
+        except Error:
+            g._db_conn_broken = True  # pylint: disable=protected-access
+            raise
+        return
+
+    pool = get_pool()
+    conn = pool.acquire()
+    broken = False
+    try:
+        yield conn
+    except Error:
+        broken = True
+        raise
+    finally:
+        pool.release(conn, discard=broken)
+
+
+def release_request_connection(_exception=None):
+    """Give the connection bound to the current app context back to the pool (a later borrow gets a new one)"""
+    conn = g.pop("_db_conn", None)
+    broken = g.pop("_db_conn_broken", False)
+    if conn is not None:
+        get_pool().release(conn, discard=broken)
+
+
+def init_app(app):
+    """Release the request-scoped connection when the app context ends"""
+    app.teardown_appcontext(release_request_connection)
+
+
+_transactions = weakref.WeakKeyDictionary()  # connection -> nesting depth
+
+
+@contextmanager
+def transaction(conn):
+    """
+    Unit of work: statements executed on `conn` inside the block are committed
+    once at the end, or rolled back together if the block raises.
+    A nested block runs in a savepoint: if it raises, only its own statements
+    are rolled back and the outer transaction goes on.
+    """
+    depth = _transactions.get(conn, 0)
+    savepoint = f"unit_of_work_{depth}"
+    _transactions[conn] = depth + 1
+    try:
+        if depth:
+            _execute_control(conn, f"SAVEPOINT {savepoint}")
+        yield conn
+        if depth:
+            _execute_control(conn, f"RELEASE SAVEPOINT {savepoint}")
+        else:
+            conn.commit()
+    except BaseException:
+        if depth:
+            _execute_control(conn, f"ROLLBACK TO SAVEPOINT {savepoint}")
+        else:
+            conn.rollback()
+        raise
+    finally:
+        if depth:
+            _transactions[conn] = depth
+        else:
+            _transactions.pop(conn, None)
+
+
+def _execute_control(conn, statement):
+    """Run a transaction control statement"""
+    cur = conn.cursor()
+    cur.execute(statement)
+    cur.close()
+
+
+@contextmanager
+def unit_of_work():
+    """Borrow a connection and run the block in a single transaction"""
+    with borrow() as conn, transaction(conn):
+        yield conn
+
+
+def pool_stats() -> dict:
+    """Stats of the process-wide connection pool"""
+    return get_pool().stats()
 
 
 def execute_command(conn, query, params=None):
-    """Execute a SQL command"""
+    """Execute a SQL command. Returns the ID generated by an INSERT, the number of rows affected otherwise."""
     cur = conn.cursor()
     returning_value = None
 
-    print(query)
-    print("params", params)
-    cur.execute(query, params)
+    start = time.perf_counter()
+    try:
+        cur.execute(query, params)
+    except Error as error:
+        query_stats.record(query, time.perf_counter() - start, 0, error)
+        raise
+    query_stats.record(query, time.perf_counter() - start, cur.rowcount)
 
-    if "returning" in query.lower():
+    if "returning" in query.lower() or query.lstrip().lower().startswith("insert"):
         returning_value = cur.lastrowid
+    else:
+        returning_value = cur.rowcount
 
-    # Commit the changes
-    conn.commit()
+    # Commit the changes, unless a unit of work will commit them all at once
+    if conn not in _transactions:
+        conn.commit()
     # Close communication with the PostgreSQL database server
     cur.close()
     return returning_value
 
 
+def execute_many(conn, query, seq_params):
+    """
+    Execute a SQL command for each set of parameters.
+    A plain `INSERT INTO ... VALUES (...)` is sent by the connector as a single
+    multi-row INSERT, so the whole batch costs one round-trip. For an INSERT,
+    returns the ID generated for the first row, like LAST_INSERT_ID().
+    """
+    seq_params = list(seq_params)
+    if not seq_params:
+        return None
+
+    cur = conn.cursor()
+    returning_value = None
+
+    start = time.perf_counter()
+    try:
+        cur.executemany(query, seq_params)
+    except Error as error:
+        query_stats.record(query, time.perf_counter() - start, 0, error)
+        raise
+    query_stats.record(query, time.perf_counter() - start, cur.rowcount)
+
+    if query.lstrip().lower().startswith("insert"):
+        returning_value = cur.lastrowid
+
+    if conn not in _transactions:
+        conn.commit()
+    cur.close()
+    return returning_value
+
+
 def get_query(conn, query, params=None, return_dict=False):
     """Query data from db"""
     if conn is None:
         raise ValueError("No database connection available.")
 
-    print(query)
-    print("params", params)
     rows = None
+    start = time.perf_counter()
     try:
         if return_dict:
             cur = conn.cursor(dictionary=True)
@@ -87,9 +418,147 @@ def get_query(conn, query, params=None, return_dict=False):
         rows = cur.fetchall()
         cur.close()
     except Error as error:
-        print(error)
+        query_stats.record(query, time.perf_counter() - start, 0, error)
+        return rows
+    query_stats.record(query, time.perf_counter() - start, len(rows))
     return rows
 
 
+def get_query_mapped(conn, query, params, columns, factory) -> list:
+    """
+    Query data and build one object per row with `factory(*values)`, the values
+    being the `columns` of the row, in that order.
+    Rows are fetched as tuples and the column positions are resolved once for
+    the query, so no intermediate dict is built per row.
+    Returns None if the query failed, like get_query.
+    """
+    if conn is None:
+        raise ValueError("No database connection available.")
+
+    start = time.perf_counter()
+    try:
+        cur = conn.cursor()
+        cur.execute(query, params)
+        names = [description[0] for description in cur.description or ()]
+        rows = cur.fetchall()
+        cur.close()
+    except Error as error:
+        query_stats.record(query, time.perf_counter() - start, 0, error)
+        return None
+    query_stats.record(query, time.perf_counter() - start, len(rows))
+
+    if not rows:
+        return []
+    positions = [names.index(column) for column in columns]
+    if len(positions) == 1:
+        position = positions[0]
+        return [factory(row[position]) for row in rows]
+    values = operator.itemgetter(*positions)
+    return [factory(*values(row)) for row in rows]
+
+
+class QueryStream:
+    """
+    Rows of a query read from an unbuffered cursor, `batch_size` rows at a
+    time, so memory does not depend on the size of the result.
+    Iterate it for the rows (tuples), or over `batches()` for lists of rows.
+    """
+
+    def __init__(self, conn, query, params=None, batch_size=1000):
+        self.query = query
+        self.batch_size = batch_size
+        self.row_count = 0
+        self.exhausted = False
+        self._conn = conn
+        self._start = time.perf_counter()
+        self._cur = conn.cursor(buffered=False)
+        try:
+            self._cur.execute(query, params)
+        except Error as error:
+            self._record(error)
+            raise
+        self.columns = tuple(description[0] for description in self._cur.description or ())
+
+    def batches(self):
+        """Yield the rows by lists of at most `batch_size`"""
+        while not self.exhausted:
+            try:
+                rows = self._cur.fetchmany(self.batch_size)
+            except Error as error:
+                self._record(error)
+                raise
+            if not rows:
+                self.exhausted = True
+                self._record()
+                break
+            self.row_count += len(rows)
+            yield rows
+
+    def __iter__(self):
+        for rows in self.batches():
+            yield from rows
+
+    def close(self, drain=False) -> bool:
+        """
+        Close the cursor. With `drain`, the unread rows are read and dropped first.
+        Returns whether the connection can be reused: False when unread rows are left.
+        """
+        if not self.exhausted and drain:
+            self._conn.consume_results()
+            self.exhausted = True
+            self._record()
+        if not self.exhausted:
+            self._record()
+            return False
+        self._cur.close()
+        return True
+
+    def _record(self, error=None):
+        # Covers the whole iteration, time spent by the consumer included
+        if self._start is not None:
+            query_stats.record(self.query, time.perf_counter() - self._start, self.row_count, error)
+            self._start = None
+
+
+@contextmanager
+def stream_query(query, params=None, batch_size=1000, drain=False):
+    """
+    Stream the rows of a query inside a `with` block:
+
+        with connect_mysql.stream_query(query, params) as rows:
+            for row in rows:
+                ...
+
+    The query runs on a connection of its own, borrowed from the pool for the
+    block and never the one bound to the request, so other queries can run
+    meanwhile. When the block ends the cursor is closed. If rows were left
+    unread (the block broke out or raised), the connection is closed rather
+    than reading the rest of a possibly huge result, unless `drain` asks to
+    read and drop them to give the connection back to the pool.
+    """
+    pool = get_pool()
+    conn = pool.acquire()
+    reusable = False
+    try:
+        stream = QueryStream(conn, query, params, batch_size)
+        try:
+            yield stream
+        finally:
+            reusable = stream.close(drain)
+    finally:
+        pool.release(conn, discard=not reusable)
+
+
+def dict_factory(*keys):
+    """Row factory of get_query_mapped building {key: value} dicts"""
+
+    def build(*values):
+        return dict(zip(keys, values))
+
+    return build
+
+
 if __name__ == "__main__":
-    connect()
+    with borrow() as connection:
+        print("Mysql database version:")
+        print(get_query(connection, "SELECT version()"))
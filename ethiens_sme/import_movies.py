@@ -0,0 +1,168 @@
+"""
+Bulk import of a movie catalogue.
+
+    python -m ethiens_sme.import_movies catalogue.jsonl
+    python -m ethiens_sme.import_movies catalogue.csv --batch-size 1000
+
+JSONL lines use the same payload as POST /movie/. CSV files have one column
+per field of that payload, with the actor names separated by "|".
+The file is streamed and written in batches, so memory does not depend on its
+size; only the {actor name: id} map is kept for the whole file, to resolve
+each actor once.
+Each batch is committed on its own. When one fails, the import stops (or goes
+on with --keep-going) and the summary gives the lines of the failed batches
+and the line to resume from.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from itertools import islice
+from typing import Iterator, TextIO
+
+from ethiens_sme.service import movie_service
+from ethiens_sme.utils import response_cache
+
+FIELDS = (
+    "title",
+    "date_publication",
+    "length_minutes",
+    "minimum_age",
+    "synopsis",
+    "poster",
+    "country",
+    "producer",
+    "begin_date",
+    "end_date",
+    "actor_names",
+)
+
+
+def read_rows(stream: TextIO, file_format: str) -> Iterator[tuple]:
+    """Yield (line number, raw row) from a JSONL or CSV stream"""
+    if file_format == "jsonl":
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if line:
+                yield line_number, line
+    else:
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def parse_row(raw, file_format: str) -> dict:
+    """
+    Turn a raw row into a create_movie payload, with the same rules as POST /movie/.
+    Raises ValueError for an invalid row.
+    """
+    if file_format == "jsonl":
+        data = json.loads(raw)
+        if not isinstance(data, dict):
+            raise ValueError("a JSON object is expected")
+    else:
+        data = {key: value for key, value in raw.items() if key in FIELDS and value not in (None, "")}
+        data["actor_names"] = data.get("actor_names", "").split("|")
+
+    if not data.get("title") or not isinstance(data["title"], str):
+        raise ValueError("Title is required")
+    data["title"] = data["title"].strip()
+
+    if data.get("length_minutes") not in (None, ""):
+        data["length_minutes"] = int(data["length_minutes"])
+
+    actor_names = data.get("actor_names") or []
+    if not isinstance(actor_names, list):
+        raise ValueError("actor_names must be a list")
+    data["actor_names"] = [name for name in actor_names if isinstance(name, str) and name.strip()]
+
+    return movie_service.sanitize_movie_data(data)
+
+
+def valid_rows(stream: TextIO, file_format: str, stats: dict) -> Iterator[tuple]:
+    """(line number, parsed row) of the stream, invalid rows are reported and skipped"""
+    for line_number, raw in read_rows(stream, file_format):
+        try:
+            yield line_number, parse_row(raw, file_format)
+        except (ValueError, TypeError) as error:
+            stats["skipped"] += 1
+            print(f"Line {line_number} skipped: {error}", file=sys.stderr)
+
+
+def import_catalogue(stream: TextIO, file_format: str, batch_size: int, keep_going: bool = False) -> dict:
+    """
+    Import every valid row of the stream, returns the import counters.
+    A batch that fails is rolled back and reported in "failed_batches"; the import
+    stops there unless `keep_going`, "resume_line" being the first line not imported.
+    """
+    stats = {
+        "imported": 0,
+        "skipped": 0,
+        "failed": 0,
+        "batches": 0,
+        "failed_batches": [],
+        "resume_line": None,
+        "actors": 0,
+        "seconds": 0.0,
+        "rows_per_second": 0.0,
+    }
+    actor_ids = {}
+    start = time.perf_counter()
+
+    rows = valid_rows(stream, file_format, stats)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+
+        first_line, last_line = batch[0][0], batch[-1][0]
+        try:
+            movie_service.create_movies([data for _, data in batch], actor_ids)
+        except Exception as error:  # pylint: disable=broad-except
+            stats["failed"] += len(batch)
+            stats["failed_batches"].append({"first_line": first_line, "last_line": last_line, "error": str(error)})
+            print(f"Lines {first_line}-{last_line} not imported: {error}", file=sys.stderr)
+            if not keep_going:
+                stats["resume_line"] = first_line
+                break
+            continue
+
+        stats["imported"] += len(batch)
+        stats["batches"] += 1
+        elapsed = time.perf_counter() - start
+        print(f"{stats['imported']} movies imported ({stats['imported'] / elapsed:.1f} rows/s)", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    stats["actors"] = len(actor_ids)
+    stats["seconds"] = round(elapsed, 3)
+    stats["rows_per_second"] = round(stats["imported"] / elapsed, 1) if elapsed else 0.0
+    return stats
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Bulk import of a movie catalogue (JSONL or CSV)")
+    parser.add_argument("path", help="catalogue file, '-' for stdin")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=500, help="movies written per transaction")
+    parser.add_argument("--keep-going", action="store_true", help="go on with the next batches when one fails")
+    args = parser.parse_args(argv)
+
+    file_format = args.format or ("csv" if args.path.lower().endswith(".csv") else "jsonl")
+    response_cache.check_shared("import_movies")
+
+    if args.path == "-":
+        stats = import_catalogue(sys.stdin, file_format, args.batch_size, args.keep_going)
+    else:
+        with open(args.path, newline="", encoding="utf-8") as stream:
+            stats = import_catalogue(stream, file_format, args.batch_size, args.keep_going)
+
+    print(json.dumps(stats))
+    if stats["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Load a CSV schedule file of seances.
+
+    python -m ethiens_sme.import_seances schedule.csv
+
+Columns: date_time, room, language, movie_id, cinema_id. The whole file is
+validated first and written in a single transaction, like POST /seance/bulk:
+if the write fails, nothing is saved and the summary gives the failed count.
+"""
+
+import argparse
+import json
+import sys
+
+from ethiens_sme.service import seance_service
+from ethiens_sme.utils import response_cache
+from ethiens_sme.utils.exception.seance_exceptions import InvalidSeancesException
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Load a CSV schedule of seances")
+    parser.add_argument("path", help="schedule file, '-' for stdin")
+    args = parser.parse_args(argv)
+    response_cache.check_shared("import_seances")
+
+    if args.path == "-":
+        rows = seance_service.parse_schedule_csv(sys.stdin)
+    else:
+        with open(args.path, newline="", encoding="utf-8") as stream:
+            rows = seance_service.parse_schedule_csv(stream)
+
+    try:
+        new_ids = seance_service.create_seances(rows)
+    except InvalidSeancesException as error:
+        for row_error in error.errors:
+            # +2: header line, and rows are numbered from 0
+            print(f"Line {row_error['row'] + 2}: {row_error['message']}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as error:  # pylint: disable=broad-except
+        # The transaction was rolled back: nothing was written, the file can be loaded again as is
+        print(json.dumps({"count": 0, "failed": len(rows), "error": str(error)}))
+        sys.exit(1)
+
+    print(json.dumps({"count": len(new_ids), "failed": 0, "ids": new_ids}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+"""Background jobs for movies, run by `flask rq worker`"""
+
+from ethiens_sme import rq
+from ethiens_sme.config import Config
+from ethiens_sme.service import movie_service, tmdb_service
+from ethiens_sme.utils import response_cache
+
+
+@rq.job(timeout=Config.RQ_IMPORT_TIMEOUT)
+def import_tmdb_movie(tmdb_id: str) -> int:
+    """Fetch a movie from TMDB and create it with its cast. Returns the new movie ID."""
+    response_cache.check_shared("RQ worker")
+    details = tmdb_service.get_movie_details(tmdb_id)
+    data = tmdb_service.to_movie_data(details, Config.TMDB_IMPORT_CAST_LIMIT)
+    if not data.get("title"):
+        raise ValueError(f"TMDB movie {tmdb_id} has no title")
+
+    return movie_service.create_movie(movie_service.sanitize_movie_data(data))
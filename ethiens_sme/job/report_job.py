@@ -0,0 +1,59 @@
+"""
+Refresh of the weekly reports, run by `flask rq worker` or by its own scheduler:
+
+    python -m ethiens_sme.job.report_job              # refresh every REPORT_REFRESH_INTERVAL seconds
+    python -m ethiens_sme.job.report_job --enqueue    # queue the refresh on RQ instead of running it
+    python -m ethiens_sme.job.report_job --once --full
+"""
+
+import argparse
+import time
+
+from ethiens_sme import rq
+from ethiens_sme.config import Config
+from ethiens_sme.service import report_service
+
+
+@rq.job(timeout=Config.RQ_REPORT_TIMEOUT)
+def refresh_reports(full: bool = False) -> int:
+    """Compute the reports of every marked week (all of them with `full`). Returns the number of weeks."""
+    if full:
+        report_service.mark_all()
+    total = 0
+    while True:
+        refreshed = report_service.refresh()
+        total += refreshed
+        if refreshed < Config.REPORT_REFRESH_BATCH:
+            return total
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Refresh of the weekly reports")
+    parser.add_argument("--once", action="store_true", help="refresh once and exit")
+    parser.add_argument("--full", action="store_true", help="compute every week again, not only the marked ones")
+    parser.add_argument("--enqueue", action="store_true", help="queue the refresh on RQ instead of running it")
+    parser.add_argument("--interval", type=float, default=Config.REPORT_REFRESH_INTERVAL, help="seconds between runs")
+    args = parser.parse_args(argv)
+
+    def run(full=False):
+        if args.enqueue:
+            job = refresh_reports.queue(full)
+            print(f"Report refresh queued: {job.id}")
+        else:
+            print(f"{refresh_reports(full)} week(s) refreshed")
+
+    run(args.full)
+    if args.once:
+        return
+
+    import schedule  # pylint: disable=import-outside-toplevel
+
+    schedule.every(args.interval).seconds.do(run)
+    while True:
+        schedule.run_pending()
+        time.sleep(min(1.0, args.interval))
+
+
+if __name__ == "__main__":
+    main()
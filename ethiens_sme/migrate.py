@@ -0,0 +1,239 @@
+"""
+Schema migrations and query plan checks.
+
+    python -m ethiens_sme.migrate upgrade    # apply the pending migrations
+    python -m ethiens_sme.migrate status     # list applied and pending migrations
+    python -m ethiens_sme.migrate explain    # EXPLAIN the service queries, fail on full table scans
+"""
+
+import argparse
+import importlib
+import pkgutil
+import sys
+
+from ethiens_sme import connect_mysql, migrations
+
+QUERY_CREATE_MIGRATION_TABLE = """
+    CREATE TABLE IF NOT EXISTS et_schema_migration (
+        sm_version INT NOT NULL,
+        sm_name VARCHAR(100) NOT NULL,
+        sm_applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (sm_version)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+"""
+
+
+def available_migrations() -> list:
+    """(version, name, module) of the migrations shipped with the package, in order"""
+    found = []
+    for module_info in pkgutil.iter_modules(migrations.__path__):
+        prefix, _, name = module_info.name.partition("_")
+        if prefix.startswith("m") and prefix[1:].isdigit():
+            found.append((int(prefix[1:]), name, f"{migrations.__name__}.{module_info.name}"))
+    return sorted(found)
+
+
+def applied_versions(conn) -> set:
+    """Versions already applied to the database"""
+    connect_mysql.execute_command(conn, QUERY_CREATE_MIGRATION_TABLE)
+    rows = connect_mysql.get_query(conn, "SELECT sm_version FROM et_schema_migration;")
+    return {row[0] for row in rows or []}
+
+
+def upgrade() -> list:
+    """Apply the pending migrations in order, returns the versions applied"""
+    applied = []
+    with connect_mysql.borrow() as conn:
+        done = applied_versions(conn)
+        for version, name, module_name in available_migrations():
+            if version in done:
+                continue
+            print(f"Applying migration {version:04d} {name}")
+            # DDL statements commit implicitly in MySQL: each migration must be idempotent
+            importlib.import_module(module_name).upgrade(conn)
+            connect_mysql.execute_command(
+                conn, "INSERT INTO et_schema_migration (sm_version, sm_name) VALUES (%s, %s);", (version, name)
+            )
+            applied.append(version)
+    return applied
+
+
+def status():
+    """Print every migration with its state"""
+    with connect_mysql.borrow() as conn:
+        done = applied_versions(conn)
+    for version, name, _ in available_migrations():
+        state = "applied" if version in done else "pending"
+        print(f"{version:04d} {name}: {state}")
+
+
+def _sample_arguments(conn) -> dict:
+    """Real values to explain the statements with, so the plans match production"""
+
+    def first(query):
+        rows = connect_mysql.get_query(conn, query)
+        return rows[0][0] if rows else None
+
+    return {
+        "movie_id": first("SELECT mo_id_movie FROM et_movie ORDER BY mo_id_movie LIMIT 1;") or 0,
+        "movie_title": first("SELECT mo_title FROM et_movie ORDER BY mo_title LIMIT 1;") or "",
+        "cinema_id": first("SELECT ci_id_cinema FROM et_cinema ORDER BY ci_id_cinema LIMIT 1;") or 0,
+        "city": first("SELECT ci_city FROM et_cinema ORDER BY ci_id_cinema LIMIT 1;") or "",
+        "login": first("SELECT us_pseudo FROM et_user ORDER BY us_id_user LIMIT 1;") or "",
+        "actor_name": first("SELECT ac_actor_name FROM et_actors ORDER BY ac_id_actor LIMIT 1;") or "",
+    }
+
+
+def _statements(sample: dict) -> list:
+    """(statement, parameters) of every query of the service layer, with sample values"""
+    # pylint: disable=import-outside-toplevel
+    from datetime import datetime, timedelta
+    from ethiens_sme.service import (
+        actor_service,
+        export_service,
+        movie_search,
+        movie_service,
+        place_index,
+        report_service,
+        schedule_index,
+        seance_service,
+        stats_service,
+        user_service,
+    )
+
+    now = datetime.now().replace(microsecond=0)
+    week = report_service.week_start(now)
+    week_start = datetime.combine(week, datetime.min.time())
+    movie_id, cinema_id, title = sample["movie_id"], sample["cinema_id"], sample["movie_title"]
+    city_filters = " ".join(f"AND {condition}" for condition in seance_service.CITY_FILTERS.values())
+    existing_ids = seance_service.QUERY_EXISTING_IDS
+    # The exports filtered on each filter alone, then on all of them. The unfiltered
+    # exports stream whole tables on purpose, like mark_all: they are not checked.
+    export_filters = [
+        {"city": sample["city"]},
+        {"cinema_id": cinema_id},
+        {"date_from": week},
+        {"date_to": week},
+        {"city": sample["city"], "cinema_id": cinema_id, "date_from": week, "date_to": week},
+    ]
+    exports = [
+        build(filters)
+        for filters in export_filters
+        for build in (export_service.seances_query, export_service.movies_query)
+    ]
+
+    return [
+        (actor_service.QUERY_ACTOR_IDS.format(placeholders="%s"), (sample["actor_name"],)),
+        (actor_service.QUERY_INSERT_ACTORS.format(values="(%s, NULL)"), (sample["actor_name"],)),
+        (movie_service.QUERY_ACTORS_BY_MOVIES.format(placeholders="%s"), (movie_id,)),
+        (movie_service.QUERY_MOVIE_DETAILS, (movie_id,)),
+        (movie_service.QUERY_INSERT_MOVIE, (title, None, 90, None, None, None, None, None, None, None)),
+        (movie_service.QUERY_INSERT_CASTING, (movie_id, 0)),
+        (movie_service.QUERY_CHECK_MOVIE_IDS, (movie_id, movie_id)),
+        (movie_service.QUERY_DELETE_CASTING, (movie_id,)),
+        (movie_service.QUERY_DELETE_MOVIE_SEANCES, (movie_id,)),
+        (movie_service.QUERY_DELETE_MOVIE, (movie_id,)),
+        (movie_service.QUERY_MOVIE_LIST, None),
+        (movie_service.QUERY_MOVIES_PAGE, (20, 0)),
+        (movie_service.QUERY_MOVIES_AFTER, (title, title, movie_id, 20)),
+        (movie_search.QUERY_MOVIES.format(placeholders="%s"), (movie_id,)),
+        (movie_search.QUERY_ACTORS.format(placeholders="%s"), (movie_id,)),
+        (movie_search.QUERY_MOVIE_IDS, None),
+        (place_index.QUERY_CINEMAS, None),
+        (schedule_index.QUERY_UPCOMING.format(condition=""), None),
+        (schedule_index.QUERY_UPCOMING.format(condition="AND s.se_id_seance IN (%s)"), (0,)),
+        (seance_service.QUERY_CITY_SEANCES.format(filters=""), (sample["city"],)),
+        (seance_service.QUERY_CITY_SEANCES.format(filters=city_filters), (sample["city"], now, now, "VF")),
+        (seance_service.QUERY_INSERT_SEANCE, (now, "Salle 1", "VF", movie_id, cinema_id)),
+        (seance_service.QUERY_CHECK_SEANCE_IDS, (0, 0)),
+        (existing_ids.format(table="et_movie", column="mo_id_movie", placeholders="%s"), (movie_id,)),
+        (existing_ids.format(table="et_cinema", column="ci_id_cinema", placeholders="%s"), (cinema_id,)),
+        (seance_service.QUERY_UPCOMING_PAGE, (20, 0)),
+        (seance_service.QUERY_UPCOMING_AFTER, (now, now, 0, 20)),
+        (seance_service.QUERY_CINEMA_ROOMS, (cinema_id,)),
+        (seance_service.QUERY_CINEMAS, None),
+        (seance_service.QUERY_CINEMA, (cinema_id,)),
+        (seance_service.QUERY_DELETE_SEANCE, (0,)),
+        (seance_service.QUERY_CINEMA_SEANCES, (cinema_id,)),
+        (stats_service.QUERY_COUNTS, None),
+        (stats_service.QUERY_BREAKDOWN, (now + timedelta(days=stats_service.DAYS),)),
+        (stats_service.QUERY_COUNTS_AND_BREAKDOWN, (now + timedelta(days=stats_service.DAYS),)),
+        (report_service.QUERY_MARK_WEEK, (cinema_id, week)),
+        (report_service.QUERY_MARK_SEANCES.format(condition="se_id_seance = %s"), (0,)),
+        (report_service.QUERY_MARK_SEANCES.format(condition="mo_id_movie = %s"), (movie_id,)),
+        # mark_all reads the whole of et_seance on purpose, it is not checked
+        (report_service.QUERY_WEEK_SEANCES, (cinema_id, week_start, week_start + timedelta(days=7))),
+        (report_service.QUERY_DELETE_ROOM_WEEK, (cinema_id, week)),
+        (report_service.QUERY_DELETE_MOVIE_WEEK, (cinema_id, week)),
+        (report_service.QUERY_INSERT_ROOM_WEEK, (cinema_id, week, "Salle 1", 0, 0, 0, 0, 0, None, None, 0)),
+        (report_service.QUERY_INSERT_MOVIE_WEEK, (cinema_id, week, movie_id, 0, 0)),
+        (report_service.QUERY_CLEAR_MARK, (cinema_id, week, now)),
+        (report_service.QUERY_MARKED_WEEKS, (200,)),
+        (report_service.QUERY_IS_MARKED, (cinema_id, week)),
+        (report_service.QUERY_ROOM_WEEK, (cinema_id, week)),
+        (report_service.QUERY_MOVIE_WEEK, (cinema_id, week)),
+        (report_service.QUERY_ROOM_WEEKS, (cinema_id, week, week + timedelta(weeks=4))),
+        (user_service.QUERY_USER_BY_LOGIN, (sample["login"],)),
+        *exports,
+    ]
+
+
+def explain(min_rows: int = 0) -> tuple:
+    """
+    EXPLAIN every statement of the service layer, with sample values; nothing is executed.
+    Returns the full table scans found on tables estimated above `min_rows` rows,
+    and the statements MySQL could not explain.
+    """
+    full_scans = []
+    errors = []
+    with connect_mysql.borrow() as conn:
+        for query, params in _statements(_sample_arguments(conn)):
+            text = " ".join(query.split())
+            plan = connect_mysql.get_query(conn, f"EXPLAIN {query}", params, True)
+            if plan is None:
+                print(f"[ERROR] {text[:100]}")
+                errors.append(text)
+                continue
+            for row in plan:
+                table = row.get("table") or ""
+                # The target row of an INSERT is never read
+                is_full_scan = row.get("type") == "ALL" and row.get("select_type") != "INSERT"
+                is_full_scan = is_full_scan and not table.startswith("<")
+                marker = "FULL SCAN" if is_full_scan else "ok"
+                plan_text = f"type={row.get('type')} key={row.get('key')} rows={row.get('rows')}"
+                print(f"[{marker}] {table} {plan_text}: {text[:100]}")
+                if is_full_scan and (row.get("rows") or 0) >= min_rows:
+                    full_scans.append((text, row))
+    return full_scans, errors
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Schema migrations and query plan checks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("upgrade", help="apply the pending migrations")
+    subparsers.add_parser("status", help="list applied and pending migrations")
+    explain_parser = subparsers.add_parser("explain", help="fail if a service query does a full table scan")
+    explain_parser.add_argument(
+        "--min-rows", type=int, default=0, help="ignore full scans of tables estimated below this many rows"
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "upgrade":
+        applied = upgrade()
+        print(f"{len(applied)} migration(s) applied")
+    elif args.command == "status":
+        status()
+    else:
+        full_scans, errors = explain(args.min_rows)
+        if errors:
+            print(f"{len(errors)} statement(s) could not be explained", file=sys.stderr)
+        if full_scans:
+            print(f"{len(full_scans)} full table scan(s) found", file=sys.stderr)
+        if errors or full_scans:
+            sys.exit(1)
+        print("No full table scan")
+
+
+if __name__ == "__main__":
+    main()
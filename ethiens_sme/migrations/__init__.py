@@ -0,0 +1,44 @@
+"""
+Versioned schema migrations, applied in order by `python -m ethiens_sme.migrate`.
+Each module named mNNNN_<name>.py defines `upgrade(conn)`; the helpers below keep
+the migrations idempotent on databases created before the migrations existed.
+"""
+
+from ethiens_sme import connect_mysql
+
+
+def execute(conn, statement, params=None):
+    """Run a DDL/DML statement of a migration"""
+    connect_mysql.execute_command(conn, statement, params)
+
+
+def table_indexes(conn, table: str, unique_only: bool = False) -> list:
+    """Column tuples of the indexes of `table`"""
+    query = """
+        SELECT INDEX_NAME, COLUMN_NAME, NON_UNIQUE
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX;
+    """
+    indexes = {}
+    for index_name, column_name, non_unique in connect_mysql.get_query(conn, query, (table,)) or []:
+        if unique_only and non_unique:
+            continue
+        indexes.setdefault(index_name, []).append(column_name)
+    return [tuple(columns) for columns in indexes.values()]
+
+
+def create_index(conn, table: str, name: str, columns: tuple, unique: bool = False):
+    """
+    Create an index, unless it is already covered: by an index starting with the
+    same columns, or for a unique index by a unique index on exactly these columns.
+    """
+    columns = tuple(columns)
+    if unique:
+        if columns in table_indexes(conn, table, unique_only=True):
+            return
+    elif any(index[: len(columns)] == columns for index in table_indexes(conn, table)):
+        return
+
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    execute(conn, f"CREATE {kind} {name} ON {table} ({', '.join(columns)});")
@@ -0,0 +1,78 @@
+"""Tables of the application"""
+
+from ethiens_sme.migrations import execute
+
+STATEMENTS = (
+    """
+    CREATE TABLE IF NOT EXISTS et_user (
+        us_id_user INT NOT NULL AUTO_INCREMENT,
+        us_pseudo VARCHAR(50) NOT NULL,
+        us_password VARCHAR(255) NOT NULL,
+        us_is_admin TINYINT(1) NOT NULL DEFAULT 0,
+        PRIMARY KEY (us_id_user),
+        UNIQUE KEY uq_user_pseudo (us_pseudo)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS et_cinema (
+        ci_id_cinema INT NOT NULL AUTO_INCREMENT,
+        ci_cinema_name VARCHAR(100) NOT NULL,
+        ci_city VARCHAR(100) NOT NULL,
+        ci_address VARCHAR(255) NULL,
+        ci_cinema_picture VARCHAR(500) NULL,
+        PRIMARY KEY (ci_id_cinema)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS et_movie (
+        mo_id_movie INT NOT NULL AUTO_INCREMENT,
+        mo_title VARCHAR(150) NOT NULL,
+        mo_date_publication DATE NULL,
+        mo_length_minutes INT NULL,
+        mo_minimum_age VARCHAR(10) NULL,
+        mo_synopsis TEXT NULL,
+        mo_poster VARCHAR(500) NULL,
+        mo_country VARCHAR(50) NULL,
+        mo_producer VARCHAR(100) NULL,
+        mo_begin_date DATE NULL,
+        mo_end_date DATE NULL,
+        PRIMARY KEY (mo_id_movie)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS et_actors (
+        ac_id_actor INT NOT NULL AUTO_INCREMENT,
+        ac_actor_name VARCHAR(100) NOT NULL,
+        ac_actor_picture VARCHAR(500) NULL,
+        PRIMARY KEY (ac_id_actor)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS et_casting (
+        mo_id_movie INT NOT NULL,
+        ac_id_actor INT NOT NULL,
+        PRIMARY KEY (mo_id_movie, ac_id_actor),
+        CONSTRAINT fk_casting_movie FOREIGN KEY (mo_id_movie) REFERENCES et_movie (mo_id_movie),
+        CONSTRAINT fk_casting_actor FOREIGN KEY (ac_id_actor) REFERENCES et_actors (ac_id_actor)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS et_seance (
+        se_id_seance INT NOT NULL AUTO_INCREMENT,
+        se_date_time DATETIME NOT NULL,
+        se_room VARCHAR(50) NULL,
+        se_language VARCHAR(20) NULL,
+        mo_id_movie INT NOT NULL,
+        ci_id_cinema INT NOT NULL,
+        PRIMARY KEY (se_id_seance),
+        CONSTRAINT fk_seance_movie FOREIGN KEY (mo_id_movie) REFERENCES et_movie (mo_id_movie),
+        CONSTRAINT fk_seance_cinema FOREIGN KEY (ci_id_cinema) REFERENCES et_cinema (ci_id_cinema)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+)
+
+
+def upgrade(conn):
+    """Create the tables that don't exist yet"""
+    for statement in STATEMENTS:
+        execute(conn, statement)
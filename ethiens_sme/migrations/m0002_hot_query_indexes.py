@@ -0,0 +1,44 @@
+"""Indexes needed by the queries of the service layer"""
+
+from ethiens_sme import connect_mysql
+from ethiens_sme.migrations import create_index
+
+INDEXES = (
+    # get_seance_info_by_city_name, get_seances_by_cinema_id, get_rooms_by_cinema
+    ("et_seance", "idx_seance_cinema_date", ("ci_id_cinema", "se_date_time")),
+    # get_upcoming_seances (keyset on date then id), get_dashboard_stats
+    ("et_seance", "idx_seance_date_id", ("se_date_time", "se_id_seance")),
+    # delete_movie
+    ("et_seance", "idx_seance_movie", ("mo_id_movie",)),
+    # get_seance_info_by_city_name
+    ("et_cinema", "idx_cinema_city", ("ci_city",)),
+    # get_all_cinemas, covering its ORDER BY
+    ("et_cinema", "idx_cinema_name_city", ("ci_cinema_name", "ci_city")),
+    # get_actors_by_movie_ids (already covered by the primary key of et_casting)
+    ("et_casting", "idx_casting_movie", ("mo_id_movie",)),
+    # get_all_movies_simple, get_all_movies_paginated (keyset on title then id)
+    ("et_movie", "idx_movie_title_id", ("mo_title", "mo_id_movie")),
+    # get_user_by_login
+    ("et_user", "idx_user_pseudo", ("us_pseudo",)),
+)
+
+
+def upgrade(conn):
+    """Create the missing indexes, and the unique index on actor names"""
+    for table, name, columns in INDEXES:
+        create_index(conn, table, name, columns)
+
+    duplicates = connect_mysql.get_query(
+        conn,
+        """
+        SELECT ac_actor_name FROM et_actors
+        GROUP BY ac_actor_name HAVING COUNT(*) > 1
+        LIMIT 10;
+        """,
+    )
+    if duplicates:
+        names = ", ".join(row[0] for row in duplicates)
+        raise RuntimeError(f"Merge the duplicated actors before creating the unique index on names: {names}")
+
+    # get_or_create_actors relies on it for INSERT IGNORE
+    create_index(conn, "et_actors", "uq_actor_name", ("ac_actor_name",), unique=True)
@@ -0,0 +1,56 @@
+"""Materialized weekly reports by cinema, room and movie (see service.report_service)"""
+
+from ethiens_sme.migrations import execute
+
+STATEMENTS = (
+    """
+    CREATE TABLE IF NOT EXISTS et_report_room_week (
+        ci_id_cinema INT NOT NULL,
+        rw_week_start DATE NOT NULL,
+        se_room VARCHAR(50) NOT NULL,
+        rw_seances INT NOT NULL,
+        rw_movies INT NOT NULL,
+        rw_screen_minutes INT NOT NULL,
+        rw_gap_count INT NOT NULL,
+        rw_gap_total_minutes INT NOT NULL,
+        rw_gap_min_minutes INT NULL,
+        rw_gap_max_minutes INT NULL,
+        rw_overlaps INT NOT NULL,
+        rw_refreshed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (ci_id_cinema, rw_week_start, se_room)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS et_report_movie_week (
+        ci_id_cinema INT NOT NULL,
+        rm_week_start DATE NOT NULL,
+        mo_id_movie INT NOT NULL,
+        rm_seances INT NOT NULL,
+        rm_rooms INT NOT NULL,
+        PRIMARY KEY (ci_id_cinema, rm_week_start, mo_id_movie)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    # (cinema, week) whose report must be computed again; a mark made during a
+    # refresh has a later rd_marked_at and survives it
+    """
+    CREATE TABLE IF NOT EXISTS et_report_dirty (
+        ci_id_cinema INT NOT NULL,
+        rd_week_start DATE NOT NULL,
+        rd_marked_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+        PRIMARY KEY (ci_id_cinema, rd_week_start),
+        KEY idx_report_dirty_marked (rd_marked_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    # Every existing week gets computed by the first refresh
+    """
+    INSERT IGNORE INTO et_report_dirty (ci_id_cinema, rd_week_start)
+    SELECT DISTINCT ci_id_cinema, DATE_SUB(DATE(se_date_time), INTERVAL WEEKDAY(se_date_time) DAY)
+    FROM et_seance;
+    """,
+)
+
+
+def upgrade(conn):
+    """Create the report tables and mark every week with seances for the first refresh"""
+    for statement in STATEMENTS:
+        execute(conn, statement)
@@ -6,7 +6,7 @@ from typing import List
 from ethiens_sme.model.actor_model import ActorModel
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class MovieModel:
     """Movie Model class representation"""
 
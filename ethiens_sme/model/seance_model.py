@@ -4,7 +4,7 @@ import dataclasses
 from datetime import datetime
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class SeanceModel:
     """Seance Model class representation"""
 
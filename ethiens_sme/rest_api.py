@@ -6,6 +6,10 @@ from ethiens_sme.route.user_route import user
 from ethiens_sme.route.seance_route import seance
 from ethiens_sme.route.movie_route import movie
 from ethiens_sme.route.frontend_route import frontend
+from ethiens_sme.route.admin_route import admin
+from ethiens_sme.route.metrics_route import metrics
+from ethiens_sme.route.export_route import export
+from ethiens_sme.route.report_route import report
 
 
 @app.errorhandler(401)
@@ -38,6 +42,10 @@ if __name__ == "__main__":
     app.register_blueprint(seance)
     app.register_blueprint(movie)
     app.register_blueprint(frontend)
+    app.register_blueprint(admin)
+    app.register_blueprint(metrics)
+    app.register_blueprint(export)
+    app.register_blueprint(report)
 
     # Launch Flask server
     app.run(
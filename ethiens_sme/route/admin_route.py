@@ -0,0 +1,34 @@
+"""Administration endpoints"""
+
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, get_jwt
+from ethiens_sme import connect_mysql
+from ethiens_sme.utils import query_stats
+
+admin = Blueprint("admin", __name__, url_prefix="/admin")
+
+
+@admin.route("/query-stats", methods=["GET"])
+@jwt_required()
+def get_query_stats():
+    """Get the SQL statements aggregated per fingerprint, with the connection pool stats"""
+    claims = get_jwt()
+    if not claims.get("is_admin"):
+        return jsonify({"message": "Admin privileges required"}), 403
+
+    try:
+        return jsonify({"queries": query_stats.snapshot(), "pool": connect_mysql.pool_stats()}), 200
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
+@admin.route("/query-stats", methods=["DELETE"])
+@jwt_required()
+def reset_query_stats():
+    """Reset the SQL statement aggregates"""
+    claims = get_jwt()
+    if not claims.get("is_admin"):
+        return jsonify({"message": "Admin privileges required"}), 403
+
+    query_stats.reset()
+    return jsonify({"message": "Query stats reset"}), 200
@@ -0,0 +1,60 @@
+"""Export endpoints"""
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required
+from ethiens_sme.service import export_service
+from ethiens_sme.utils.exception.exceptions import ApiException
+
+export = Blueprint("export", __name__, url_prefix="/export")
+
+
+def _export_response(name, records, fields, export_format):
+    """Streaming response of the records, sent in chunks while they are read"""
+    chunks = export_service.encode(records, export_format, fields)
+    response = Response(stream_with_context(chunks), mimetype=export_service.FORMATS[export_format])
+    response.headers["Content-Disposition"] = f'attachment; filename="{name}.{export_format}"'
+    return response
+
+
+def _filters():
+    return export_service.parse_filters(
+        request.args.get("city"),
+        request.args.get("cinema_id", type=int),
+        request.args.get("date_from"),
+        request.args.get("date_to"),
+    )
+
+
+@export.route("/seances", methods=["GET"])
+@jwt_required()
+def export_seances():
+    """
+    Get every seance as NDJSON (default) or CSV (format=csv).
+    Filters: city, cinema_id, date_from and date_to (YYYY-MM-DD, inclusive).
+    """
+    export_format = request.args.get("format", "ndjson")
+    if export_format not in export_service.FORMATS:
+        return jsonify({"message": "Unsupported format"}), 400
+    try:
+        records = export_service.iter_seances(_filters())
+        return _export_response("seances", records, export_service.SEANCE_FIELDS, export_format)
+    except ApiException as e:
+        return jsonify({"message": e.message}), e.status_code
+
+
+@export.route("/movies", methods=["GET"])
+@jwt_required()
+def export_movies():
+    """
+    Get every movie with its actor names as NDJSON (default) or CSV (format=csv).
+    Filters: city and cinema_id (movies with a seance there), date_from and
+    date_to (movies showing during the period).
+    """
+    export_format = request.args.get("format", "ndjson")
+    if export_format not in export_service.FORMATS:
+        return jsonify({"message": "Unsupported format"}), 400
+    try:
+        records = export_service.iter_movies(_filters())
+        return _export_response("movies", records, export_service.MOVIE_FIELDS, export_format)
+    except ApiException as e:
+        return jsonify({"message": e.message}), e.status_code
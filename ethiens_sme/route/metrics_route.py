@@ -0,0 +1,12 @@
+"""Metrics endpoint"""
+
+from flask import Blueprint, Response
+from ethiens_sme.utils import metrics as collected_metrics
+
+metrics = Blueprint("metrics", __name__)
+
+
+@metrics.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Get the request, SQL, pool, cache and TMDB metrics in the Prometheus text format"""
+    return Response(collected_metrics.render(), mimetype="text/plain; version=0.0.4")
@@ -1,8 +1,12 @@
 """Movie related endpoints"""
 
 from flask import Blueprint, request, jsonify
+from ethiens_sme import rq
+from ethiens_sme.config import Config
+from ethiens_sme.job import movie_job
 from ethiens_sme.utils.exception.exceptions import ApiException, ResourceNotFoundException
 from ethiens_sme.service import movie_service
+from ethiens_sme.utils.response_cache import cached_response, MOVIES
 from flask_jwt_extended import jwt_required, get_jwt
 
 # Définition du Blueprint
@@ -20,6 +24,18 @@ def search_tmdb_movie():
     results = movie_service.search_tmdb_movie(query)
     return jsonify({"results": results}), 200
 
+@movie.route("/search", methods=["GET"])
+def search_movies():
+    """
+    Search our catalogue by title, actor, producer or synopsis (?q=, limit <= 50).
+    Results are ranked by relevance; the last word also matches as a prefix.
+    """
+    try:
+        limit = min(request.args.get("limit", 20, type=int), 50)
+        return jsonify(movie_service.search_movies(request.args.get("q", ""), limit)), 200
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
 @movie.route("/tmdb/<string:tmdb_id>", methods=["GET"])
 def get_tmdb_movie_details(tmdb_id):
     """
@@ -31,6 +47,54 @@ def get_tmdb_movie_details(tmdb_id):
     else:
         return jsonify({"message": "Movie not found or TMDB unavailable"}), 404
 
+@movie.route("/import/<string:tmdb_id>", methods=["POST"])
+@jwt_required()
+def import_tmdb_movie(tmdb_id):
+    """
+    Queue the import of a TMDB movie and its cast.
+    The movie is created by a background worker, poll /movie/import/status/<job_id>.
+    """
+    claims = get_jwt()
+    if not claims.get("is_admin"):
+        return jsonify({"message": "Admin privileges required"}), 403
+
+    if not Config.TMDB_API_KEY:
+        return jsonify({"message": "TMDB unavailable"}), 503
+
+    try:
+        job = movie_job.import_tmdb_movie.queue(tmdb_id)
+        return jsonify({"message": "Import queued", "job_id": job.id}), 202
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
+@movie.route("/import/status/<string:job_id>", methods=["GET"])
+@jwt_required()
+def get_import_status(job_id):
+    """
+    Get the status of a movie import job.
+    Once finished, movie_id holds the ID of the created movie.
+    """
+    claims = get_jwt()
+    if not claims.get("is_admin"):
+        return jsonify({"message": "Admin privileges required"}), 403
+
+    try:
+        job = rq.get_queue().fetch_job(job_id)
+        if job is None:
+            return jsonify({"message": "Job not found"}), 404
+
+        status = job.get_status()
+        payload = {"job_id": job.id, "status": getattr(status, "value", status)}
+        if job.is_finished:
+            payload["movie_id"] = job.return_value()
+        elif job.is_failed and job.exc_info:
+            payload["message"] = job.exc_info.strip().splitlines()[-1]
+        return jsonify(payload), 200
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
 @movie.route("/<int:movie_id>", methods=["DELETE"])
 @jwt_required()
 def delete_movie(movie_id):
@@ -78,10 +142,7 @@ def create_new_movie():
             return jsonify({"message": "Title is required"}), 400
 
         # Sanitize inputs to match DB schema
-        if data.get("title") and len(data["title"]) > 150:
-            data["title"] = data["title"][:150]
-        if data.get("country") and len(data["country"]) > 50:
-            data["country"] = data["country"][:50]
+        data = movie_service.sanitize_movie_data(data)
 
         new_id = movie_service.create_movie(data)
         return jsonify({"message": "Movie created", "id": new_id}), 201
@@ -93,6 +154,7 @@ def create_new_movie():
 
 
 @movie.route("/list", methods=["GET"])
+@cached_response("movie_list", [MOVIES])
 def get_movies_list():
     """
     Get a simple list of movies (id, title).
@@ -105,15 +167,29 @@ def get_movies_list():
         return jsonify({"message": str(e)}), 500
 
 @movie.route("/all", methods=["GET"])
+@cached_response("movie_all", [MOVIES])
 def get_all_movies():
     """
     Get all movies with details (for main page display).
-    Supports pagination via limit/offset.
+    Supports pagination via limit/offset, or via cursor: pass cursor= (empty for
+    the first page) to get {"items": [...], "next_cursor": ...} instead of a list.
+    Pass include_actors=true to get the casting of each movie.
     """
     try:
         limit = request.args.get('limit', 20, type=int)
         offset = request.args.get('offset', 0, type=int)
-        movies = movie_service.get_all_movies_paginated(limit, offset)
-        return jsonify(movies), 200
+        cursor = request.args.get('cursor')
+        include_actors = request.args.get('include_actors', 'false').lower() == 'true'
+        movies = movie_service.get_all_movies_paginated(limit, offset, include_actors, cursor)
+        next_cursor = movie_service.all_movies_cursor(movies, limit)
+
+        if cursor is not None:
+            return jsonify({"items": movies, "next_cursor": next_cursor}), 200
+        response = jsonify(movies)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response, 200
+    except ApiException as e:
+        return jsonify({"message": e.message}), e.status_code
     except Exception as e:
         return jsonify({"message": str(e)}), 500
\ No newline at end of file
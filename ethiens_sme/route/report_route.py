@@ -0,0 +1,64 @@
+"""Report endpoints"""
+
+from datetime import date, timedelta
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt
+from ethiens_sme.job import report_job
+from ethiens_sme.service import report_service
+from ethiens_sme.utils.exception.exceptions import ApiException
+
+report = Blueprint("report", __name__, url_prefix="/report")
+
+
+@report.route("/cinema/<int:cinema_id>/week", methods=["GET"])
+@report.route("/cinema/<int:cinema_id>/week/<day>", methods=["GET"])
+@jwt_required()
+def get_week_report(cinema_id, day=None):
+    """
+    Get the report of a cinema for the week of `day` (YYYY-MM-DD, this week by default):
+    per room the seances, movies, screen time, gaps between screenings and overlaps,
+    and per movie its seances and rooms. "stale" is true until the next refresh
+    includes the latest changes of the week.
+    """
+    try:
+        return jsonify(report_service.get_week_report(cinema_id, day or date.today())), 200
+    except ApiException as e:
+        return jsonify({"message": e.message}), e.status_code
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
+@report.route("/cinema/<int:cinema_id>/weeks", methods=["GET"])
+@jwt_required()
+def get_weeks_report(cinema_id):
+    """
+    Get the room summaries of a cinema week by week.
+    Query args: date_from and date_to (YYYY-MM-DD), this week and the next 3 by default.
+    """
+    try:
+        date_from = request.args.get("date_from") or date.today()
+        date_to = request.args.get("date_to") or date.today() + timedelta(weeks=3)
+        return jsonify(report_service.get_weeks(cinema_id, date_from, date_to)), 200
+    except ApiException as e:
+        return jsonify({"message": e.message}), e.status_code
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
+@report.route("/refresh", methods=["POST"])
+@jwt_required()
+def refresh_reports():
+    """
+    Queue a refresh of the reports on RQ (full=true to compute every week again).
+    Admin only, returns the ID of the RQ job.
+    """
+    claims = get_jwt()
+    if not claims.get("is_admin"):
+        return jsonify({"message": "Admin privileges required"}), 403
+
+    try:
+        full = request.args.get("full", "false").lower() == "true"
+        job = report_job.refresh_reports.queue(full)
+        return jsonify({"message": "Refresh queued", "job_id": job.id}), 202
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
@@ -1,14 +1,20 @@
 """Seance related endpoints"""
 
+import io
+from datetime import date
 from flask import Blueprint, request, jsonify
-from ethiens_sme.utils.exception.exceptions import ApiException
-from ethiens_sme.service import seance_service
+from ethiens_sme.config import Config
+from ethiens_sme.utils.exception.exceptions import ApiException, InvalidInputException
+from ethiens_sme.utils.exception.seance_exceptions import CityNotFoundException, InvalidSeancesException
+from ethiens_sme.service import place_index, seance_service
+from ethiens_sme.utils.response_cache import cached_response, CINEMAS, MOVIES, SEANCES
 from flask_jwt_extended import jwt_required, get_jwt
 
 seance = Blueprint("seance", __name__, url_prefix="/seance")
 
 
 @seance.route("/cinemas", methods=["GET"])
+@cached_response("seance_cinemas", [CINEMAS])
 def get_cinemas():
     """Get list of all cinemas"""
     try:
@@ -18,7 +24,23 @@ def get_cinemas():
         return jsonify({"message": str(e)}), 500
 
 
+@seance.route("/search", methods=["GET"])
+def search_places():
+    """
+    Get the cities and cinemas matching ?q= (autocomplete), ignoring case and accents.
+    Names starting with q come first; without any, the closest names ("match": "fuzzy").
+    """
+    try:
+        limit = min(int(request.args.get("limit", 10)), 50)
+        return jsonify(place_index.search(request.args.get("q", ""), limit)), 200
+    except ValueError:
+        return jsonify({"message": "INVALID_LIMIT"}), 400
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
 @seance.route("/stats", methods=["GET"])
+@cached_response("seance_stats", [MOVIES, CINEMAS, SEANCES])
 def get_stats():
     """Get dashboard stats"""
     try:
@@ -57,23 +79,53 @@ def get_cinema_seances(cinema_id):
         return jsonify({"message": str(e)}), 500
 
 @seance.route("/upcoming", methods=["GET"])
+@cached_response("seance_upcoming", [SEANCES, MOVIES, CINEMAS])
 def get_upcoming():
-    """Get upcoming seances with pagination"""
+    """
+    Get upcoming seances with pagination.
+    Supports limit/offset, or cursor: pass cursor= (empty for the first page)
+    to get {"items": [...], "next_cursor": ...} instead of a list.
+    """
     try:
         limit = int(request.args.get("limit", 20))
         offset = int(request.args.get("offset", 0))
-        seances = seance_service.get_upcoming_seances(limit, offset)
-        return jsonify(seances), 200
+        cursor = request.args.get("cursor")
+        seances = seance_service.get_upcoming_seances(limit, offset, cursor)
+        next_cursor = seance_service.upcoming_seances_cursor(seances, limit)
+
+        if cursor is not None:
+            return jsonify({"items": seances, "next_cursor": next_cursor}), 200
+        response = jsonify(seances)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response, 200
+    except ApiException as e:
+        return jsonify({"message": e.message}), e.status_code
     except Exception as e:
         return jsonify({"message": str(e)}), 500
 
 
 @seance.route("/<ville_name>", methods=["GET"])
+@cached_response("seance_city", [SEANCES, MOVIES, CINEMAS])
 def get_seances_by_city(ville_name):
-    """Get seances for a specific city"""
+    """
+    Get the upcoming seances of a city, sorted by date.
+    Optional query args: date_from and date_to (YYYY-MM-DD, both included), language.
+    A name no city has answers 404 with the "suggestions" it may designate.
+    """
     try:
-        available_seance = seance_service.get_seance_info_by_city_name(ville_name)
+        dates = {}
+        for name in ("date_from", "date_to"):
+            try:
+                dates[name] = date.fromisoformat(request.args[name]) if request.args.get(name) else None
+            except ValueError as error:
+                raise InvalidInputException("INVALID_DATE") from error
+        available_seance = seance_service.get_seance_info_by_city_name(
+            ville_name, dates["date_from"], dates["date_to"], request.args.get("language") or None
+        )
         response = jsonify(available_seance), 200
+    except CityNotFoundException as e:
+        response = jsonify({"message": e.message, "suggestions": e.suggestions}), e.status_code
     except ApiException as e:
         response = jsonify({"message": e.message}), e.status_code
     return response
@@ -111,6 +163,40 @@ def add_seance():
         return jsonify({"message": str(e)}), 500
 
 
+@seance.route("/bulk", methods=["POST"])
+@jwt_required()
+def add_seances_bulk():
+    """
+    Add a whole schedule of seances in one transaction.
+    Accepts a JSON list of seances (same fields as POST /seance/), {"seances": [...]},
+    or a CSV body (Content-Type: text/csv) with the columns
+    date_time, room, language, movie_id, cinema_id.
+    Nothing is written if a row is invalid; the errors are listed by row index.
+    """
+    try:
+        if request.mimetype == "text/csv":
+            rows = seance_service.parse_schedule_csv(io.StringIO(request.get_data(as_text=True)))
+        else:
+            data = request.get_json()
+            rows = data.get("seances") if isinstance(data, dict) else data
+
+        if not isinstance(rows, list) or not rows:
+            return jsonify({"message": "A list of seances is required"}), 400
+        if len(rows) > Config.SEANCE_BULK_MAX_ROWS:
+            return jsonify({"message": f"At most {Config.SEANCE_BULK_MAX_ROWS} seances per request"}), 413
+
+        new_ids = seance_service.create_seances(rows)
+
+        return jsonify({"message": "Seances added successfully", "count": len(new_ids), "ids": new_ids}), 201
+
+    except InvalidSeancesException as e:
+        return jsonify({"message": e.message, "errors": e.errors}), e.status_code
+    except ApiException as e:
+        return jsonify({"message": e.message}), e.status_code
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
 @seance.route("/<int:seance_id>", methods=["DELETE"])
 @jwt_required()
 def delete_seance(seance_id):
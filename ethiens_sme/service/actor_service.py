@@ -2,7 +2,13 @@
 Service for Actor related operations
 """
 
+from typing import Dict, Iterable, List
 from ethiens_sme import connect_mysql
+from ethiens_sme.utils.text import fold
+
+# {placeholders}: one "%s" per name; {values}: one "(%s, NULL)" per name
+QUERY_ACTOR_IDS = "SELECT ac_id_actor, ac_actor_name FROM et_actors WHERE ac_actor_name IN ({placeholders});"
+QUERY_INSERT_ACTORS = "INSERT IGNORE INTO et_actors (ac_actor_name, ac_actor_picture) VALUES {values};"
 
 
 def get_or_create_actor(conn, actor_name: str) -> int:
@@ -11,16 +17,50 @@ def get_or_create_actor(conn, actor_name: str) -> int:
     If yes, return their ID.
     If no, create them and return the new ID.
     """
-    query_check = "SELECT ac_id_actor FROM et_actors WHERE ac_actor_name = %s;"
-    result = connect_mysql.get_query(conn, query_check, (actor_name,), True)
+    actor_ids = get_or_create_actors(conn, [actor_name])
+    return actor_ids[actor_name.strip()]
+
+
+def get_or_create_actors(conn, actor_names: Iterable[str]) -> Dict[str, int]:
+    """
+    Resolve a list of actor names to their IDs, creating the missing actors.
+    Costs at most three statements whatever the number of names:
+    one SELECT, one multi-row INSERT IGNORE and one SELECT for the new rows.
+    Returns a dict {name: actor_id} keyed by the stripped names.
+    """
+    names = list(dict.fromkeys(name.strip() for name in actor_names if name and name.strip()))
+    if not names:
+        return {}
 
-    if result:
-        return result[0]["ac_id_actor"]
+    actor_ids = _get_actor_ids(conn, names)
 
-    query_insert = "INSERT INTO et_actors (ac_actor_name, ac_actor_picture) VALUES (%s, NULL);"
-    connect_mysql.execute_command(conn, query_insert, (actor_name,))
+    missing = [name for name in names if name not in actor_ids]
+    if missing:
+        values = ", ".join(["(%s, NULL)"] * len(missing))
+        connect_mysql.execute_command(conn, QUERY_INSERT_ACTORS.format(values=values), tuple(missing))
+        actor_ids.update(_get_actor_ids(conn, missing))
+
+    return actor_ids
+
+
+def _get_actor_ids(conn, names: List[str]) -> Dict[str, int]:
+    """
+    Get the IDs of the existing actors among `names` in one query.
+    Names are matched exactly first, then case- and accent-insensitively
+    to follow the collation MySQL used for the IN (...) lookup.
+    """
+    placeholders = ", ".join(["%s"] * len(names))
+    results = connect_mysql.get_query(conn, QUERY_ACTOR_IDS.format(placeholders=placeholders), tuple(names), True)
 
-    query_last_id = "SELECT LAST_INSERT_ID() as id;"
-    res_id = connect_mysql.get_query(conn, query_last_id, None, True)
+    exact = {}
+    folded = {}
+    for row in results or []:
+        exact.setdefault(row["ac_actor_name"], row["ac_id_actor"])
+        folded.setdefault(fold(row["ac_actor_name"]), row["ac_id_actor"])
 
-    return res_id[0]["id"]
+    actor_ids = {}
+    for name in names:
+        actor_id = exact.get(name, folded.get(fold(name)))
+        if actor_id is not None:
+            actor_ids[name] = actor_id
+    return actor_ids
@@ -0,0 +1,209 @@
+"""
+Full exports of the schedule and of the catalogue.
+Rows are streamed from the database on a connection of their own and encoded
+in chunks, so an export uses the same memory whatever the size of the tables.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from itertools import groupby
+from typing import Generator, Iterator
+
+from ethiens_sme import connect_mysql
+from ethiens_sme.utils.exception.exceptions import InvalidInputException
+from ethiens_sme.utils.json_provider import orjson
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Bytes accumulated before a chunk is sent
+CHUNK_SIZE = 64 * 1024
+
+SEANCE_FIELDS = (
+    "seance_id",
+    "date_time",
+    "room",
+    "language",
+    "movie_id",
+    "movie_title",
+    "cinema_id",
+    "cinema_name",
+    "city",
+)
+MOVIE_FIELDS = (
+    "movie_id",
+    "title",
+    "release_date",
+    "length_minutes",
+    "minimum_age",
+    "synopsis",
+    "poster",
+    "country",
+    "producer",
+    "begin_date",
+    "end_date",
+    "actor_names",
+)
+
+
+# {where}: the WHERE clause of the filters, if any
+QUERY_SEANCES = """
+    SELECT
+        s.se_id_seance, s.se_date_time, s.se_room, s.se_language,
+        m.mo_id_movie, m.mo_title,
+        c.ci_id_cinema, c.ci_cinema_name, c.ci_city
+    FROM et_seance AS s
+    JOIN et_movie AS m ON s.mo_id_movie = m.mo_id_movie
+    JOIN et_cinema AS c ON s.ci_id_cinema = c.ci_id_cinema
+    {where}
+    ORDER BY s.se_date_time, s.se_id_seance;
+"""
+# One row per (movie, actor), grouped back while streaming
+QUERY_MOVIES = """
+    SELECT
+        m.mo_id_movie, m.mo_title, m.mo_date_publication, m.mo_length_minutes, m.mo_minimum_age,
+        m.mo_synopsis, m.mo_poster, m.mo_country, m.mo_producer, m.mo_begin_date, m.mo_end_date,
+        a.ac_actor_name
+    FROM et_movie AS m
+    LEFT JOIN et_casting AS ca ON ca.mo_id_movie = m.mo_id_movie
+    LEFT JOIN et_actors AS a ON a.ac_id_actor = ca.ac_id_actor
+    {where}
+    ORDER BY m.mo_id_movie;
+"""
+
+
+def parse_filters(city: str = None, cinema_id: int = None, date_from: str = None, date_to: str = None) -> dict:
+    """Validated filters of an export, dates given as YYYY-MM-DD"""
+    filters = {"city": city or None, "cinema_id": cinema_id}
+    for name, value in (("date_from", date_from), ("date_to", date_to)):
+        try:
+            filters[name] = date.fromisoformat(value) if value else None
+        except ValueError as error:
+            raise InvalidInputException("INVALID_DATE") from error
+    return filters
+
+
+def seances_query(filters: dict) -> tuple:
+    """(query, parameters) of the seances matching the filters"""
+    conditions = []
+    params = []
+    if filters.get("city"):
+        conditions.append("c.ci_city = %s")
+        params.append(filters["city"])
+    if filters.get("cinema_id") is not None:
+        conditions.append("s.ci_id_cinema = %s")
+        params.append(filters["cinema_id"])
+    if filters.get("date_from"):
+        conditions.append("s.se_date_time >= %s")
+        params.append(filters["date_from"])
+    if filters.get("date_to"):
+        # The whole last day is included
+        conditions.append("s.se_date_time < %s + INTERVAL 1 DAY")
+        params.append(filters["date_to"])
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return QUERY_SEANCES.format(where=where), tuple(params)
+
+
+def iter_seances(filters: dict) -> Iterator[dict]:
+    """Seances matching the filters, by date"""
+    with connect_mysql.stream_query(*seances_query(filters)) as rows:
+        for row in rows:
+            yield dict(zip(SEANCE_FIELDS, row))
+
+
+def movies_query(filters: dict) -> tuple:
+    """
+    (query, parameters) of the movies matching the filters.
+    city/cinema_id keep the movies with a seance there; the date range keeps
+    the movies showing during that period.
+    """
+    conditions = []
+    params = []
+    if filters.get("city") or filters.get("cinema_id") is not None:
+        seance_conditions = ["s.mo_id_movie = m.mo_id_movie"]
+        if filters.get("city"):
+            seance_conditions.append("c.ci_city = %s")
+            params.append(filters["city"])
+        if filters.get("cinema_id") is not None:
+            seance_conditions.append("s.ci_id_cinema = %s")
+            params.append(filters["cinema_id"])
+        conditions.append(
+            f"""EXISTS (
+                SELECT 1 FROM et_seance AS s JOIN et_cinema AS c ON s.ci_id_cinema = c.ci_id_cinema
+                WHERE {' AND '.join(seance_conditions)}
+            )"""
+        )
+    if filters.get("date_from"):
+        conditions.append("(m.mo_end_date IS NULL OR m.mo_end_date >= %s)")
+        params.append(filters["date_from"])
+    if filters.get("date_to"):
+        conditions.append("(m.mo_begin_date IS NULL OR m.mo_begin_date <= %s)")
+        params.append(filters["date_to"])
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return QUERY_MOVIES.format(where=where), tuple(params)
+
+
+def iter_movies(filters: dict) -> Iterator[dict]:
+    """Movies matching the filters (see movies_query), with their actor names, by ID"""
+    with connect_mysql.stream_query(*movies_query(filters)) as rows:
+        for _, movie_rows in groupby(rows, key=lambda row: row[0]):
+            first = next(movie_rows)
+            actor_names = [first[-1]] if first[-1] is not None else []
+            actor_names.extend(row[-1] for row in movie_rows if row[-1] is not None)
+            movie = dict(zip(MOVIE_FIELDS, first[:-1]))
+            movie["actor_names"] = actor_names
+            yield movie
+
+
+def _iso(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _ndjson_line(record: dict) -> bytes:
+    """One NDJSON line, dates in ISO 8601"""
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(record, default=_iso, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _csv_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, list):
+        return "|".join(value)
+    return value
+
+
+def encode(records: Generator[dict, None, None], export_format: str, fields) -> Iterator[bytes]:
+    """Chunks of the records in NDJSON or CSV (with a header line, lists joined by "|")"""
+    try:
+        yield from _encode(records, export_format, fields)
+    finally:
+        # A client that disconnects closes this generator: release the query stream now
+        records.close()
+
+
+def _encode(records: Iterator[dict], export_format: str, fields) -> Iterator[bytes]:
+    buffer = io.BytesIO()
+    if export_format == "csv":
+        text = io.TextIOWrapper(buffer, encoding="utf-8", newline="", write_through=True)
+        writer = csv.writer(text)
+        writer.writerow(fields)
+        for record in records:
+            writer.writerow([_csv_value(record[field]) for field in fields])
+            if buffer.tell() >= CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+    else:
+        for record in records:
+            buffer.write(_ndjson_line(record))
+            if buffer.tell() >= CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,415 @@
+"""
+Full-text search of the catalogue: an inverted index of the titles, actor
+names, producers and synopses of et_movie, ranked with BM25F (BM25 over
+weighted fields).
+Words are folded (case and accents ignored), split on apostrophes so French
+elisions ("l'été") drop their article, filtered from stopwords and stripped
+of a plural s/x. The last word of a query also matches as a prefix, for
+search-as-you-type.
+create_movie, create_movies and delete_movie update the index in place. It is
+saved to MOVIE_SEARCH_INDEX_PATH by a background timer, at most every
+MOVIE_SEARCH_SAVE_INTERVAL seconds, and loaded from there at startup; every
+MOVIE_SEARCH_TTL seconds it is checked against et_movie and only the movies
+added or deleted since (by this process or another) are indexed or dropped.
+"""
+
+import atexit
+import json
+import logging
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+from ethiens_sme import connect_mysql
+from ethiens_sme.config import Config
+from ethiens_sme.utils.text import fold
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("title", "actors", "producer", "synopsis")
+WEIGHTS = (3.0, 2.0, 1.5, 1.0)
+K1 = 1.2
+B = 0.75
+# Terms a prefix (last word of a query) may expand to
+PREFIX_EXPANSIONS = 20
+# Movies indexed per query when loading from the database
+FETCH_BATCH = 1000
+FORMAT_VERSION = 1
+
+# {placeholders}: one "%s" per movie ID
+QUERY_MOVIES = """
+    SELECT mo_id_movie, mo_title, mo_poster, mo_producer, mo_synopsis
+    FROM et_movie
+    WHERE mo_id_movie IN ({placeholders});
+"""
+QUERY_ACTORS = """
+    SELECT c.mo_id_movie, a.ac_actor_name
+    FROM et_casting AS c
+    JOIN et_actors AS a ON a.ac_id_actor = c.ac_id_actor
+    WHERE c.mo_id_movie IN ({placeholders});
+"""
+QUERY_MOVIE_IDS = "SELECT mo_id_movie FROM et_movie;"
+
+_WORD = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    """
+    a au aux avec c ce ces cet cette d dans de des du elle elles en est et il ils j je l la le les leur leurs
+    lui m ma mais me mes mon n ne ni nos notre nous on ou par pas pour qu que qui s sa sans se ses son sont
+    sur t ta te tes toi ton tu un une vos votre vous y jusqu lorsqu puisqu
+    an and of the to
+    """.split()
+)
+
+
+def tokenize(text: str) -> list:
+    """Index terms of a text, in order"""
+    terms = []
+    for word in _WORD.findall(fold(text or "")):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word[-1] in "sx":
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+class _Document:
+    """Indexed movie: what a result shows, the length of each field and its term frequencies"""
+
+    __slots__ = ("title", "poster", "lengths", "terms")
+
+    def __init__(self, title, poster, lengths, terms):
+        self.title = title
+        self.poster = poster
+        self.lengths = lengths
+        self.terms = terms  # term: frequency in each field
+
+
+class MovieSearchIndex:
+    """Postings {term: {movie ID: frequency in each field}} and the sorted vocabulary"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._documents = {}
+        self._postings = {}
+        self._vocabulary = []
+        self._field_totals = [0] * len(FIELDS)
+        self.checked_at = time.monotonic()
+        self.dirty = False
+
+    def __len__(self):
+        return len(self._documents)
+
+    def movie_ids(self) -> set:
+        """IDs of the indexed movies"""
+        with self._lock:
+            return set(self._documents)
+
+    def add(self, movie_id, title, poster, actor_names, producer, synopsis):
+        """Index a movie, replacing it if it is already indexed"""
+        fields = (title, " ".join(actor_names), producer, synopsis)
+        lengths = []
+        terms = {}
+        for position, text in enumerate(fields):
+            field_terms = tokenize(text)
+            lengths.append(len(field_terms))
+            for term in field_terms:
+                frequencies = terms.setdefault(term, [0] * len(FIELDS))
+                frequencies[position] += 1
+        document = _Document(title, poster, lengths, {term: tuple(counts) for term, counts in terms.items()})
+        with self._lock:
+            self._remove(movie_id)
+            self._add(movie_id, document, keep_vocabulary=True)
+            self.dirty = True
+
+    def remove(self, movie_id):
+        """Drop a movie from the index"""
+        with self._lock:
+            if self._remove(movie_id):
+                self.dirty = True
+
+    def _add(self, movie_id, document: _Document, keep_vocabulary: bool):
+        self._documents[movie_id] = document
+        for position, length in enumerate(document.lengths):
+            self._field_totals[position] += length
+        for term, frequencies in document.terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                if keep_vocabulary:
+                    self._vocabulary.insert(bisect_left(self._vocabulary, term), term)
+            postings[movie_id] = frequencies
+
+    def _remove(self, movie_id) -> bool:
+        document = self._documents.pop(movie_id, None)
+        if document is None:
+            return False
+        for position, length in enumerate(document.lengths):
+            self._field_totals[position] -= length
+        for term in document.terms:
+            postings = self._postings[term]
+            del postings[movie_id]
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect_left(self._vocabulary, term)]
+        return True
+
+    def _expand(self, prefix: str) -> list:
+        """Vocabulary terms starting with `prefix`"""
+        position = bisect_left(self._vocabulary, prefix)
+        expanded = []
+        while (
+            position < len(self._vocabulary)
+            and self._vocabulary[position].startswith(prefix)
+            and len(expanded) < PREFIX_EXPANSIONS
+        ):
+            expanded.append(self._vocabulary[position])
+            position += 1
+        return expanded
+
+    def search(self, query: str, limit: int = 20) -> list:
+        """(movie ID, title, poster, score) of the best matches, best first"""
+        words = tokenize(query)
+        if not words or limit <= 0:
+            return []
+        with self._lock:
+            count = len(self._documents)
+            if not count:
+                return []
+            averages = [total / count or 1.0 for total in self._field_totals]
+            scores = {}
+            for index, word in enumerate(words):
+                terms = [word] if word in self._postings else []
+                if index == len(words) - 1 and not query[-1:].isspace():
+                    terms = list(dict.fromkeys(terms + self._expand(word)))
+                # A word scores once per movie, with its best matching term
+                word_scores = {}
+                for term in terms:
+                    postings = self._postings[term]
+                    idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for movie_id, frequencies in postings.items():
+                        lengths = self._documents[movie_id].lengths
+                        weighted = sum(
+                            weight * frequency / (1 - B + B * length / average)
+                            for weight, frequency, length, average in zip(WEIGHTS, frequencies, lengths, averages)
+                            if frequency
+                        )
+                        score = idf * weighted / (K1 + weighted)
+                        if score > word_scores.get(movie_id, 0.0):
+                            word_scores[movie_id] = score
+                for movie_id, score in word_scores.items():
+                    scores[movie_id] = scores.get(movie_id, 0.0) + score
+
+            best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+            return [
+                (movie_id, self._documents[movie_id].title, self._documents[movie_id].poster, score)
+                for movie_id, score in best
+            ]
+
+    def to_json(self) -> dict:
+        """Serializable form of the index, see from_json"""
+        with self._lock:
+            return {
+                "version": FORMAT_VERSION,
+                "movies": {
+                    str(movie_id): [document.title, document.poster, document.lengths, document.terms]
+                    for movie_id, document in self._documents.items()
+                },
+            }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "MovieSearchIndex":
+        """Index saved by to_json, without tokenizing anything again"""
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported movie search index version {data.get('version')}")
+        index = cls()
+        for movie_id, (title, poster, lengths, terms) in data["movies"].items():
+            document = _Document(title, poster, lengths, {term: tuple(counts) for term, counts in terms.items()})
+            index._add(int(movie_id), document, keep_vocabulary=False)  # pylint: disable=protected-access
+        index._vocabulary = sorted(index._postings)  # pylint: disable=protected-access
+        return index
+
+
+def fetch_movies(conn, movie_ids: list) -> list:
+    """(ID, title, poster, actor names, producer, synopsis) of movies"""
+    placeholders = ", ".join(["%s"] * len(movie_ids))
+    movies = connect_mysql.get_query(conn, QUERY_MOVIES.format(placeholders=placeholders), tuple(movie_ids))
+    actors = connect_mysql.get_query(conn, QUERY_ACTORS.format(placeholders=placeholders), tuple(movie_ids))
+    if movies is None or actors is None:
+        raise RuntimeError("Movie search index query failed")
+    names = {}
+    for movie_id, actor_name in actors:
+        names.setdefault(movie_id, []).append(actor_name or "")
+    return [
+        (movie_id, title, poster, names.get(movie_id, []), producer, synopsis)
+        for movie_id, title, poster, producer, synopsis in movies
+    ]
+
+
+def _index_movies(index: MovieSearchIndex, movie_ids: list):
+    with connect_mysql.borrow() as conn:
+        for start in range(0, len(movie_ids), FETCH_BATCH):
+            for movie in fetch_movies(conn, movie_ids[start : start + FETCH_BATCH]):
+                index.add(*movie)
+
+
+def sync(index: MovieSearchIndex) -> int:
+    """Index the movies missing from `index` and drop the deleted ones. Returns the number of changes."""
+    with connect_mysql.borrow() as conn:
+        rows = connect_mysql.get_query(conn, QUERY_MOVIE_IDS)
+    if rows is None:
+        raise RuntimeError("Movie search index query failed")
+    current = {row[0] for row in rows}
+    indexed = index.movie_ids()
+    for movie_id in indexed - current:
+        index.remove(movie_id)
+    _index_movies(index, sorted(current - indexed))
+    index.checked_at = time.monotonic()
+    return len(indexed ^ current)
+
+
+def load() -> MovieSearchIndex:
+    """The index saved at MOVIE_SEARCH_INDEX_PATH, an empty one if there is none (or it is unreadable)"""
+    try:
+        with open(Config.MOVIE_SEARCH_INDEX_PATH, encoding="utf-8") as stream:
+            return MovieSearchIndex.from_json(json.load(stream))
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError, TypeError) as error:
+        logger.warning("Movie search index not loaded from %s: %s", Config.MOVIE_SEARCH_INDEX_PATH, error)
+    return MovieSearchIndex()
+
+
+def save(index: MovieSearchIndex):
+    """
+    Write the index to MOVIE_SEARCH_INDEX_PATH, atomically: it is written to a
+    temporary file of its own, then renamed, so a reader never sees half a file.
+    """
+    path = Config.MOVIE_SEARCH_INDEX_PATH
+    directory = os.path.dirname(path) or "."
+    with _write_lock:
+        index.dirty = False
+        temporary = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+            with os.fdopen(descriptor, "w", encoding="utf-8") as stream:
+                json.dump(index.to_json(), stream, ensure_ascii=False, separators=(",", ":"))
+            os.replace(temporary, path)
+        except OSError as error:
+            index.dirty = True
+            logger.warning("Movie search index not saved to %s: %s", path, error)
+            if temporary is not None and os.path.exists(temporary):
+                os.remove(temporary)
+
+
+_index = None
+_index_lock = threading.Lock()
+# Saves are scheduled under _save_lock (one pending timer at most) and written under _write_lock
+_save_lock = threading.Lock()
+_write_lock = threading.Lock()
+_save_timer = None
+_saved_at = 0.0
+
+
+def get_index() -> MovieSearchIndex:
+    """The index of this process: loaded from disk on first use, synced with et_movie every MOVIE_SEARCH_TTL seconds"""
+    index = _index
+    if index is not None and time.monotonic() - index.checked_at < Config.MOVIE_SEARCH_TTL:
+        return index
+    with _index_lock:
+        if _index is not None and time.monotonic() - _index.checked_at < Config.MOVIE_SEARCH_TTL:
+            # Synced by another thread meanwhile
+            return _index
+        return refresh()
+
+
+def refresh() -> MovieSearchIndex:
+    """Load the index if needed, sync it with et_movie and save it if it changed"""
+    global _index  # pylint: disable=global-statement
+    if _index is None:
+        _index = load()
+    start = time.perf_counter()
+    changed = sync(_index)
+    if changed:
+        logger.info("Movie search index synced: %d changes in %.1f ms", changed, (time.perf_counter() - start) * 1000)
+    _save_if_due(force=bool(changed))
+    return _index
+
+
+def _save_if_due(force: bool = False):
+    """
+    Schedule a save of the index if it changed, on a timer thread so that no
+    request waits for it: MOVIE_SEARCH_SAVE_INTERVAL seconds after the last save
+    at the earliest, right away if forced.
+    """
+    global _save_timer  # pylint: disable=global-statement
+    index = _index
+    if index is None or not index.dirty:
+        return
+    with _save_lock:
+        if _save_timer is not None:
+            if not force:
+                # The pending save writes the latest state of the index
+                return
+            _save_timer.cancel()
+        delay = 0.0 if force else max(0.0, _saved_at + Config.MOVIE_SEARCH_SAVE_INTERVAL - time.monotonic())
+        _save_timer = threading.Timer(delay, _save_scheduled)
+        _save_timer.daemon = True
+        _save_timer.start()
+
+
+def _save_scheduled():
+    global _save_timer, _saved_at  # pylint: disable=global-statement
+    with _save_lock:
+        if _save_timer is threading.current_thread():
+            _save_timer = None
+        _saved_at = time.monotonic()
+    index = _index
+    if index is not None and index.dirty:
+        save(index)
+
+
+def search(query: str, limit: int = 20) -> list:
+    """Movies matching `query`, best first, as dicts"""
+    results = get_index().search(query, limit)
+    _save_if_due()
+    return [
+        {"movie_id": movie_id, "title": title, "poster": poster, "score": round(score, 4)}
+        for movie_id, title, poster, score in results
+    ]
+
+
+def movies_created(movie_ids):
+    """Index new movies"""
+    if _index is None or not movie_ids:
+        return
+    try:
+        _index_movies(_index, list(movie_ids))
+    except RuntimeError:
+        # The movies are saved: the next sync indexes them
+        logger.warning("Movie search index update failed, the next sync will catch up")
+        _index.checked_at = 0.0
+        return
+    _save_if_due()
+
+
+def movie_deleted(movie_id):
+    """Drop a deleted movie"""
+    if _index is not None:
+        _index.remove(movie_id)
+        _save_if_due()
+
+
+@atexit.register
+def _save_on_exit():
+    with _save_lock:
+        if _save_timer is not None:
+            _save_timer.cancel()
+    index = _index
+    if index is not None and index.dirty:
+        save(index)
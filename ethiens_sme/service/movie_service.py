@@ -2,14 +2,112 @@
 Docstring for Ehtiens-SME.ethiens_sme.service.movie_service
 """
 
-from typing import List
-import requests
+from typing import Dict, List
 from ethiens_sme.config import Config
 from ethiens_sme import connect_mysql
 from ethiens_sme.model.movie_model import MovieModel
 from ethiens_sme.utils.exception.exceptions import ResourceNotFoundException
 from ethiens_sme.model.actor_model import ActorModel
-from ethiens_sme.service import actor_service
+from ethiens_sme.service import (
+    actor_service,
+    movie_search,
+    report_service,
+    schedule_index,
+    stats_service,
+    tmdb_service,
+)
+from ethiens_sme.utils import pagination, response_cache
+
+# {placeholders}: one "%s" per movie ID
+QUERY_ACTORS_BY_MOVIES = """
+    SELECT
+        c.mo_id_movie,
+        a.ac_id_actor,
+        a.ac_actor_name,
+        a.ac_actor_picture
+    FROM
+        et_actors AS a
+    JOIN
+        et_casting AS c ON a.ac_id_actor = c.ac_id_actor
+    WHERE
+        c.mo_id_movie IN ({placeholders});
+"""
+
+QUERY_MOVIE_DETAILS = """
+    SELECT
+        m.mo_id_movie,
+        m.mo_date_publication,
+        m.mo_length_minutes,
+        m.mo_minimum_age,
+        m.mo_synopsis,
+        m.mo_title,
+        m.mo_poster,
+        m.mo_country,
+        m.mo_producer,
+        m.mo_begin_date,
+        m.mo_end_date,
+        a.ac_id_actor,
+        a.ac_actor_name,
+        a.ac_actor_picture
+    FROM
+        et_movie AS m
+    LEFT JOIN
+        et_casting AS c ON c.mo_id_movie = m.mo_id_movie
+    LEFT JOIN
+        et_actors AS a ON a.ac_id_actor = c.ac_id_actor
+    WHERE
+        m.mo_id_movie = %s;
+"""
+
+QUERY_INSERT_MOVIE = """
+    INSERT INTO et_movie (
+        mo_title, mo_date_publication, mo_length_minutes,
+        mo_minimum_age, mo_synopsis, mo_poster,
+        mo_country, mo_producer, mo_begin_date, mo_end_date
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
+"""
+
+QUERY_INSERT_CASTING = "INSERT INTO et_casting (mo_id_movie, ac_id_actor) VALUES (%s, %s);"
+
+# A multi-row INSERT gets consecutive IDs unless another session inserts
+# at the same time with innodb_autoinc_lock_mode = 2: the titles are checked.
+QUERY_CHECK_MOVIE_IDS = """
+    SELECT mo_title FROM et_movie
+    WHERE mo_id_movie BETWEEN %s AND %s
+    ORDER BY mo_id_movie;
+"""
+
+QUERY_DELETE_CASTING = "DELETE FROM et_casting WHERE mo_id_movie = %s;"
+QUERY_DELETE_MOVIE_SEANCES = "DELETE FROM et_seance WHERE mo_id_movie = %s;"
+QUERY_DELETE_MOVIE = "DELETE FROM et_movie WHERE mo_id_movie = %s;"
+
+QUERY_MOVIE_LIST = "SELECT mo_id_movie, mo_title FROM et_movie ORDER BY mo_title ASC;"
+
+_SELECT_MOVIES = """
+    SELECT
+        mo_id_movie,
+        mo_title,
+        mo_poster,
+        mo_date_publication,
+        mo_length_minutes,
+        mo_synopsis,
+        mo_country,
+        mo_producer,
+        mo_minimum_age,
+        mo_begin_date,
+        mo_end_date
+    FROM et_movie
+"""
+QUERY_MOVIES_PAGE = _SELECT_MOVIES + """
+    ORDER BY mo_title ASC, mo_id_movie ASC
+    LIMIT %s OFFSET %s;
+"""
+# Page after a cursor: seeks on (mo_title, mo_id_movie)
+QUERY_MOVIES_AFTER = _SELECT_MOVIES + """
+    WHERE mo_title > %s OR (mo_title = %s AND mo_id_movie > %s)
+    ORDER BY mo_title ASC, mo_id_movie ASC
+    LIMIT %s;
+"""
 
 
 def get_actors_by_movie_id(conn, movie_id: int) -> List[ActorModel]:
@@ -17,67 +115,94 @@ def get_actors_by_movie_id(conn, movie_id: int) -> List[ActorModel]:
     Helper function to get actors list by movie ID.
     Uses an existing database connection.
     """
-    actors_list = []
-
-    query_actors = """
-        SELECT
-            a.ac_id_actor,
-            a.ac_actor_name,
-            a.ac_actor_picture
-        FROM
-            et_actors AS a
-        JOIN
-            et_casting AS c ON a.ac_id_actor = c.ac_id_actor
-        WHERE
-            c.mo_id_movie = %s;
-    """
+    return get_actors_by_movie_ids(conn, [movie_id]).get(movie_id, [])
+
 
-    actors_results = connect_mysql.get_query(conn, query_actors, (movie_id,), True)
+def get_actors_by_movie_ids(conn, movie_ids: List[int]) -> Dict[int, List[ActorModel]]:
+    """
+    Get the casting of many movies in a single query.
+    Returns a dict {movie_id: [ActorModel, ...]}; movies without actors are absent.
+    """
+    actors_by_movie = {}
+    movie_ids = list(dict.fromkeys(movie_ids))
+    if not movie_ids:
+        return actors_by_movie
+
+    placeholders = ", ".join(["%s"] * len(movie_ids))
+    query_actors = QUERY_ACTORS_BY_MOVIES.format(placeholders=placeholders)
+    actors_results = connect_mysql.get_query(conn, query_actors, tuple(movie_ids), True)
     if actors_results:
         for actor_row in actors_results:
             actor = ActorModel(
                 id=actor_row["ac_id_actor"], name=actor_row["ac_actor_name"], picture=actor_row["ac_actor_picture"]
             )
-            actors_list.append(actor)
+            actors_by_movie.setdefault(actor_row["mo_id_movie"], []).append(actor)
 
-    return actors_list
+    return actors_by_movie
 
 
 def get_movie_details_by_id(movie_id: int) -> MovieModel:
-    """Get detailed information about a movie AND its casting by its ID"""
+    """
+    Get detailed information about a movie AND its casting by its ID.
+    The movie and its actors come back in one query, one row per actor.
+    """
+    with connect_mysql.borrow() as conn:
+        movie_results = connect_mysql.get_query(conn, QUERY_MOVIE_DETAILS, (movie_id,), True)
+
+    if not movie_results:
+        raise ResourceNotFoundException(f"Movie with id {movie_id} not found")
+
+    row = movie_results[0]
+
+    movie = MovieModel(
+        id=row["mo_id_movie"],
+        date_publication=row["mo_date_publication"],
+        length_minutes=row["mo_length_minutes"],
+        minimum_age=row["mo_minimum_age"],
+        synopsis=row["mo_synopsis"],
+        title=row["mo_title"],
+        poster=row["mo_poster"],
+        country=row["mo_country"],
+        producer=row["mo_producer"],
+        being_date=row["mo_begin_date"],
+        end_date=row["mo_end_date"],
+        actors=[],
+    )
+    for actor_row in movie_results:
+        if actor_row["ac_id_actor"] is not None:
+            movie.actors.append(
+                ActorModel(
+                    id=actor_row["ac_id_actor"],
+                    name=actor_row["ac_actor_name"],
+                    picture=actor_row["ac_actor_picture"],
+                )
+            )
+
+    return movie
 
-    conn = connect_mysql.connect()
-    try:
-        query_movie = """
-            SELECT * FROM et_movie WHERE mo_id_movie = %s;
-        """
-        movie_results = connect_mysql.get_query(conn, query_movie, (movie_id,), True)
-
-        if not movie_results:
-            raise ResourceNotFoundException(f"Movie with id {movie_id} not found")
-
-        row = movie_results[0]
-
-        movie = MovieModel(
-            id=row["mo_id_movie"],
-            date_publication=row["mo_date_publication"],
-            length_minutes=row["mo_length_minutes"],
-            minimum_age=row["mo_minimum_age"],
-            synopsis=row["mo_synopsis"],
-            title=row["mo_title"],
-            poster=row["mo_poster"],
-            country=row["mo_country"],
-            producer=row["mo_producer"],
-            being_date=row["mo_begin_date"],
-            end_date=row["mo_end_date"],
-            actors=[],
-        )
-        movie.actors = get_actors_by_movie_id(conn, movie_id)
 
-        return movie
+def sanitize_movie_data(data: dict) -> dict:
+    """Truncate the text fields of a movie payload to match the DB schema"""
+    if data.get("title") and len(data["title"]) > 150:
+        data["title"] = data["title"][:150]
+    if data.get("country") and len(data["country"]) > 50:
+        data["country"] = data["country"][:50]
+    return data
 
-    finally:
-        connect_mysql.disconnect(conn)
+
+def _movie_params(data: dict) -> tuple:
+    return (
+        data.get("title"),
+        data.get("date_publication"),
+        data.get("length_minutes"),
+        data.get("minimum_age"),
+        data.get("synopsis"),
+        data.get("poster"),
+        data.get("country"),
+        data.get("producer"),
+        data.get("begin_date"),
+        data.get("end_date"),
+    )
 
 
 def create_movie(data: dict) -> int:
@@ -85,66 +210,85 @@ def create_movie(data: dict) -> int:
     Create a new movie.
     Actors are passed by name. They are created if they don't exist.
     """
-    conn = connect_mysql.connect()
+    with connect_mysql.unit_of_work() as conn:
+        # Committed together with the casting rows at the end of the unit of work
+        new_movie_id = connect_mysql.execute_command(conn, QUERY_INSERT_MOVIE, _movie_params(data))
 
-    try:
-        query_movie = """
-            INSERT INTO et_movie (
-                mo_title, mo_date_publication, mo_length_minutes,
-                mo_minimum_age, mo_synopsis, mo_poster,
-                mo_country, mo_producer, mo_begin_date, mo_end_date
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
-        """
-
-        params_movie = (
-            data.get("title"),
-            data.get("date_publication"),
-            data.get("length_minutes"),
-            data.get("minimum_age"),
-            data.get("synopsis"),
-            data.get("poster"),
-            data.get("country"),
-            data.get("producer"),
-            data.get("begin_date"),
-            data.get("end_date"),
-        )
+        actor_ids = actor_service.get_or_create_actors(conn, data.get("actor_names", []))
+        if actor_ids:
+            # Two names may resolve to the same actor (case/accent variants)
+            casting_rows = [(new_movie_id, actor_id) for actor_id in dict.fromkeys(actor_ids.values())]
+            connect_mysql.execute_many(conn, QUERY_INSERT_CASTING, casting_rows)
 
-        # Use execute_command to ensure the INSERT is committed
-        connect_mysql.execute_command(conn, query_movie, params_movie)
-
-        query_get_id = "SELECT MAX(mo_id_movie) as id FROM et_movie;"
-        # Or SELECT LAST_INSERT_ID() if we are sure it's the same connection/session. 
-        # Since we pass 'conn', it is the same session.
-        # But let's be safe with LAST_INSERT_ID() in the same session context if possible, 
-        # or just MAX(id) if traffic is low (risky). 
-        # Actually, execute_command commits, so the ID is safe.
-        # But execute_command returns `lastrowid` if configured? 
-        # Let's check execute_command implementation in connect_mysql.py... 
-        # It returns `cur.lastrowid` if "returning" is in query... wait, that's postgres style logic in a mysql file?
-        # The file says: if "returning" in query.lower(): returning_value = cur.lastrowid
-        # For MySQL INSERT, lastrowid is available on the cursor.
-        
-        # Simpler approach: Just get the ID.
-        res_id = connect_mysql.get_query(conn, "SELECT LAST_INSERT_ID() as id;", None, True)
-        new_movie_id = res_id[0]["id"]
-        
-        actor_names = data.get("actor_names", [])
+    response_cache.invalidate(response_cache.MOVIES)
+    movie_search.movies_created([new_movie_id])
+    stats_service.movies_created(1)
+    return new_movie_id
 
-        if actor_names:
-            query_casting = "INSERT INTO et_casting (mo_id_movie, ac_id_actor) VALUES (%s, %s);"
 
-            for name in actor_names:
-                clean_name = name.strip()
-                if clean_name:
-                    actor_id = actor_service.get_or_create_actor(conn, clean_name)
-                    connect_mysql.execute_command(conn, query_casting, (new_movie_id, actor_id))
 
-        return new_movie_id
+class _NonConsecutiveIdsError(Exception):
+    """The IDs generated by a multi-row INSERT were interleaved with another session's"""
 
-    except Exception as e:
-        raise e
-    finally:
-        connect_mysql.disconnect(conn)
+
+def create_movies(movies: List[dict], actor_ids: Dict[str, int] = None) -> List[int]:
+    """
+    Create a batch of movies with their casts in a single transaction.
+    The batch costs a constant number of statements: one multi-row INSERT for
+    the movies, one SELECT to check their IDs, up to three statements for the
+    actors and one multi-row INSERT for the casting.
+    `actor_ids` is an optional {name: id} cache of known actors, shared between
+    batches; it is completed with the actors created by this batch once committed.
+    Returns the IDs of the new movies, in order.
+    """
+    if not movies:
+        return []
+    if actor_ids is None:
+        actor_ids = {}
+
+    try:
+        movie_ids, new_actor_ids = _create_movies(movies, actor_ids, multi_row=True)
+    except _NonConsecutiveIdsError:
+        # A concurrent insert took IDs in the middle of the batch: the batch was
+        # rolled back, insert it again row by row to get each ID for sure.
+        movie_ids, new_actor_ids = _create_movies(movies, actor_ids, multi_row=False)
+
+    actor_ids.update(new_actor_ids)
+    response_cache.invalidate(response_cache.MOVIES)
+    movie_search.movies_created(movie_ids)
+    stats_service.movies_created(len(movie_ids))
+    return movie_ids
+
+
+def _create_movies(movies: List[dict], actor_ids: Dict[str, int], multi_row: bool) -> tuple:
+    with connect_mysql.unit_of_work() as conn:
+        if multi_row:
+            first_id = connect_mysql.execute_many(conn, QUERY_INSERT_MOVIE, [_movie_params(data) for data in movies])
+            movie_ids = list(range(first_id, first_id + len(movies)))
+
+            rows = connect_mysql.get_query(conn, QUERY_CHECK_MOVIE_IDS, (movie_ids[0], movie_ids[-1]))
+            if [row[0] for row in rows or []] != [data.get("title") for data in movies]:
+                raise _NonConsecutiveIdsError()
+        else:
+            movie_ids = [connect_mysql.execute_command(conn, QUERY_INSERT_MOVIE, _movie_params(data)) for data in movies]
+
+        names = dict.fromkeys(
+            name.strip() for data in movies for name in data.get("actor_names") or [] if name and name.strip()
+        )
+        new_actor_ids = actor_service.get_or_create_actors(conn, [name for name in names if name not in actor_ids])
+
+        casting_rows = []
+        for movie_id, data in zip(movie_ids, movies):
+            movie_actor_ids = dict.fromkeys(
+                new_actor_ids.get(name.strip()) or actor_ids.get(name.strip())
+                for name in data.get("actor_names") or []
+                if name and name.strip()
+            )
+            casting_rows.extend((movie_id, actor_id) for actor_id in movie_actor_ids if actor_id is not None)
+
+        connect_mysql.execute_many(conn, QUERY_INSERT_CASTING, casting_rows)
+
+    return movie_ids, new_actor_ids
 
 
 def delete_movie(movie_id: int):
@@ -152,20 +296,22 @@ def delete_movie(movie_id: int):
     Delete a movie by ID.
     First removes casting associations and seances, then the movie.
     """
-    conn = connect_mysql.connect()
-    try:
+    with connect_mysql.unit_of_work() as conn:
         # Delete casting first
-        query_delete_casting = "DELETE FROM et_casting WHERE mo_id_movie = %s;"
-        connect_mysql.execute_command(conn, query_delete_casting, (movie_id,))
+        connect_mysql.execute_command(conn, QUERY_DELETE_CASTING, (movie_id,))
         
-        # Delete seances
-        query_delete_seance = "DELETE FROM et_seance WHERE mo_id_movie = %s;"
-        connect_mysql.execute_command(conn, query_delete_seance, (movie_id,))
+        # Delete seances, their weeks being reported again
+        report_service.mark_movie_id(conn, movie_id)
+        connect_mysql.execute_command(conn, QUERY_DELETE_MOVIE_SEANCES, (movie_id,))
 
-        query_delete_movie = "DELETE FROM et_movie WHERE mo_id_movie = %s;"
-        connect_mysql.execute_command(conn, query_delete_movie, (movie_id,))
-    finally:
-        connect_mysql.disconnect(conn)
+        deleted = connect_mysql.execute_command(conn, QUERY_DELETE_MOVIE, (movie_id,))
+
+    response_cache.invalidate(response_cache.MOVIES, response_cache.SEANCES)
+    schedule_index.movie_deleted(movie_id)
+    movie_search.movie_deleted(movie_id)
+    if deleted:
+        # Not for a missing movie, or one deleted meanwhile by another request
+        stats_service.movie_deleted()
 
 
 
@@ -174,45 +320,34 @@ def get_all_movies_simple() -> list:
     Get a lightweight list of all movies (ID and Title only).
     Useful for dropdown menus.
     """
-    query = "SELECT mo_id_movie, mo_title FROM et_movie ORDER BY mo_title ASC;"
-
-    conn = connect_mysql.connect()
-    try:
-        results = connect_mysql.get_query(conn, query, None, True)
+    with connect_mysql.borrow() as conn:
+        results = connect_mysql.get_query(conn, QUERY_MOVIE_LIST, None, True)
 
         movies_list = []
         if results:
             for row in results:
                 movies_list.append({"id": row["mo_id_movie"], "title": row["mo_title"]})
         return movies_list
-    finally:
-        connect_mysql.disconnect(conn)
 
-def get_all_movies_paginated(limit: int = 20, offset: int = 0) -> list:
+def get_all_movies_paginated(
+    limit: int = 20, offset: int = 0, include_actors: bool = False, cursor: str = None
+) -> list:
     """
     Get all movies with details, with pagination support.
+    With include_actors, the casting of the whole page is loaded in one extra query.
+    With a `cursor` (see all_movies_cursor) the page starts right after the last
+    movie of the previous page, seeking on (mo_title, mo_id_movie), and `offset` is ignored.
     """
-    query = """
-        SELECT 
-            mo_id_movie,
-            mo_title,
-            mo_poster,
-            mo_date_publication,
-            mo_length_minutes,
-            mo_synopsis,
-            mo_country,
-            mo_producer,
-            mo_minimum_age,
-            mo_begin_date,
-            mo_end_date
-        FROM et_movie
-        ORDER BY mo_title ASC
-        LIMIT %s OFFSET %s;
-    """
-    
-    conn = connect_mysql.connect()
-    try:
-        results = connect_mysql.get_query(conn, query, (limit, offset), True)
+    if cursor:
+        last_title, last_id = pagination.decode_cursor(cursor, 2)
+        query = QUERY_MOVIES_AFTER
+        params = (last_title, last_title, last_id, limit)
+    else:
+        query = QUERY_MOVIES_PAGE
+        params = (limit, offset)
+
+    with connect_mysql.borrow() as conn:
+        results = connect_mysql.get_query(conn, query, params, True)
         
         movies = []
         if results:
@@ -230,29 +365,35 @@ def get_all_movies_paginated(limit: int = 20, offset: int = 0) -> list:
                     "begin_date": row["mo_begin_date"].isoformat() if row["mo_begin_date"] else None,
                     "end_date": row["mo_end_date"].isoformat() if row["mo_end_date"] else None
                 })
+
+        if include_actors and movies:
+            actors_by_movie = get_actors_by_movie_ids(conn, [movie["movie_id"] for movie in movies])
+            for movie in movies:
+                movie["actors"] = actors_by_movie.get(movie["movie_id"], [])
         return movies
-    finally:
-        connect_mysql.disconnect(conn)
+
+
+def all_movies_cursor(movies: list, limit: int) -> str:
+    """Cursor of the page following `movies`, or None when it was the last page"""
+    if not movies or len(movies) < limit:
+        return None
+    last = movies[-1]
+    return pagination.encode_cursor(last["title"], last["movie_id"])
+
+
+def search_movies(query: str, limit: int = 20) -> list:
+    """Search the catalogue (title, actors, producer, synopsis), best matches first"""
+    if not query or not query.strip():
+        return []
+    return movie_search.search(query, limit)
 
 
 def search_tmdb_movie(query: str) -> list:
     if not Config.TMDB_API_KEY:
         return []
-    
+
     try:
-        url = f"https://api.themoviedb.org/3/search/movie?api_key={Config.TMDB_API_KEY}&query={query}&language=fr-FR"
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()
-        data = response.json()
-        
-        results = []
-        for item in data.get("results", []):
-             results.append({
-                 "id": item.get("id"),
-                 "title": item.get("title"),
-                 "release_date": item.get("release_date")
-             })
-        return results
+        return tmdb_service.search_movie(query)
     except Exception as e:
         print(f"TMDB Search failed: {e}")
         return []
@@ -262,32 +403,7 @@ def get_tmdb_movie_details_from_api(tmdb_id: str) -> dict:
         return None
 
     try:
-        url = f"https://api.themoviedb.org/3/movie/{tmdb_id}?api_key={Config.TMDB_API_KEY}&language=fr-FR&append_to_response=credits"
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()
-        data = response.json()
-
-        movie_data = {}
-        movie_data["title"] = data.get("title")
-        movie_data["overview"] = data.get("overview")
-        movie_data["release_date"] = data.get("release_date")
-        movie_data["runtime"] = data.get("runtime")
-        movie_data["poster_path"] = data.get("poster_path")
-        
-        movie_data["production_countries"] = data.get("production_countries", [])
-        movie_data["production_companies"] = data.get("production_companies", [])
-        
-        credits = data.get("credits", {})
-        movie_data["credits"] = {"cast": credits.get("cast", [])}
-
-        # Extract Director
-        crew = credits.get("crew", [])
-        for member in crew:
-            if member.get("job") == "Director":
-                movie_data["director"] = member.get("name")
-                break
-
-        return movie_data
+        return tmdb_service.get_movie_details(tmdb_id)
     except Exception as e:
         print(f"TMDB Details failed: {e}")
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,249 @@
+"""
+In-memory search index of the cities and cinemas of et_cinema.
+Names are indexed by search key (case, accents and punctuation ignored) from
+the start of each of their words, in one sorted list: a prefix lookup is a
+bisect followed by a scan of the matching keys only. When nothing starts with
+the query, the closest names (difflib) are returned instead, so a typo still
+finds its city. A city name is only resolved silently when its search key is
+the query's; otherwise the cities it may designate are suggested.
+Every PLACE_INDEX_TTL seconds, et_cinema is read again and only the cinemas
+that were added, renamed or removed are updated in the index.
+"""
+
+import difflib
+import logging
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Optional
+
+from ethiens_sme import connect_mysql
+from ethiens_sme.config import Config
+from ethiens_sme.utils.text import search_key
+
+logger = logging.getLogger(__name__)
+
+CITY = "city"
+CINEMA = "cinema"
+_KIND_ORDER = {CITY: 0, CINEMA: 1}
+
+# Similarity (difflib ratio) a name needs to be suggested for a query
+FUZZY_CUTOFF = 0.6
+
+QUERY_CINEMAS = "SELECT ci_id_cinema, ci_cinema_name, ci_city FROM et_cinema;"
+
+
+@dataclass(slots=True)
+class Place:
+    """A city, or a cinema and its city"""
+
+    kind: str
+    name: str
+    city: str
+    cinema_id: Optional[int] = None
+
+
+class PlaceIndex:
+    """Sorted (term, kind, ID) keys of the words of every city and cinema name"""
+
+    def __init__(self, rows=()):
+        self.checked_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._terms = []  # sorted (term, kind order, ID): one per word start of each name
+        self._places = {}  # (kind order, ID): Place
+        self._names = {}  # search key of the full name: set of (kind order, ID)
+        self._cinemas = {}  # cinema ID: (name, city)
+        self._city_cinemas = {}  # city search key: number of cinemas
+        self.sync(rows)
+
+    def __len__(self):
+        return len(self._places)
+
+    def sync(self, rows) -> int:
+        """
+        Make the index match the (ci_id_cinema, ci_cinema_name, ci_city) rows
+        of et_cinema, touching only the cinemas that changed. Returns their number.
+        """
+        current = {cinema_id: (name or "", city or "") for cinema_id, name, city in rows}
+        with self._lock:
+            changed = [
+                cinema_id
+                for cinema_id in self._cinemas.keys() | current.keys()
+                if self._cinemas.get(cinema_id) != current.get(cinema_id)
+            ]
+            for cinema_id in changed:
+                if cinema_id in self._cinemas:
+                    self._remove_cinema(cinema_id)
+                if cinema_id in current:
+                    self._add_cinema(cinema_id, *current[cinema_id])
+        return len(changed)
+
+    def _add_cinema(self, cinema_id, name, city):
+        self._cinemas[cinema_id] = (name, city)
+        self._add(_KIND_ORDER[CINEMA], cinema_id, Place(CINEMA, name, city, cinema_id))
+        city_key = search_key(city)
+        self._city_cinemas[city_key] = self._city_cinemas.get(city_key, 0) + 1
+        if self._city_cinemas[city_key] == 1:
+            self._add(_KIND_ORDER[CITY], city_key, Place(CITY, city, city))
+
+    def _remove_cinema(self, cinema_id):
+        name, city = self._cinemas.pop(cinema_id)
+        self._remove(_KIND_ORDER[CINEMA], cinema_id, name)
+        city_key = search_key(city)
+        self._city_cinemas[city_key] -= 1
+        if not self._city_cinemas[city_key]:
+            del self._city_cinemas[city_key]
+            self._remove(_KIND_ORDER[CITY], city_key, city)
+
+    def _add(self, kind, ident, place: Place):
+        self._places[(kind, ident)] = place
+        key = search_key(place.name)
+        self._names.setdefault(key, set()).add((kind, ident))
+        for term in _word_starts(key):
+            entry = (term, kind, ident)
+            position = bisect_left(self._terms, entry)
+            if position == len(self._terms) or self._terms[position] != entry:
+                self._terms.insert(position, entry)
+
+    def _remove(self, kind, ident, name):
+        del self._places[(kind, ident)]
+        key = search_key(name)
+        self._names[key].discard((kind, ident))
+        if not self._names[key]:
+            del self._names[key]
+        for term in _word_starts(key):
+            entry = (term, kind, ident)
+            position = bisect_left(self._terms, entry)
+            if position < len(self._terms) and self._terms[position] == entry:
+                del self._terms[position]
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """
+        Places whose name, or one of its words, starts with `query`: exact names
+        first, then names starting with it, then words starting with it, cities
+        before cinemas. Without any, the names closest to `query`.
+        Returns (Place, "prefix" or "fuzzy") pairs.
+        """
+        key = search_key(query or "")
+        if not key or limit <= 0:
+            return []
+        with self._lock:
+            ranked = {}
+            position = bisect_left(self._terms, (key,))
+            while position < len(self._terms) and self._terms[position][0].startswith(key):
+                _, kind, ident = self._terms[position]
+                place = self._places[(kind, ident)]
+                full = search_key(place.name)
+                rank = (0 if full == key else 1 if full.startswith(key) else 2, kind, full)
+                if rank < ranked.get((kind, ident), (3,)):
+                    ranked[(kind, ident)] = rank
+                position += 1
+            if ranked:
+                ordered = sorted(ranked, key=ranked.get)[:limit]
+                return [(self._places[ref], "prefix") for ref in ordered]
+
+            results = []
+            for name in difflib.get_close_matches(key, self._names, limit, FUZZY_CUTOFF):
+                refs = sorted(self._names[name], key=lambda ref: (ref[0], str(ref[1])))
+                results.extend((self._places[ref], "fuzzy") for ref in refs)
+            return results[:limit]
+
+    def resolve_city(self, name: str) -> Optional[str]:
+        """City with the same search key as `name` (case, accents and punctuation ignored), None if there is none"""
+        key = search_key(name or "")
+        if not key:
+            return None
+        with self._lock:
+            place = self._places.get((_KIND_ORDER[CITY], key))
+        return place.city if place is not None else None
+
+    def suggest_cities(self, name: str, limit: int = 5) -> list:
+        """Cities `name` may designate: those starting with it, else the closest ones"""
+        key = search_key(name or "")
+        if not key or limit <= 0:
+            return []
+        city_kind = _KIND_ORDER[CITY]
+        with self._lock:
+            keys = sorted(city for city in self._city_cinemas if city.startswith(key))[:limit]
+            if not keys:
+                keys = difflib.get_close_matches(key, self._city_cinemas, limit, FUZZY_CUTOFF)
+            return [self._places[(city_kind, city)].city for city in keys]
+
+
+def _word_starts(key: str) -> list:
+    """The key from the start of each of its words ("saint etienne" -> ["saint etienne", "etienne"])"""
+    words = key.split(" ")
+    return [" ".join(words[index:]) for index in range(len(words))]
+
+
+def _fetch() -> list:
+    with connect_mysql.borrow() as conn:
+        rows = connect_mysql.get_query(conn, QUERY_CINEMAS)
+    if rows is None:
+        raise RuntimeError("Place index query failed")
+    return rows
+
+
+_index = None
+_refresh_lock = threading.Lock()
+
+
+def get_index() -> PlaceIndex:
+    """
+    The index of this process, built on first use and synced with et_cinema every PLACE_INDEX_TTL seconds.
+    Only the first build makes the callers wait: while one thread syncs an expired
+    index, the others keep being served the current one.
+    """
+    index = _index
+    if index is not None:
+        if time.monotonic() - index.checked_at < Config.PLACE_INDEX_TTL:
+            return index
+        if not _refresh_lock.acquire(blocking=False):
+            return index
+        try:
+            return _refresh_unless_done()
+        finally:
+            _refresh_lock.release()
+    with _refresh_lock:
+        return _refresh_unless_done()
+
+
+def _refresh_unless_done() -> PlaceIndex:
+    """Refresh the index, unless another thread did meanwhile"""
+    if _index is not None and time.monotonic() - _index.checked_at < Config.PLACE_INDEX_TTL:
+        return _index
+    return refresh()
+
+
+def refresh() -> PlaceIndex:
+    """Apply the changes of et_cinema to the index (built the first time)"""
+    global _index  # pylint: disable=global-statement
+    rows = _fetch()
+    if _index is None:
+        _index = PlaceIndex(rows)
+        logger.debug("Place index built: %d places", len(_index))
+    else:
+        changed = _index.sync(rows)
+        _index.checked_at = time.monotonic()
+        if changed:
+            logger.debug("Place index synced: %d cinemas changed", changed)
+    return _index
+
+
+def search(query: str, limit: int = 10) -> list:
+    """Cities and cinemas matching `query`, as dicts"""
+    return [
+        {"kind": place.kind, "name": place.name, "city": place.city, "cinema_id": place.cinema_id, "match": match}
+        for place, match in get_index().search(query, limit)
+    ]
+
+
+def resolve_city(name: str) -> Optional[str]:
+    """Name of the city `name` designates, None if no city has this name"""
+    return get_index().resolve_city(name)
+
+
+def suggest_cities(name: str, limit: int = 5) -> list:
+    """Names of the cities a `name` no city has may designate"""
+    return get_index().suggest_cities(name, limit)
@@ -0,0 +1,252 @@
+"""
+Weekly programming reports by cinema: per room the number of seances, of
+movies, the screen time and the gaps between consecutive screenings of a day
+(a negative gap is an overlap), and per movie its seances and rooms.
+The reports are materialized in et_report_room_week and et_report_movie_week.
+The seance writes only mark their (cinema, week) in et_report_dirty, in their
+own transaction; refresh() (report_job, scheduled or queued on RQ) computes
+the marked weeks again from their seances only. Reading a report is a primary
+key range scan on the summary tables, whatever the size of et_seance.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from itertools import groupby
+
+from ethiens_sme import connect_mysql
+from ethiens_sme.config import Config
+from ethiens_sme.utils.exception.exceptions import InvalidInputException
+
+logger = logging.getLogger(__name__)
+
+# Weeks a range report may cover
+MAX_WEEKS = 53
+
+_WEEK_START = "DATE_SUB(DATE({column}), INTERVAL WEEKDAY({column}) DAY)"
+
+QUERY_MARK_WEEK = """
+    INSERT INTO et_report_dirty (ci_id_cinema, rd_week_start)
+    VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE rd_marked_at = CURRENT_TIMESTAMP(6);
+"""
+
+QUERY_MARK_SEANCES = f"""
+    INSERT INTO et_report_dirty (ci_id_cinema, rd_week_start)
+    SELECT DISTINCT ci_id_cinema, {_WEEK_START.format(column="se_date_time")}
+    FROM et_seance
+    WHERE {{condition}}
+    ON DUPLICATE KEY UPDATE rd_marked_at = CURRENT_TIMESTAMP(6);
+"""
+
+QUERY_WEEK_SEANCES = """
+    SELECT COALESCE(s.se_room, ''), s.se_date_time, s.mo_id_movie, m.mo_length_minutes
+    FROM et_seance AS s
+    JOIN et_movie AS m ON s.mo_id_movie = m.mo_id_movie
+    WHERE s.ci_id_cinema = %s AND s.se_date_time >= %s AND s.se_date_time < %s
+    ORDER BY COALESCE(s.se_room, ''), s.se_date_time;
+"""
+
+QUERY_INSERT_ROOM_WEEK = """
+    INSERT INTO et_report_room_week (
+        ci_id_cinema, rw_week_start, se_room, rw_seances, rw_movies, rw_screen_minutes,
+        rw_gap_count, rw_gap_total_minutes, rw_gap_min_minutes, rw_gap_max_minutes, rw_overlaps
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
+"""
+
+QUERY_INSERT_MOVIE_WEEK = """
+    INSERT INTO et_report_movie_week (ci_id_cinema, rm_week_start, mo_id_movie, rm_seances, rm_rooms)
+    VALUES (%s, %s, %s, %s, %s);
+"""
+
+QUERY_DELETE_ROOM_WEEK = "DELETE FROM et_report_room_week WHERE ci_id_cinema = %s AND rw_week_start = %s;"
+QUERY_DELETE_MOVIE_WEEK = "DELETE FROM et_report_movie_week WHERE ci_id_cinema = %s AND rm_week_start = %s;"
+# A write marking the week again meanwhile has a later rd_marked_at: it stays for the next refresh
+QUERY_CLEAR_MARK = """
+    DELETE FROM et_report_dirty WHERE ci_id_cinema = %s AND rd_week_start = %s AND rd_marked_at <= %s;
+"""
+
+QUERY_MARKED_WEEKS = """
+    SELECT ci_id_cinema, rd_week_start, rd_marked_at FROM et_report_dirty
+    ORDER BY rd_marked_at
+    LIMIT %s;
+"""
+QUERY_IS_MARKED = "SELECT 1 FROM et_report_dirty WHERE ci_id_cinema = %s AND rd_week_start = %s;"
+
+QUERY_ROOM_WEEK = """
+    SELECT se_room, rw_seances, rw_movies, rw_screen_minutes, rw_gap_count, rw_gap_total_minutes,
+        rw_gap_min_minutes, rw_gap_max_minutes, rw_overlaps
+    FROM et_report_room_week
+    WHERE ci_id_cinema = %s AND rw_week_start = %s
+    ORDER BY se_room;
+"""
+QUERY_MOVIE_WEEK = """
+    SELECT r.mo_id_movie, m.mo_title, r.rm_seances, r.rm_rooms
+    FROM et_report_movie_week AS r
+    JOIN et_movie AS m ON m.mo_id_movie = r.mo_id_movie
+    WHERE r.ci_id_cinema = %s AND r.rm_week_start = %s
+    ORDER BY r.rm_seances DESC, m.mo_title;
+"""
+QUERY_ROOM_WEEKS = """
+    SELECT rw_week_start, se_room, rw_seances, rw_movies, rw_screen_minutes, rw_gap_count,
+        rw_gap_total_minutes, rw_gap_min_minutes, rw_gap_max_minutes, rw_overlaps
+    FROM et_report_room_week
+    WHERE ci_id_cinema = %s AND rw_week_start BETWEEN %s AND %s
+    ORDER BY rw_week_start, se_room;
+"""
+
+ROOM_COLUMNS = (
+    "room",
+    "seances",
+    "movies",
+    "screen_minutes",
+    "gap_count",
+    "gap_total_minutes",
+    "gap_min_minutes",
+    "gap_max_minutes",
+    "overlaps",
+)
+
+
+def week_start(value) -> date:
+    """Monday of the week of a date, a datetime or a YYYY-MM-DD string"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError as error:
+            raise InvalidInputException("INVALID_DATE") from error
+    if isinstance(value, datetime):
+        value = value.date()
+    return value - timedelta(days=value.weekday())
+
+
+def mark_seances(conn, seances):
+    """Mark the weeks of (cinema ID, date time) pairs for the next refresh, in the transaction of `conn`"""
+    if not Config.REPORTS_ENABLED:
+        return
+    weeks = {(cinema_id, week_start(date_time)) for cinema_id, date_time in seances if cinema_id and date_time}
+    connect_mysql.execute_many(conn, QUERY_MARK_WEEK, sorted(weeks))
+
+
+def mark_seance_id(conn, seance_id: int):
+    """Mark the week of an existing seance, before it is changed or deleted"""
+    if Config.REPORTS_ENABLED:
+        connect_mysql.execute_command(conn, QUERY_MARK_SEANCES.format(condition="se_id_seance = %s"), (seance_id,))
+
+
+def mark_movie_id(conn, movie_id: int):
+    """Mark the weeks of every seance of a movie, before they are deleted"""
+    if Config.REPORTS_ENABLED:
+        connect_mysql.execute_command(conn, QUERY_MARK_SEANCES.format(condition="mo_id_movie = %s"), (movie_id,))
+
+
+def mark_all():
+    """Mark every week with seances, for a full rebuild (e.g. after seances were written outside the app)"""
+    with connect_mysql.unit_of_work() as conn:
+        connect_mysql.execute_command(conn, QUERY_MARK_SEANCES.format(condition="1 = 1"))
+
+
+def compute_week(seances) -> tuple:
+    """
+    Room and movie summaries of the (room, date time, movie ID, length in minutes)
+    rows of one cinema and week, sorted by room then date.
+    Gaps are measured between consecutive seances of a room on the same day,
+    from the end of the first (its movie length) to the start of the next.
+    """
+    rooms = []
+    movie_seances = {}
+    movie_rooms = {}
+    for room, room_seances in groupby(seances, key=lambda seance: seance[0]):
+        room_seances = list(room_seances)
+        gaps = []
+        overlaps = 0
+        for previous, following in zip(room_seances, room_seances[1:]):
+            if previous[3] is None or previous[1].date() != following[1].date():
+                continue
+            gap = (following[1] - previous[1]).total_seconds() // 60 - previous[3]
+            if gap < 0:
+                overlaps += 1
+            else:
+                gaps.append(int(gap))
+        for _, _, movie_id, _ in room_seances:
+            movie_seances[movie_id] = movie_seances.get(movie_id, 0) + 1
+            movie_rooms.setdefault(movie_id, set()).add(room)
+        rooms.append(
+            (
+                room,
+                len(room_seances),
+                len({seance[2] for seance in room_seances}),
+                sum(seance[3] or 0 for seance in room_seances),
+                len(gaps),
+                sum(gaps),
+                min(gaps) if gaps else None,
+                max(gaps) if gaps else None,
+                overlaps,
+            )
+        )
+    movies = [(movie_id, count, len(movie_rooms[movie_id])) for movie_id, count in movie_seances.items()]
+    return rooms, movies
+
+
+def _refresh_week(conn, cinema_id: int, week: date, marked_at):
+    start = datetime.combine(week, datetime.min.time())
+    seances = connect_mysql.get_query(conn, QUERY_WEEK_SEANCES, (cinema_id, start, start + timedelta(days=7)))
+    if seances is None:
+        raise RuntimeError(f"Report query failed for cinema {cinema_id}, week {week}")
+    rooms, movies = compute_week(seances)
+
+    with connect_mysql.transaction(conn):
+        connect_mysql.execute_command(conn, QUERY_DELETE_ROOM_WEEK, (cinema_id, week))
+        connect_mysql.execute_command(conn, QUERY_DELETE_MOVIE_WEEK, (cinema_id, week))
+        connect_mysql.execute_many(conn, QUERY_INSERT_ROOM_WEEK, [(cinema_id, week) + room for room in rooms])
+        connect_mysql.execute_many(conn, QUERY_INSERT_MOVIE_WEEK, [(cinema_id, week) + movie for movie in movies])
+        connect_mysql.execute_command(conn, QUERY_CLEAR_MARK, (cinema_id, week, marked_at))
+
+
+def refresh(limit: int = None) -> int:
+    """Compute the reports of the marked weeks, oldest marks first. Returns the number of weeks refreshed."""
+    limit = limit or Config.REPORT_REFRESH_BATCH
+    with connect_mysql.borrow() as conn:
+        dirty = connect_mysql.get_query(conn, QUERY_MARKED_WEEKS, (limit,)) or []
+        for cinema_id, week, marked_at in dirty:
+            _refresh_week(conn, cinema_id, week, marked_at)
+    if dirty:
+        logger.info("Reports refreshed for %d cinema weeks", len(dirty))
+    return len(dirty)
+
+
+def _is_stale(conn, cinema_id: int, week: date) -> bool:
+    return bool(connect_mysql.get_query(conn, QUERY_IS_MARKED, (cinema_id, week)))
+
+
+def get_week_report(cinema_id: int, day) -> dict:
+    """Report of the week of `day` for a cinema: its rooms and its movies"""
+    week = week_start(day)
+    with connect_mysql.borrow() as conn:
+        rooms = connect_mysql.get_query(conn, QUERY_ROOM_WEEK, (cinema_id, week)) or []
+        movies = connect_mysql.get_query(conn, QUERY_MOVIE_WEEK, (cinema_id, week)) or []
+        stale = _is_stale(conn, cinema_id, week)
+
+    return {
+        "cinema_id": cinema_id,
+        "week_start": week.isoformat(),
+        "stale": stale,
+        "rooms": [dict(zip(ROOM_COLUMNS, room)) for room in rooms],
+        "movies": [
+            {"movie_id": movie_id, "title": title, "seances": seances, "rooms": room_count}
+            for movie_id, title, seances, room_count in movies
+        ],
+    }
+
+
+def get_weeks(cinema_id: int, date_from, date_to) -> list:
+    """Room summaries of a cinema for each week from `date_from` to `date_to`, at most MAX_WEEKS weeks"""
+    first, last = week_start(date_from), week_start(date_to)
+    if last < first or (last - first).days // 7 >= MAX_WEEKS:
+        raise InvalidInputException("INVALID_DATE_RANGE")
+    with connect_mysql.borrow() as conn:
+        rows = connect_mysql.get_query(conn, QUERY_ROOM_WEEKS, (cinema_id, first, last)) or []
+
+    return [
+        {"week_start": week.isoformat(), "rooms": [dict(zip(ROOM_COLUMNS, row[1:])) for row in week_rows]}
+        for week, week_rows in groupby(rows, key=lambda row: row[0])
+    ]
@@ -0,0 +1,328 @@
+"""
+In-memory index of the upcoming seances, by city and cinema.
+Cities are keyed by their search key (case, accents and punctuation ignored), each cinema
+keeps its seances sorted by date, so a city lookup is a few bisects instead of
+a three-table join. The service writes update it in place; it is reloaded from
+the database every SCHEDULE_INDEX_TTL seconds, which also picks up the writes
+of the other processes and drops the past seances.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+
+from ethiens_sme import connect_mysql
+from ethiens_sme.config import Config
+from ethiens_sme.model.seance_model import SeanceModel
+from ethiens_sme.utils.text import fold, search_key
+
+logger = logging.getLogger(__name__)
+
+QUERY_UPCOMING = """
+    SELECT
+        s.se_id_seance, s.se_date_time, s.se_room, s.se_language,
+        s.mo_id_movie, m.mo_title,
+        s.ci_id_cinema, c.ci_cinema_name, c.ci_city
+    FROM et_seance AS s
+    JOIN et_cinema AS c ON s.ci_id_cinema = c.ci_id_cinema
+    JOIN et_movie AS m ON s.mo_id_movie = m.mo_id_movie
+    WHERE s.se_date_time >= NOW() {condition};
+"""
+
+# Key of the seances without a language in the counts by language
+UNKNOWN_LANGUAGE = ""
+
+
+class _Entry:
+    """An indexed seance: the SeanceModel served, plus what the filters and updates need"""
+
+    __slots__ = ("seance_id", "movie_id", "language", "seance")
+
+    def __init__(self, seance_id, movie_id, seance: SeanceModel):
+        self.seance_id = seance_id
+        self.movie_id = movie_id
+        self.language = fold(seance.language or "")
+        self.seance = seance
+
+
+class _CinemaSchedule:
+    """Seances of one cinema, `keys` being the (date, ID) of `entries`, both sorted"""
+
+    __slots__ = ("keys", "entries")
+
+    def __init__(self):
+        self.keys = []
+        self.entries = []
+
+    def add(self, key, entry: _Entry):
+        """Insert an entry at its place"""
+        position = bisect_left(self.keys, key)
+        self.keys.insert(position, key)
+        self.entries.insert(position, entry)
+
+    def remove(self, key):
+        """Remove the entry of `key`, if any"""
+        position = bisect_left(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            del self.keys[position]
+            del self.entries[position]
+
+    def between(self, start: datetime, end: datetime):
+        """Entries from `start` (included) to `end` (excluded, None for no bound)"""
+        low = bisect_left(self.keys, (start,))
+        high = len(self.keys) if end is None else bisect_left(self.keys, (end,))
+        return self.entries[low:high]
+
+
+class ScheduleIndex:
+    """Upcoming seances by city search key, then by cinema ID"""
+
+    def __init__(self, rows=()):
+        self.loaded_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._cities = {}  # city search key: {cinema ID: _CinemaSchedule}
+        self._locations = {}  # seance ID: (city search key, cinema ID, key)
+        # While a reload queries the database, updates are also journaled to be
+        # replayed on the new index; once replaced, updates are forwarded to it
+        self._journal = None
+        self._replaced_by = None
+        self._add_rows(rows)
+
+    def __len__(self):
+        return len(self._locations)
+
+    def add_rows(self, rows):
+        """Index rows of QUERY_UPCOMING, replacing the seances already indexed with the same ID"""
+        self._update("_add_rows", rows)
+
+    def remove(self, seance_ids):
+        """Drop seances from the index"""
+        self._update("_remove", seance_ids)
+
+    def remove_movie(self, movie_id):
+        """Drop every seance of a movie"""
+        self._update("_remove_movie", movie_id)
+
+    def _update(self, name, argument):
+        with self._lock:
+            if self._replaced_by is None:
+                if self._journal is not None:
+                    self._journal.append((name, argument))
+                getattr(self, name)(argument)
+                return
+        self._replaced_by._update(name, argument)  # pylint: disable=protected-access
+
+    def _add_rows(self, rows):
+        for seance_id, date_time, room, language, movie_id, title, cinema_id, cinema_name, city in rows:
+            self._remove_one(seance_id)
+            seance = SeanceModel(title, date_time, room, language, cinema_name, city)
+            key = (date_time, seance_id)
+            city_key = search_key(city or "")
+            self._cities.setdefault(city_key, {}).setdefault(cinema_id, _CinemaSchedule()).add(
+                key, _Entry(seance_id, movie_id, seance)
+            )
+            self._locations[seance_id] = (city_key, cinema_id, key)
+
+    def _remove(self, seance_ids):
+        for seance_id in seance_ids:
+            self._remove_one(seance_id)
+
+    def _remove_movie(self, movie_id):
+        self._remove(
+            [
+                entry.seance_id
+                for cinemas in self._cities.values()
+                for schedule in cinemas.values()
+                for entry in schedule.entries
+                if entry.movie_id == movie_id
+            ]
+        )
+
+    def _remove_one(self, seance_id):
+        location = self._locations.pop(seance_id, None)
+        if location is None:
+            return
+        city_key, cinema_id, key = location
+        cinemas = self._cities[city_key]
+        cinemas[cinema_id].remove(key)
+        if not cinemas[cinema_id].keys:
+            del cinemas[cinema_id]
+            if not cinemas:
+                del self._cities[city_key]
+
+    def start_journal(self):
+        """Journal the updates from now on, for a reload about to query the database"""
+        with self._lock:
+            self._journal = []
+
+    def replace_by(self, index: "ScheduleIndex" = None):
+        """
+        Replay the journaled updates on `index` and forward the next ones to it.
+        Without `index` (the reload failed), only stop journaling.
+        """
+        with self._lock:
+            journal, self._journal = self._journal or [], None
+            if index is None:
+                return
+            for name, argument in journal:
+                getattr(index, name)(argument)
+            self._replaced_by = index
+
+    def seances(self, city: str, date_from=None, date_to=None, language: str = None, cinema_id=None) -> list:
+        """
+        Seances of a city (or of one of its cinemas) sorted by date, from now on.
+        date_from/date_to are dates (both days included) or datetimes;
+        language is matched ignoring case and accents.
+        """
+        start = datetime.now()
+        if date_from is not None:
+            start = max(start, _as_datetime(date_from))
+        end = None
+        if date_to is not None:
+            end = _as_datetime(date_to) + timedelta(days=1) if not isinstance(date_to, datetime) else date_to
+        language_key = fold(language) if language else None
+
+        with self._lock:
+            cinemas = self._cities.get(search_key(city or ""), {})
+            if cinema_id is not None:
+                cinemas = {cinema_id: cinemas[cinema_id]} if cinema_id in cinemas else {}
+            slices = [schedule.between(start, end) for schedule in cinemas.values()]
+
+        entries = slices[0] if len(slices) == 1 else heapq.merge(*slices, key=_entry_key)
+        return [entry.seance for entry in entries if language_key is None or entry.language == language_key]
+
+    def counts(self, start: datetime, end: datetime, boundaries=()) -> dict:
+        """
+        Seances from `start` to `end`: their total, their number per language
+        (UNKNOWN_LANGUAGE for those without one), and per cinema
+        {cinema ID: (name, city, counts between consecutive `boundaries`)}.
+        Counts by cinema are bisects; only the languages read the seances of the period.
+        """
+        total = 0
+        languages = {}
+        cinemas = {}
+        with self._lock:
+            for schedules in self._cities.values():
+                for cinema_id, schedule in schedules.items():
+                    entries = schedule.between(start, end)
+                    if not entries:
+                        continue
+                    total += len(entries)
+                    for entry in entries:
+                        language = entry.seance.language or UNKNOWN_LANGUAGE
+                        languages[language] = languages.get(language, 0) + 1
+                    positions = [bisect_left(schedule.keys, (boundary,)) for boundary in boundaries]
+                    cinemas[cinema_id] = (
+                        entries[0].seance.cinema_name,
+                        entries[0].seance.city,
+                        [high - low for low, high in zip(positions, positions[1:])],
+                    )
+        return {"total": total, "languages": languages, "cinemas": cinemas}
+
+
+def _entry_key(entry: _Entry):
+    return (entry.seance.date_time, entry.seance_id)
+
+
+def _as_datetime(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    return datetime.fromisoformat(value)
+
+
+def _fetch(condition: str = "", params=()) -> list:
+    with connect_mysql.borrow() as conn:
+        rows = connect_mysql.get_query(conn, QUERY_UPCOMING.format(condition=condition), params)
+    if rows is None:
+        raise RuntimeError("Schedule index query failed")
+    return rows
+
+
+_index = None
+_reload_lock = threading.Lock()
+
+
+def get_index() -> ScheduleIndex:
+    """
+    The index of this process, loaded on first use and reloaded when older than SCHEDULE_INDEX_TTL.
+    Only the first load makes the callers wait: while one thread reloads an expired
+    index, the others keep being served the current one.
+    """
+    index = _index
+    if index is not None:
+        if time.monotonic() - index.loaded_at < Config.SCHEDULE_INDEX_TTL:
+            return index
+        if not _reload_lock.acquire(blocking=False):
+            return index
+        try:
+            return _reload_unless_done(index)
+        finally:
+            _reload_lock.release()
+    with _reload_lock:
+        return _reload_unless_done(None)
+
+
+def _reload_unless_done(index) -> ScheduleIndex:
+    """Reload `index` (the one found missing or expired), unless another thread did meanwhile"""
+    current = _index
+    if current is not None and current is not index:
+        return current
+    return reload()
+
+
+def reload() -> ScheduleIndex:
+    """Load the index again from the database, keeping the updates made during the load"""
+    global _index  # pylint: disable=global-statement
+    previous = _index
+    if previous is not None:
+        previous.start_journal()
+    start = time.perf_counter()
+    try:
+        index = ScheduleIndex(_fetch())
+    except Exception:
+        if previous is not None:
+            previous.replace_by(None)
+        raise
+    if previous is not None:
+        previous.replace_by(index)
+    _index = index
+    logger.debug("Schedule index loaded: %d seances in %.1f ms", len(index), (time.perf_counter() - start) * 1000)
+    return index
+
+
+def seances_created(seance_ids):
+    """Index new seances (only those still upcoming are kept)"""
+    if _index is None or not seance_ids:
+        return
+    placeholders = ", ".join(["%s"] * len(seance_ids))
+    try:
+        rows = _fetch(f"AND s.se_id_seance IN ({placeholders})", tuple(seance_ids))
+    except RuntimeError:
+        # The seances are saved: load the whole index again on the next lookup
+        logger.warning("Schedule index update failed, it will be reloaded")
+        clear()
+        return
+    _index.add_rows(rows)
+
+
+def seance_deleted(seance_id):
+    """Drop a deleted seance"""
+    if _index is not None:
+        _index.remove([seance_id])
+
+
+def movie_deleted(movie_id):
+    """Drop the seances of a deleted movie"""
+    if _index is not None:
+        _index.remove_movie(movie_id)
+
+
+def clear():
+    """Forget the index, the next lookup loads it again"""
+    global _index  # pylint: disable=global-statement
+    _index = None
@@ -2,66 +2,160 @@
 Docstring for Ehtiens-SME.ethiens_sme.service.seance_service
 """
 
+import csv
+from datetime import datetime
 from ethiens_sme import connect_mysql
+from ethiens_sme.config import Config
 from ethiens_sme.model.seance_model import SeanceModel
+from ethiens_sme.service import place_index, report_service, schedule_index, stats_service
+from ethiens_sme.utils import pagination, response_cache
+from ethiens_sme.utils.exception.exceptions import DatabaseUnavailableException, InvalidInputException
+from ethiens_sme.utils.exception.seance_exceptions import CityNotFoundException, InvalidSeancesException
+
+# {filters}: the conditions of CITY_FILTERS in use, each preceded by AND
+QUERY_CITY_SEANCES = """
+    SELECT
+        m.mo_title AS Titre_Film,
+        s.se_date_time AS Date_Heure,
+        s.se_room AS Salle,
+        s.se_language AS Langue,
+        c.ci_cinema_name AS Cinema,
+        c.ci_city AS Ville
+    FROM
+        et_seance AS s
+    JOIN
+        et_cinema AS c ON s.ci_id_cinema = c.ci_id_cinema
+    JOIN
+        et_movie AS m ON s.mo_id_movie = m.mo_id_movie
+    WHERE
+        c.ci_city = %s AND s.se_date_time >= NOW() {filters}
+    ORDER BY s.se_date_time, s.se_id_seance;
+"""
+CITY_FILTERS = {
+    "date_from": "s.se_date_time >= %s",
+    # The whole last day is included
+    "date_to": "s.se_date_time < %s + INTERVAL 1 DAY",
+    "language": "s.se_language = %s",
+}
+
+QUERY_INSERT_SEANCE = """
+    INSERT INTO et_seance (
+        se_date_time,
+        se_room,
+        se_language,
+        mo_id_movie,
+        ci_id_cinema
+    ) VALUES (%s, %s, %s, %s, %s);
+"""
 
+# A multi-row INSERT gets consecutive IDs unless another session inserts
+# at the same time with innodb_autoinc_lock_mode = 2: the rows are checked.
+QUERY_CHECK_SEANCE_IDS = """
+    SELECT se_date_time, mo_id_movie, ci_id_cinema FROM et_seance
+    WHERE se_id_seance BETWEEN %s AND %s
+    ORDER BY se_id_seance;
+"""
 
-def get_seance_info_by_city_name(city_name) -> SeanceModel:
-    """Get car information by seance name"""
-    query = """
-        SELECT
-            m.mo_title AS Titre_Film,
-            s.se_date_time AS Date_Heure,
-            s.se_room AS Salle,
-            s.se_language AS Langue,
-            c.ci_cinema_name AS Cinema,
-            c.ci_city AS Ville
-        FROM
-            et_seance AS s
-        JOIN
-            et_cinema AS c ON s.ci_id_cinema = c.ci_id_cinema
-        JOIN
-            et_movie AS m ON s.mo_id_movie = m.mo_id_movie
-        WHERE
-            c.ci_city = %s;
-    """
-    params = (city_name,)
-    conn = connect_mysql.connect()
-    results = connect_mysql.get_query(conn, query, params, True)
-    connect_mysql.disconnect(conn)
-
-    if not results:
-        return []
+# {table} and {column} are trusted constants, {placeholders} one "%s" per ID
+QUERY_EXISTING_IDS = "SELECT {column} FROM {table} WHERE {column} IN ({placeholders});"
+
+_SELECT_UPCOMING = """
+    SELECT
+        s.se_id_seance,
+        m.mo_id_movie,
+        m.mo_title AS Titre_Film,
+        m.mo_poster AS Affiche_Film,
+        s.se_date_time AS Date_Heure,
+        s.se_room AS Salle,
+        s.se_language AS Langue,
+        c.ci_id_cinema,
+        c.ci_cinema_name AS Cinema,
+        c.ci_city AS Ville
+    FROM
+        et_seance AS s
+    JOIN
+        et_cinema AS c ON s.ci_id_cinema = c.ci_id_cinema
+    JOIN
+        et_movie AS m ON s.mo_id_movie = m.mo_id_movie
+    WHERE
+        s.se_date_time >= NOW()
+"""
+QUERY_UPCOMING_PAGE = _SELECT_UPCOMING + """
+    ORDER BY
+        s.se_date_time ASC, s.se_id_seance ASC
+    LIMIT %s OFFSET %s;
+"""
+# Page after a cursor: seeks on (se_date_time, se_id_seance)
+QUERY_UPCOMING_AFTER = _SELECT_UPCOMING + """
+        AND (s.se_date_time > %s OR (s.se_date_time = %s AND s.se_id_seance > %s))
+    ORDER BY
+        s.se_date_time ASC, s.se_id_seance ASC
+    LIMIT %s;
+"""
 
-    seances_list = []
+QUERY_CINEMA_ROOMS = "SELECT DISTINCT se_room FROM et_seance WHERE ci_id_cinema = %s;"
+QUERY_CINEMAS = "SELECT ci_id_cinema, ci_cinema_name, ci_city FROM et_cinema ORDER BY ci_cinema_name;"
+QUERY_CINEMA = "SELECT * FROM et_cinema WHERE ci_id_cinema = %s;"
+QUERY_DELETE_SEANCE = "DELETE FROM et_seance WHERE se_id_seance = %s;"
+
+QUERY_CINEMA_SEANCES = """
+    SELECT
+        m.mo_id_movie,
+        m.mo_title AS Titre_Film,
+        m.mo_poster AS Affiche_Film,
+        s.se_date_time AS Date_Heure,
+        s.se_room AS Salle,
+        s.se_language AS Langue
+    FROM
+        et_seance AS s
+    JOIN
+        et_movie AS m ON s.mo_id_movie = m.mo_id_movie
+    WHERE
+        s.ci_id_cinema = %s
+        AND s.se_date_time >= NOW()
+    ORDER BY
+        s.se_date_time ASC;
+"""
 
-    for row in results:
-        seance = SeanceModel(
-            movie_title=row["Titre_Film"],
-            date_time=row["Date_Heure"],
-            room=row["Salle"],
-            language=row["Langue"],
-            cinema_name=row["Cinema"],
-            city=row["Ville"],
-        )
-        seances_list.append(seance)
 
-    return seances_list
+def get_seance_info_by_city_name(city_name, date_from=None, date_to=None, language=None) -> list:
+    """
+    Get the upcoming seances of a city, sorted by date.
+    The city name is matched ignoring case, accents and punctuation; a name no
+    city has raises CityNotFoundException with the cities it may designate.
+    date_from/date_to (dates, both days included) and language narrow the result.
+    Served by the schedule index unless SCHEDULE_INDEX_ENABLED is false; an
+    index that cannot be loaded raises DatabaseUnavailableException.
+    """
+    try:
+        resolved = place_index.resolve_city(city_name)
+        if resolved is None:
+            raise CityNotFoundException(place_index.suggest_cities(city_name))
+        city_name = resolved
+        if Config.SCHEDULE_INDEX_ENABLED:
+            return schedule_index.get_index().seances(city_name, date_from, date_to, language)
+    except RuntimeError as error:
+        # The place or schedule index query failed
+        raise DatabaseUnavailableException() from error
+
+    filters = {"date_from": date_from, "date_to": date_to, "language": language}
+    params = [city_name]
+    conditions = []
+    for name, value in filters.items():
+        if value:
+            conditions.append(f"AND {CITY_FILTERS[name]}")
+            params.append(value)
+    query = QUERY_CITY_SEANCES.format(filters=" ".join(conditions))
+    columns = ("Titre_Film", "Date_Heure", "Salle", "Langue", "Cinema", "Ville")
+    with connect_mysql.borrow() as conn:
+        seances_list = connect_mysql.get_query_mapped(conn, query, tuple(params), columns, SeanceModel)
+
+    return seances_list or []
 
 
 def create_seance(data: dict) -> int:
     """Create a new seance"""
 
-    query = """
-        INSERT INTO et_seance (
-            se_date_time,
-            se_room,
-            se_language,
-            mo_id_movie,
-            ci_id_cinema
-        ) VALUES (%s, %s, %s, %s, %s);
-    """
-
     params = (
         data.get("date_time"),  # Format 'YYYY-MM-DD HH:MM:SS'
         data.get("room"),
@@ -70,68 +164,162 @@ def create_seance(data: dict) -> int:
         data.get("cinema_id"),
     )
 
-    conn = connect_mysql.connect()
-    try:
-        connect_mysql.execute_command(conn, query, params)
-
-        res_id = connect_mysql.get_query(conn, "SELECT LAST_INSERT_ID() as id;", None, True)
-        new_id = res_id[0]["id"]
-
-        return new_id
-    finally:
-        connect_mysql.disconnect(conn)
-
-
-def get_upcoming_seances(limit: int = 20, offset: int = 0) -> list:
-    """Get all upcoming seances with pagination"""
-    query = """
-        SELECT
-            s.se_id_seance,
-            m.mo_id_movie,
-            m.mo_title AS Titre_Film,
-            m.mo_poster AS Affiche_Film,
-            s.se_date_time AS Date_Heure,
-            s.se_room AS Salle,
-            s.se_language AS Langue,
-            c.ci_id_cinema,
-            c.ci_cinema_name AS Cinema,
-            c.ci_city AS Ville
-        FROM
-            et_seance AS s
-        JOIN
-            et_cinema AS c ON s.ci_id_cinema = c.ci_id_cinema
-        JOIN
-            et_movie AS m ON s.mo_id_movie = m.mo_id_movie
-        WHERE
-            s.se_date_time >= NOW()
-        ORDER BY
-            s.se_date_time ASC, s.se_id_seance ASC
-        LIMIT %s OFFSET %s;
-    """
-    conn = connect_mysql.connect()
-    results = connect_mysql.get_query(conn, query, (limit, offset), True)
-    connect_mysql.disconnect(conn)
+    with connect_mysql.unit_of_work() as conn:
+        new_id = connect_mysql.execute_command(conn, QUERY_INSERT_SEANCE, params)
+        report_service.mark_seances(conn, [(data.get("cinema_id"), data.get("date_time"))])
+
+    response_cache.invalidate(response_cache.SEANCES)
+    schedule_index.seances_created([new_id])
+    return new_id
+
+
+class _NonConsecutiveIdsError(Exception):
+    """The IDs generated by a multi-row INSERT were interleaved with another session's"""
 
-    if not results:
+
+def create_seances(rows: list) -> list:
+    """
+    Create a whole schedule of seances in one transaction.
+    Every row is validated first (fields, and existence of the movies and cinemas
+    in one query each); nothing is written if any row is invalid, and
+    InvalidSeancesException lists the errors by row index.
+    The rows are then written with one multi-row INSERT. Returns the new IDs, in order.
+    """
+    if not rows:
         return []
 
-    seances_list = []
-    for row in results:
-        # Create a dictionary that mimics the structure plus the image
-        seance = {
-            "seance_id": row["se_id_seance"],
-            "movie_id": row["mo_id_movie"],
-            "movie_title": row["Titre_Film"],
-            "movie_poster": row.get("Affiche_Film"),
-            "date_time": row["Date_Heure"],
-            "room": row["Salle"],
-            "language": row["Langue"],
-            "cinema_id": row["ci_id_cinema"],
-            "cinema_name": row["Cinema"],
-            "city": row["Ville"]
-        }
-        seances_list.append(seance)
-    return seances_list
+    with connect_mysql.unit_of_work() as conn:
+        params = _validate_seances(conn, rows)
+        try:
+            with connect_mysql.transaction(conn):
+                new_ids = _insert_seances(conn, params)
+        except _NonConsecutiveIdsError:
+            # Another session took IDs in the middle of the batch: its savepoint was
+            # rolled back, insert it again row by row to get each ID for sure.
+            new_ids = [connect_mysql.execute_command(conn, QUERY_INSERT_SEANCE, row_params) for row_params in params]
+        report_service.mark_seances(conn, [(row_params[4], row_params[0]) for row_params in params])
+
+    response_cache.invalidate(response_cache.SEANCES)
+    schedule_index.seances_created(new_ids)
+    return new_ids
+
+
+def _insert_seances(conn, params: list) -> list:
+    first_id = connect_mysql.execute_many(conn, QUERY_INSERT_SEANCE, params)
+    new_ids = list(range(first_id, first_id + len(params)))
+
+    inserted = connect_mysql.get_query(conn, QUERY_CHECK_SEANCE_IDS, (new_ids[0], new_ids[-1]))
+    if [tuple(row) for row in inserted or []] != [(p[0], p[3], p[4]) for p in params]:
+        raise _NonConsecutiveIdsError()
+    return new_ids
+
+
+def _validate_seances(conn, rows: list) -> list:
+    """Check every row of a schedule and return their INSERT parameters"""
+    errors = []
+    params = []
+    for index, row in enumerate(rows):
+        try:
+            params.append(_seance_params(row))
+        except (KeyError, TypeError, ValueError) as error:
+            errors.append({"row": index, "message": str(error)})
+
+    if not errors:
+        missing_movies = _missing_ids(conn, "et_movie", "mo_id_movie", {p[3] for p in params})
+        missing_cinemas = _missing_ids(conn, "et_cinema", "ci_id_cinema", {p[4] for p in params})
+        for index, row_params in enumerate(params):
+            if row_params[3] in missing_movies:
+                errors.append({"row": index, "message": f"Movie {row_params[3]} not found"})
+            if row_params[4] in missing_cinemas:
+                errors.append({"row": index, "message": f"Cinema {row_params[4]} not found"})
+
+    if errors:
+        raise InvalidSeancesException(errors)
+    return params
+
+
+def _seance_params(row: dict) -> tuple:
+    """INSERT parameters of one schedule row, raises ValueError if it is invalid"""
+    if not isinstance(row, dict):
+        raise ValueError("An object is expected")
+    for field in ("date_time", "movie_id", "cinema_id"):
+        if row.get(field) in (None, ""):
+            raise ValueError(f"Missing field {field}")
+
+    # DATETIME columns have no fractional seconds
+    date_time = datetime.fromisoformat(str(row["date_time"])).replace(microsecond=0)
+    return (
+        date_time,
+        row.get("room") or None,
+        row.get("language") or None,
+        int(row["movie_id"]),
+        int(row["cinema_id"]),
+    )
+
+
+def _missing_ids(conn, table: str, column: str, ids: set) -> set:
+    """IDs among `ids` with no row in `table` (table and column are trusted constants)"""
+    placeholders = ", ".join(["%s"] * len(ids))
+    query = QUERY_EXISTING_IDS.format(column=column, table=table, placeholders=placeholders)
+    results = connect_mysql.get_query(conn, query, tuple(ids))
+    return ids - {row[0] for row in results or []}
+
+
+def parse_schedule_csv(stream) -> list:
+    """
+    Read a CSV schedule file into seance rows.
+    Expected columns: date_time, room, language, movie_id, cinema_id.
+    """
+    return [dict(row) for row in csv.DictReader(stream)]
+
+
+# Columns of the seance listings, in the order of the keys of their dicts
+_UPCOMING_COLUMNS = (
+    "se_id_seance", "mo_id_movie", "Titre_Film", "Affiche_Film", "Date_Heure", "Salle", "Langue",
+    "ci_id_cinema", "Cinema", "Ville",
+)
+_upcoming_seance = connect_mysql.dict_factory(
+    "seance_id", "movie_id", "movie_title", "movie_poster", "date_time", "room", "language",
+    "cinema_id", "cinema_name", "city",
+)
+_CINEMA_SEANCE_COLUMNS = ("mo_id_movie", "Titre_Film", "Affiche_Film", "Date_Heure", "Salle", "Langue")
+_cinema_seance = connect_mysql.dict_factory("movie_id", "movie_title", "movie_poster", "date_time", "room", "language")
+
+
+def get_upcoming_seances(limit: int = 20, offset: int = 0, cursor: str = None) -> list:
+    """
+    Get all upcoming seances with pagination.
+    With a `cursor` (see upcoming_seances_cursor) the page starts right after the
+    last seance of the previous page and `offset` is ignored: MySQL seeks on
+    (se_date_time, se_id_seance) instead of scanning and dropping skipped rows.
+    """
+    if cursor:
+        last_date_time, last_id = _decode_seance_cursor(cursor)
+        query = QUERY_UPCOMING_AFTER
+        params = (last_date_time, last_date_time, last_id, limit)
+    else:
+        query = QUERY_UPCOMING_PAGE
+        params = (limit, offset)
+
+    with connect_mysql.borrow() as conn:
+        seances_list = connect_mysql.get_query_mapped(conn, query, params, _UPCOMING_COLUMNS, _upcoming_seance)
+    return seances_list or []
+
+
+def upcoming_seances_cursor(seances: list, limit: int) -> str:
+    """Cursor of the page following `seances`, or None when it was the last page"""
+    if not seances or len(seances) < limit:
+        return None
+    last = seances[-1]
+    return pagination.encode_cursor(last["date_time"], last["seance_id"])
+
+
+def _decode_seance_cursor(cursor: str) -> tuple:
+    last_date_time, last_id = pagination.decode_cursor(cursor, 2)
+    try:
+        return datetime.fromisoformat(last_date_time), int(last_id)
+    except (TypeError, ValueError) as error:
+        raise InvalidInputException("INVALID_CURSOR") from error
 
 
 def get_rooms_by_cinema(cinema_id: int) -> list:
@@ -145,10 +333,8 @@ def get_rooms_by_cinema(cinema_id: int) -> list:
     def natural_sort_key(s):
         return [int(text) if text.isdigit() else text.lower() for text in re.split('([0-9]+)', s)]
 
-    query = "SELECT DISTINCT se_room FROM et_seance WHERE ci_id_cinema = %s;"
-    conn = connect_mysql.connect()
-    try:
-        results = connect_mysql.get_query(conn, query, (cinema_id,), True)
+    with connect_mysql.borrow() as conn:
+        results = connect_mysql.get_query(conn, QUERY_CINEMA_ROOMS, (cinema_id,), True)
         rooms = [row['se_room'] for row in results] if results else []
         
         # Merge with default rooms to ensure the dropdown isn't empty for new cinemas
@@ -159,109 +345,45 @@ def get_rooms_by_cinema(cinema_id: int) -> list:
         all_rooms.sort(key=natural_sort_key)
         
         return all_rooms
-    finally:
-        connect_mysql.disconnect(conn)
 
 
 def get_all_cinemas() -> list:
     """Get all cinemas simple list"""
-    query = "SELECT ci_id_cinema, ci_cinema_name, ci_city FROM et_cinema ORDER BY ci_cinema_name;"
-    conn = connect_mysql.connect()
-    try:
-        results = connect_mysql.get_query(conn, query, None, True)
+    with connect_mysql.borrow() as conn:
+        results = connect_mysql.get_query(conn, QUERY_CINEMAS, None, True)
         return results if results else []
-    finally:
-        connect_mysql.disconnect(conn)
 
 
 def delete_seance(seance_id: int):
     """Delete a seance by ID"""
-    query = "DELETE FROM et_seance WHERE se_id_seance = %s;"
-    conn = connect_mysql.connect()
-    try:
-        connect_mysql.execute_command(conn, query, (seance_id,))
-    finally:
-        connect_mysql.disconnect(conn)
+    with connect_mysql.unit_of_work() as conn:
+        report_service.mark_seance_id(conn, seance_id)
+        connect_mysql.execute_command(conn, QUERY_DELETE_SEANCE, (seance_id,))
+
+    response_cache.invalidate(response_cache.SEANCES)
+    schedule_index.seance_deleted(seance_id)
 
 
 def get_cinema_by_id(cinema_id: int) -> dict:
     """Get cinema details by ID"""
-    query = "SELECT * FROM et_cinema WHERE ci_id_cinema = %s;"
-    conn = connect_mysql.connect()
-    try:
-        results = connect_mysql.get_query(conn, query, (cinema_id,), True)
+    with connect_mysql.borrow() as conn:
+        results = connect_mysql.get_query(conn, QUERY_CINEMA, (cinema_id,), True)
         if results:
             return results[0]
         return None
-    finally:
-        connect_mysql.disconnect(conn)
 
 def get_dashboard_stats() -> dict:
-    """Get statistics for the dashboard"""
-    conn = connect_mysql.connect()
-    try:
-        # Count Movies
-        res_mov = connect_mysql.get_query(conn, "SELECT COUNT(*) as c FROM et_movie", None, True)
-        count_movies = res_mov[0]['c'] if res_mov else 0
-        
-        # Count Cinemas
-        res_cin = connect_mysql.get_query(conn, "SELECT COUNT(*) as c FROM et_cinema", None, True)
-        count_cinemas = res_cin[0]['c'] if res_cin else 0
-        
-        # Count Seances (This week? Or total upcoming? Dashboard says "Séances cette semaine")
-        # Let's do total upcoming for now, or specific range. 
-        # "Séances cette semaine" implies range.
-        # Let's just do total upcoming to be safe/simple, or range NOW to NOW+7 days.
-        query_seance = "SELECT COUNT(*) as c FROM et_seance WHERE se_date_time BETWEEN NOW() AND DATE_ADD(NOW(), INTERVAL 7 DAY)"
-        res_sea = connect_mysql.get_query(conn, query_seance, None, True)
-        count_seances = res_sea[0]['c'] if res_sea else 0
-        
-        return {
-            "movies": count_movies,
-            "cinemas": count_cinemas,
-            "seances": count_seances
-        }
-    finally:
-        connect_mysql.disconnect(conn)
+    """Get statistics for the dashboard (see stats_service)"""
+    return stats_service.get_dashboard_stats()
+
 
 def get_seances_by_cinema_id(cinema_id: int) -> list:
     """Get upcoming seances for a specific cinema"""
-    query = """
-        SELECT
-            m.mo_id_movie,
-            m.mo_title AS Titre_Film,
-            m.mo_poster AS Affiche_Film,
-            s.se_date_time AS Date_Heure,
-            s.se_room AS Salle,
-            s.se_language AS Langue
-        FROM
-            et_seance AS s
-        JOIN
-            et_movie AS m ON s.mo_id_movie = m.mo_id_movie
-        WHERE
-            s.ci_id_cinema = %s
-            AND s.se_date_time >= NOW()
-        ORDER BY
-            s.se_date_time ASC;
-    """
-    conn = connect_mysql.connect()
-    try:
-        results = connect_mysql.get_query(conn, query, (cinema_id,), True)
-        seances_list = []
-        if results:
-            for row in results:
-                seance = {
-                    "movie_id": row["mo_id_movie"],
-                    "movie_title": row["Titre_Film"],
-                    "movie_poster": row.get("Affiche_Film"),
-                    "date_time": row["Date_Heure"],
-                    "room": row["Salle"],
-                    "language": row["Langue"]
-                }
-                seances_list.append(seance)
-        return seances_list
-    finally:
-        connect_mysql.disconnect(conn)
+    with connect_mysql.borrow() as conn:
+        seances_list = connect_mysql.get_query_mapped(
+            conn, QUERY_CINEMA_SEANCES, (cinema_id,), _CINEMA_SEANCE_COLUMNS, _cinema_seance
+        )
+    return seances_list or []
 
 
 
@@ -0,0 +1,174 @@
+"""
+Dashboard statistics.
+STATS_MODE "query" reads the movie and cinema counts in one round-trip. In
+"counters" mode they are kept in memory, updated by the service writes and
+reconciled with the database every STATS_RECONCILE_INTERVAL seconds (the
+writes of other processes, like the RQ worker imports, show up at the next one).
+Either way, the seances of the next 7 days and their breakdowns per day,
+cinema and language come from the schedule index, without querying et_seance.
+With the index disabled, they are grouped by MySQL, in the same query as the
+counts in "query" mode.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from ethiens_sme import connect_mysql
+from ethiens_sme.config import Config
+from ethiens_sme.service import schedule_index
+
+logger = logging.getLogger(__name__)
+
+DAYS = 7
+
+QUERY_COUNTS = """
+    SELECT
+        (SELECT COUNT(*) FROM et_movie) AS movies,
+        (SELECT COUNT(*) FROM et_cinema) AS cinemas;
+"""
+
+_BREAKDOWN = """
+    SELECT
+        s.ci_id_cinema, c.ci_cinema_name, c.ci_city,
+        DATE(s.se_date_time) AS se_day, s.se_language, COUNT(*) AS seances
+    FROM et_seance AS s
+    JOIN et_cinema AS c ON s.ci_id_cinema = c.ci_id_cinema
+    WHERE s.se_date_time >= NOW() AND s.se_date_time < %s
+    GROUP BY s.ci_id_cinema, c.ci_cinema_name, c.ci_city, DATE(s.se_date_time), s.se_language
+"""
+QUERY_BREAKDOWN = f"{_BREAKDOWN};"
+# The counts on every row of the breakdown (on a row of NULLs without any seance), in one round-trip
+QUERY_COUNTS_AND_BREAKDOWN = f"""
+    SELECT counts.movies, counts.cinemas, breakdown.*
+    FROM (
+        SELECT
+            (SELECT COUNT(*) FROM et_movie) AS movies,
+            (SELECT COUNT(*) FROM et_cinema) AS cinemas
+    ) AS counts
+    LEFT JOIN ({_BREAKDOWN}) AS breakdown ON TRUE;
+"""
+
+_counters = None  # {"movies": int, "cinemas": int}, None until the first reconciliation
+_reconciled_at = 0.0
+_lock = threading.Lock()
+
+
+def get_counts() -> dict:
+    """Number of movies and of cinemas, in one query"""
+    with connect_mysql.borrow() as conn:
+        rows = connect_mysql.get_query(conn, QUERY_COUNTS, None, True)
+    if not rows:
+        return {"movies": 0, "cinemas": 0}
+    return {name: int(rows[0][name] or 0) for name in ("movies", "cinemas")}
+
+
+def get_counts_and_breakdown(end: datetime) -> tuple:
+    """Number of movies and of cinemas, and the rows of QUERY_BREAKDOWN up to `end`, in one query"""
+    with connect_mysql.borrow() as conn:
+        rows = connect_mysql.get_query(conn, QUERY_COUNTS_AND_BREAKDOWN, (end,))
+    if not rows:
+        return {"movies": 0, "cinemas": 0}, []
+    counts = {"movies": int(rows[0][0] or 0), "cinemas": int(rows[0][1] or 0)}
+    return counts, [row[2:] for row in rows if row[2] is not None]
+
+
+def reconcile() -> dict:
+    """Reset the in-memory counters from the database"""
+    global _counters, _reconciled_at  # pylint: disable=global-statement
+    counts = get_counts()
+    with _lock:
+        if _counters is not None and _counters != counts:
+            logger.info("Stats counters reconciled: %s -> %s", _counters, counts)
+        _counters = counts
+        _reconciled_at = time.monotonic()
+    return counts
+
+
+def _counted() -> dict:
+    """Counters of movies and cinemas, reconciled first when due"""
+    if _counters is None or time.monotonic() - _reconciled_at >= Config.STATS_RECONCILE_INTERVAL:
+        reconcile()
+    with _lock:
+        return dict(_counters)
+
+
+def movies_created(count: int):
+    """Account new movies in the counters"""
+    _add("movies", count)
+
+
+def movie_deleted():
+    """Account a deleted movie in the counters"""
+    _add("movies", -1)
+
+
+def _add(name: str, count: int):
+    with _lock:
+        if _counters is not None:
+            _counters[name] = max(0, _counters[name] + count)
+
+
+def _breakdown(now: datetime, end: datetime, rows=None) -> dict:
+    """
+    Seances from now to `end`: per day for each cinema, per language, and their total.
+    `rows` are those of QUERY_BREAKDOWN, when already read.
+    """
+    days = [now.date() + timedelta(days=offset) for offset in range(DAYS)]
+    if rows is None and Config.SCHEDULE_INDEX_ENABLED:
+        boundaries = [now] + [datetime.combine(day, datetime.min.time()) for day in days[1:]] + [end]
+        counts = schedule_index.get_index().counts(now, end, boundaries)
+        cinemas = [
+            {"cinema_id": cinema_id, "cinema_name": name, "city": city, "per_day": per_day}
+            for cinema_id, (name, city, per_day) in counts["cinemas"].items()
+        ]
+        total, languages = counts["total"], counts["languages"]
+    else:
+        if rows is None:
+            with connect_mysql.borrow() as conn:
+                rows = connect_mysql.get_query(conn, QUERY_BREAKDOWN, (end,)) or []
+        by_cinema = {}
+        languages = {}
+        total = 0
+        for cinema_id, name, city, day, language, count in rows:
+            cinema = by_cinema.setdefault(
+                cinema_id, {"cinema_id": cinema_id, "cinema_name": name, "city": city, "per_day": [0] * DAYS}
+            )
+            offset = (day - days[0]).days
+            if 0 <= offset < DAYS:
+                cinema["per_day"][offset] += count
+            language = language or schedule_index.UNKNOWN_LANGUAGE
+            languages[language] = languages.get(language, 0) + count
+            total += count
+        cinemas = list(by_cinema.values())
+
+    cinemas.sort(key=lambda cinema: (cinema["city"] or "", cinema["cinema_name"] or "", cinema["cinema_id"]))
+    return {
+        "seances": total,
+        "breakdown": {
+            "days": [day.isoformat() for day in days],
+            "cinemas": cinemas,
+            "languages": dict(sorted(languages.items(), key=lambda item: (-item[1], item[0]))),
+        },
+    }
+
+
+def get_dashboard_stats() -> dict:
+    """
+    Counts of movies, cinemas and seances from now to the end of the 7th day,
+    with the seances per day and cinema ("per_day" follows "days", today first)
+    and per language ("" for the seances without one).
+    """
+    now = datetime.now()
+    end = datetime.combine(now.date() + timedelta(days=DAYS), datetime.min.time())
+    if Config.STATS_MODE == "counters":
+        stats = _counted()
+    elif Config.SCHEDULE_INDEX_ENABLED:
+        stats = get_counts()
+    else:
+        stats, rows = get_counts_and_breakdown(end)
+        stats.update(_breakdown(now, end, rows))
+        return stats
+    stats.update(_breakdown(now, end))
+    return stats
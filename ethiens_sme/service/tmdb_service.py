@@ -0,0 +1,149 @@
+"""
+Client of the TMDB API.
+Calls go through one pooled keep-alive session with retries, and results are
+cached on disk (see Config.TMDB_CACHE_*). Point TMDB_BASE_URL at a local fake
+server to run without the real API.
+"""
+
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from ethiens_sme.config import Config
+from ethiens_sme.utils import metrics
+from ethiens_sme.utils.sqlite_cache import SqliteCache
+
+_session = None
+_cache = None
+_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Process-wide HTTP session to TMDB, keeping connections alive between calls"""
+    global _session  # pylint: disable=global-statement
+    if _session is None:
+        with _lock:
+            if _session is None:
+                retry = Retry(
+                    total=Config.TMDB_RETRIES,
+                    backoff_factor=Config.TMDB_BACKOFF,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=("GET",),
+                    respect_retry_after_header=True,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=Config.TMDB_POOL_SIZE, max_retries=retry
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def get_cache() -> SqliteCache:
+    """On-disk cache of the TMDB results"""
+    global _cache  # pylint: disable=global-statement
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = SqliteCache(Config.TMDB_CACHE_PATH, Config.TMDB_CACHE_MAX_ENTRIES)
+    return _cache
+
+
+def _get(path: str, params: dict, operation: str) -> dict:
+    """GET a TMDB endpoint and return its JSON body, timed under `operation`"""
+    params = dict(params, api_key=Config.TMDB_API_KEY, language="fr-FR")
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        response = get_session().get(f"{Config.TMDB_BASE_URL}{path}", params=params, timeout=Config.TMDB_TIMEOUT)
+        outcome = str(response.status_code)
+        response.raise_for_status()
+        return response.json()
+    finally:
+        metrics.TMDB_LATENCY.observe(time.perf_counter() - start, operation, outcome)
+
+
+def _cached(cache_key: str, operation: str):
+    """Value of the disk cache, counted as a hit or a miss"""
+    value = get_cache().get(cache_key)
+    metrics.CACHE_REQUESTS.inc("tmdb", operation, "miss" if value is None else "hit")
+    return value
+
+
+def search_movie(query: str) -> list:
+    """Search movies by title, returns [{id, title, release_date}, ...]"""
+    cache_key = f"search:{query.strip().casefold()}"
+    results = _cached(cache_key, "search")
+    if results is not None:
+        return results
+
+    data = _get("/search/movie", {"query": query}, "search")
+
+    results = []
+    for item in data.get("results", []):
+        results.append({"id": item.get("id"), "title": item.get("title"), "release_date": item.get("release_date")})
+
+    get_cache().set(cache_key, results, Config.TMDB_CACHE_TTL_SEARCH)
+    return results
+
+
+def get_movie_details(tmdb_id: str) -> dict:
+    """Details of a movie with its cast and director"""
+    cache_key = f"movie:{tmdb_id}"
+    movie_data = _cached(cache_key, "details")
+    if movie_data is not None:
+        return movie_data
+
+    data = _get(f"/movie/{tmdb_id}", {"append_to_response": "credits"}, "details")
+
+    movie_data = {}
+    movie_data["title"] = data.get("title")
+    movie_data["overview"] = data.get("overview")
+    movie_data["release_date"] = data.get("release_date")
+    movie_data["runtime"] = data.get("runtime")
+    movie_data["poster_path"] = data.get("poster_path")
+
+    movie_data["production_countries"] = data.get("production_countries", [])
+    movie_data["production_companies"] = data.get("production_companies", [])
+
+    credits = data.get("credits", {})
+    movie_data["credits"] = {"cast": credits.get("cast", [])}
+
+    # Extract Director
+    crew = credits.get("crew", [])
+    for member in crew:
+        if member.get("job") == "Director":
+            movie_data["director"] = member.get("name")
+            break
+
+    get_cache().set(cache_key, movie_data, Config.TMDB_CACHE_TTL_DETAILS)
+    return movie_data
+
+
+def to_movie_data(details: dict, cast_limit: int = None) -> dict:
+    """
+    Turn TMDB movie details into the payload expected by movie_service.create_movie,
+    the same way the "add movie" page fills its form.
+    """
+    poster = details.get("poster_path")
+    if poster and not poster.startswith("http"):
+        poster = f"https://image.tmdb.org/t/p/original{poster}"
+
+    countries = details.get("production_countries") or []
+    cast = details.get("credits", {}).get("cast", [])
+    if cast_limit is not None:
+        cast = cast[:cast_limit]
+
+    return {
+        "title": details.get("title"),
+        "date_publication": details.get("release_date") or None,
+        "length_minutes": details.get("runtime") or 0,
+        "synopsis": details.get("overview"),
+        "poster": poster,
+        "country": countries[0].get("name") if countries else None,
+        "producer": details.get("director"),
+        "actor_names": [member.get("name") for member in cast if member.get("name")],
+    }
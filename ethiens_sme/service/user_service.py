@@ -12,6 +12,8 @@ from ethiens_sme.utils.exception.user_exceptions import (
     PasswordIncorrectException,
 )
 
+QUERY_USER_BY_LOGIN = "SELECT * FROM et_user WHERE us_pseudo = %s"
+
 
 def authenticate(login, password) -> UserModel:
     """authenticate the user"""
@@ -31,12 +33,10 @@ def authenticate(login, password) -> UserModel:
 
 def get_user_by_login(login) -> UserModel:
     """Get user infos from db using the pseudo as login"""
-    conn = connect_mysql.connect()
-    try:
-        query = "SELECT * FROM et_user WHERE us_pseudo = %s"
+    with connect_mysql.borrow() as conn:
         params = (login,)
 
-        infos = connect_mysql.get_query(conn, query, params, True)
+        infos = connect_mysql.get_query(conn, QUERY_USER_BY_LOGIN, params, True)
 
         if not infos:
             raise UserNotFoundException()
@@ -50,8 +50,6 @@ def get_user_by_login(login) -> UserModel:
             is_admin=bool(row.get("us_is_admin", False))
         )
         return user_bo
-    finally:
-        connect_mysql.disconnect(conn)
 
 
 def _verify_password(password, hashed_password) -> bool:
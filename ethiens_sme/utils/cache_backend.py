@@ -0,0 +1,86 @@
+"""Extra flask_caching backends"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from flask_caching.backends.base import BaseCache
+
+
+class LRUCache(BaseCache):
+    """
+    In-process cache holding at most `threshold` entries.
+    Each entry expires after its timeout; when the cache is full the least
+    recently used entry is evicted. Values are stored as is, without pickling.
+    Select it with CACHE_TYPE = "ethiens_sme.utils.cache_backend.LRUCache".
+    """
+
+    def __init__(self, threshold=500, default_timeout=300, **kwargs):
+        super().__init__(default_timeout=default_timeout, **kwargs)
+        self._threshold = threshold
+        self._entries = OrderedDict()  # key -> (expires_at, value), 0 means never
+        self._lock = threading.RLock()
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.update(threshold=config["CACHE_THRESHOLD"])
+        return cls(*args, **kwargs)
+
+    def _expires_at(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return time.monotonic() + timeout if timeout > 0 else 0
+
+    def _get_entry(self, key):
+        """Return the live entry for `key` and mark it as recently used. Lock must be held."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, _ = entry
+        if expires_at and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._get_entry(key)
+            return entry[1] if entry else None
+
+    def has(self, key):
+        with self._lock:
+            return self._get_entry(key) is not None
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            self._entries[key] = (self._expires_at(timeout), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._threshold:
+                self._entries.popitem(last=False)
+        return True
+
+    def add(self, key, value, timeout=None):
+        with self._lock:
+            if self._get_entry(key) is not None:
+                return False
+            return self.set(key, value, timeout)
+
+    def delete(self, key):
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        return True
+
+    def inc(self, key, delta=1):
+        with self._lock:
+            entry = self._get_entry(key)
+            value = (entry[1] if entry else 0) + delta
+            expires_at = entry[0] if entry else 0
+            self._entries[key] = (expires_at, value)
+            return value
+
+    def dec(self, key, delta=1):
+        return self.inc(key, -delta)
@@ -16,6 +16,13 @@ class InternalServerErrorException(ApiException):
         super().__init__("INTERNAL_SERVER_ERROR", 500)
 
 
+class DatabaseUnavailableException(ApiException):
+    """Exception for when no database connection can be obtained"""
+
+    def __init__(self, message="DATABASE_UNAVAILABLE"):
+        super().__init__(message, 503)
+
+
 class ForbiddenException(ApiException):
     """Exception for internal server error"""
 
@@ -15,3 +15,19 @@ class SeanceNotFoundException(ApiException):
 
     def __init__(self, message):
         super().__init__(message, 422)
+
+
+class InvalidSeancesException(ApiException):
+    """Exception for when rows of a bulk seance schedule are invalid"""
+
+    def __init__(self, errors):
+        super().__init__("INVALID_SEANCES", 422)
+        self.errors = errors
+
+
+class CityNotFoundException(ApiException):
+    """Exception for when no city has the requested name"""
+
+    def __init__(self, suggestions):
+        super().__init__("CITY_NOT_FOUND", 404)
+        self.suggestions = suggestions
@@ -0,0 +1,100 @@
+"""
+JSON provider of the app, encoding with orjson when it is installed
+(pip install ethiens-sme[fast]) and with the stdlib json module otherwise.
+The output matches Flask's DefaultJSONProvider: dates and datetimes in the
+HTTP date format (the frontend parses it), Decimal and UUID as strings,
+dataclasses as objects, keys sorted unless sort_keys is false.
+orjson serializes dataclasses natively but without sorting their fields, so
+with sort_keys they go through `default` as dicts; sort_keys = False keeps
+the native path, fields in declaration order.
+"""
+
+import dataclasses
+import typing as t
+from datetime import date, datetime, time, timezone
+
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+_DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+def http_date(value: date) -> str:
+    """Same string as werkzeug's http_date (naive values are taken as UTC), without going through email.utils"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+    else:
+        value = datetime.combine(value, time())
+    return (
+        f"{_DAYS[value.weekday()]}, {value.day:02d} {_MONTHS[value.month - 1]} {value.year:04d} "
+        f"{value.hour:02d}:{value.minute:02d}:{value.second:02d} GMT"
+    )
+
+
+def _default(value: t.Any) -> t.Any:
+    if isinstance(value, date):
+        return http_date(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        # One level only: the encoder recurses into the values (cheaper than dataclasses.asdict)
+        return {field.name: getattr(value, field.name) for field in dataclasses.fields(value)}
+    return DefaultJSONProvider.default(value)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider with an orjson fast path, writing the response body as bytes"""
+
+    default = staticmethod(_default)
+
+    def _orjson_option(self, indent: bool = False) -> int:
+        # Dates go through `default` to keep the HTTP date format instead of orjson's ISO 8601
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            # orjson does not sort the fields of the dataclasses it serializes natively
+            option |= orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj: t.Any, indent: bool = False) -> bytes:
+        """Serialize `obj` to UTF-8 JSON bytes"""
+        if orjson is not None:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_option(indent))
+        if indent:
+            return super().dumps(obj, indent=2).encode("utf-8")
+        return super().dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    def dumps(self, obj: t.Any, **kwargs: t.Any) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def loads(self, s: t.Union[str, bytes], **kwargs: t.Any) -> t.Any:
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: t.Any, **kwargs: t.Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b"\n", mimetype=self.mimetype)
+
+
+def json_bytes(obj: t.Any) -> bytes:
+    """Serialize `obj` with the provider of the current app, as bytes ready to be stored or sent"""
+    provider = current_app.json
+    if isinstance(provider, FastJSONProvider):
+        return provider.dumps_bytes(obj)
+    return provider.dumps(obj).encode("utf-8")
+
+
+def json_bytes_response(body: bytes, status: int = 200, headers=None):
+    """Response of already serialized JSON bytes, without encoding them again"""
+    return current_app.response_class(body, status=status, headers=headers, mimetype=current_app.json.mimetype)
@@ -0,0 +1,232 @@
+"""
+In-process metrics, exported in the Prometheus text format by GET /metrics.
+Collection is a dictionary update under a lock per observation, cheap enough
+to stay enabled in production; nothing is sent anywhere, a Prometheus server
+(or curl) scrapes the endpoint.
+"""
+
+import bisect
+import threading
+import time
+
+from flask import g, has_app_context, request
+
+from ethiens_sme import connect_mysql
+from ethiens_sme.config import Config
+from ethiens_sme.utils import query_stats
+
+# Upper bounds (seconds) of the latency buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, one series per label values"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        """Add `amount` to the series of `label_values`"""
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        """Current value of a series"""
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def samples(self):
+        """(name, labels, value) of every series"""
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            yield self.name, _format_labels(self.labels, label_values), value
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets, one series per label values"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        """Count one observation of `value`"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        """(name, labels, value) of the buckets, sum and count of every series"""
+        with self._lock:
+            items = sorted((label_values, list(series)) for label_values, series in self._series.items())
+        for label_values, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labels + ("le",), label_values + (_format_value(bound),))
+                yield f"{self.name}_bucket", labels, cumulative
+            yield f"{self.name}_sum", _format_labels(self.labels, label_values), series[-1]
+            yield f"{self.name}_count", _format_labels(self.labels, label_values), cumulative
+
+
+class Gauge:
+    """Values read from a callback at scrape time, returning {label values: value}"""
+
+    def __init__(self, name, documentation, labels, callback, kind="gauge"):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.callback = callback
+
+    def samples(self):
+        """(name, labels, value) of every series"""
+        for label_values, value in sorted(self.callback().items()):
+            yield self.name, _format_labels(self.labels, label_values), value
+
+
+_registry = []
+
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def _pool_gauges() -> dict:
+    stats = connect_mysql.pool_stats()
+    return {(state,): stats[state] for state in ("opened", "borrowed", "idle")}
+
+
+def _pool_counters() -> dict:
+    stats = connect_mysql.pool_stats()
+    return {(event,): stats[event] for event in ("borrows", "timeouts", "discarded")}
+
+
+REQUESTS = _register(
+    Counter("ethiens_sme_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+)
+REQUEST_LATENCY = _register(
+    Histogram("ethiens_sme_http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+)
+REQUEST_DB_TIME = _register(
+    Histogram("ethiens_sme_http_request_db_seconds", "Time spent in SQL statements per request", ("method", "route"))
+)
+REQUEST_QUERIES = _register(
+    Histogram(
+        "ethiens_sme_http_request_queries",
+        "SQL statements run per request",
+        ("method", "route"),
+        buckets=COUNT_BUCKETS,
+    )
+)
+SQL_LATENCY = _register(
+    Histogram("ethiens_sme_sql_statement_duration_seconds", "SQL statement latency by statement type", ("statement",))
+)
+POOL_CONNECTIONS = _register(
+    Gauge("ethiens_sme_db_pool_connections", "Connections of the MySQL pool by state", ("state",), _pool_gauges)
+)
+POOL_EVENTS = _register(
+    Gauge(
+        "ethiens_sme_db_pool_events_total",
+        "Borrows, timeouts and discards of the MySQL pool",
+        ("event",),
+        _pool_counters,
+        kind="counter",
+    )
+)
+CACHE_REQUESTS = _register(
+    Counter(
+        "ethiens_sme_cache_requests_total",
+        "Cache lookups by cache, endpoint and result",
+        ("cache", "key", "result"),
+    )
+)
+TMDB_LATENCY = _register(
+    Histogram("ethiens_sme_tmdb_request_duration_seconds", "TMDB API call latency", ("operation", "outcome"))
+)
+
+
+def render() -> str:
+    """Every metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{labels} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _route_label() -> str:
+    """URL rule of the request, so /movie/1 and /movie/2 share a series"""
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+def _start_request():
+    g._metrics_start = time.perf_counter()  # pylint: disable=protected-access
+    g._metrics_db_time = 0.0  # pylint: disable=protected-access
+    g._metrics_queries = 0  # pylint: disable=protected-access
+
+
+def _finish_request(response):
+    start = g.pop("_metrics_start", None)
+    if start is None:
+        return response
+    route = _route_label()
+    REQUESTS.inc(request.method, route, str(response.status_code))
+    REQUEST_LATENCY.observe(time.perf_counter() - start, request.method, route)
+    REQUEST_DB_TIME.observe(g.pop("_metrics_db_time", 0.0), request.method, route)
+    REQUEST_QUERIES.observe(g.pop("_metrics_queries", 0), request.method, route)
+    return response
+
+
+def _record_statement(fingerprint, seconds, _row_count, _caller):
+    """query_stats listener: statement latency, and DB time of the current request"""
+    SQL_LATENCY.observe(seconds, fingerprint.split(None, 1)[0].upper() if fingerprint else "?")
+    if has_app_context() and "_metrics_start" in g:
+        g._metrics_db_time += seconds  # pylint: disable=protected-access
+        g._metrics_queries += 1  # pylint: disable=protected-access
+
+
+def init_app(app):
+    """Time every request of `app` (disabled with METRICS_ENABLED=false)"""
+    if not Config.METRICS_ENABLED:
+        return
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    query_stats.add_listener(_record_statement)
@@ -0,0 +1,28 @@
+"""Keyset (cursor) pagination helpers"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from ethiens_sme.utils.exception.exceptions import InvalidInputException
+
+
+def encode_cursor(*values) -> str:
+    """Pack the sort key of the last row of a page into an opaque, URL-safe token"""
+    payload = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> list:
+    """Unpack a token built by `encode_cursor` holding `size` values"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as error:
+        raise InvalidInputException("INVALID_CURSOR") from error
+
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidInputException("INVALID_CURSOR")
+    return values
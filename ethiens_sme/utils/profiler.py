@@ -0,0 +1,198 @@
+"""
+Opt-in profiling of single requests.
+A profiled request (PROFILING_HEADER sent, or picked by PROFILING_SAMPLE_RATE)
+records every SQL statement, the connection acquisition and release and the
+JSON serialization, and answers with a Server-Timing header splitting its time
+between them. When it is slower than PROFILING_SLOW_MS, its trace (JSON) and
+a cProfile dump (.prof, open it with pstats or snakeviz) are written to
+PROFILING_DUMP_DIR.
+Nothing is collected unless PROFILING_ENABLED is true.
+"""
+
+import cProfile
+import functools
+import json
+import logging
+import os
+import random
+import re
+import time
+from datetime import datetime
+
+from flask import g, has_app_context, request
+
+from ethiens_sme import connect_mysql
+from ethiens_sme.config import Config
+from ethiens_sme.utils import query_stats
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTrace:
+    """What a profiled request spent its time on"""
+
+    __slots__ = ("start", "queries", "connections", "serialization", "profile")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = []  # (fingerprint, seconds, row count, caller)
+        self.connections = []  # (event, seconds)
+        self.serialization = 0.0
+        self.profile = None
+
+    def db_time(self) -> float:
+        """Seconds spent in SQL statements"""
+        return sum(query[1] for query in self.queries)
+
+    def acquire_time(self) -> float:
+        """Seconds spent getting a connection from the pool, connecting included"""
+        return sum(seconds for event, seconds in self.connections if event == "acquire")
+
+    def release_time(self) -> float:
+        """Seconds spent giving connections back to the pool, closing included"""
+        return sum(seconds for event, seconds in self.connections if event == "release")
+
+
+def current_trace():
+    """Trace of the current request, None when it is not profiled"""
+    if has_app_context():
+        return g.get("_profile_trace")
+    return None
+
+
+def _is_requested() -> bool:
+    if request.headers.get(Config.PROFILING_HEADER, "").lower() in ("1", "true"):
+        return True
+    return random.random() < Config.PROFILING_SAMPLE_RATE  # nosec B311
+
+
+def _start_request():
+    if not _is_requested():
+        return
+    trace = RequestTrace()
+    if Config.PROFILING_CPROFILE:
+        trace.profile = cProfile.Profile()
+        try:
+            trace.profile.enable()
+        except ValueError:
+            # Another profiler is already active on this thread
+            trace.profile = None
+    g._profile_trace = trace  # pylint: disable=protected-access
+
+
+def _finish_request(response):
+    trace = g.pop("_profile_trace", None)
+    if trace is None:
+        return response
+    # Released now rather than at the end of the app context, so that the release is measured
+    connect_mysql.release_request_connection()
+    if trace.profile is not None:
+        trace.profile.disable()
+
+    total = time.perf_counter() - trace.start
+    db_time = trace.db_time()
+    acquire_time = trace.acquire_time()
+    release_time = trace.release_time()
+    application = max(0.0, total - db_time - acquire_time - release_time - trace.serialization)
+    timings = [
+        ("db", db_time, f"{len(trace.queries)} statements"),
+        ("db-acquire", acquire_time, "connection from the pool"),
+        ("db-release", release_time, "connection back to the pool"),
+        ("serialize", trace.serialization, "JSON encoding"),
+        ("app", application, "view and mapping code"),
+        ("total", total, None),
+    ]
+    response.headers.add(
+        "Server-Timing",
+        ", ".join(
+            f'{name};dur={seconds * 1000:.2f}' + (f';desc="{description}"' if description else "")
+            for name, seconds, description in timings
+        ),
+    )
+
+    if total * 1000 >= Config.PROFILING_SLOW_MS:
+        try:
+            _dump(trace, response, {name: round(seconds * 1000, 3) for name, seconds, _ in timings})
+        except OSError as error:
+            logger.warning("Profile dump failed: %s", error)
+    return response
+
+
+def _stop_profile(_exception=None):
+    """Disable the cProfile of a request whose view raised, skipping _finish_request"""
+    trace = g.pop("_profile_trace", None)
+    if trace is not None and trace.profile is not None:
+        trace.profile.disable()
+
+
+def _dump(trace: RequestTrace, response, timings: dict):
+    """Write the trace and the cProfile stats of a slow request"""
+    os.makedirs(Config.PROFILING_DUMP_DIR, exist_ok=True)
+    route = request.url_rule.rule if request.url_rule is not None else request.path
+    name = "{}-{}-{}-{}ms".format(
+        datetime.now().strftime("%Y%m%dT%H%M%S%f"),
+        request.method,
+        re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root",
+        int(timings["total"]),
+    )
+    path = os.path.join(Config.PROFILING_DUMP_DIR, name)
+
+    document = {
+        "method": request.method,
+        "path": request.path,
+        "route": route,
+        "status": response.status_code,
+        "timings_ms": timings,
+        "connections": [{"event": event, "ms": round(seconds * 1000, 3)} for event, seconds in trace.connections],
+        "queries": [
+            {"query": fingerprint, "ms": round(seconds * 1000, 3), "rows": row_count, "caller": caller}
+            for fingerprint, seconds, row_count, caller in trace.queries
+        ],
+    }
+    with open(f"{path}.json", "w", encoding="utf-8") as stream:
+        json.dump(document, stream, indent=2)
+    if trace.profile is not None:
+        trace.profile.dump_stats(f"{path}.prof")
+    logger.info("Slow request %s %s (%d ms) profiled in %s", request.method, request.path, timings["total"], path)
+
+
+def _record_statement(fingerprint, seconds, row_count, caller):
+    trace = current_trace()
+    if trace is not None:
+        trace.queries.append((fingerprint, seconds, row_count, caller))
+
+
+def _record_connection(event, seconds):
+    trace = current_trace()
+    if trace is not None:
+        trace.connections.append((event, seconds))
+
+
+def _timed_serialization(encode):
+    """Wrap a JSON provider method so the profiled requests account its time"""
+
+    @functools.wraps(encode)
+    def wrapper(*args, **kwargs):
+        trace = current_trace()
+        if trace is None:
+            return encode(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return encode(*args, **kwargs)
+        finally:
+            trace.serialization += time.perf_counter() - start
+
+    return wrapper
+
+
+def init_app(app):
+    """Profile the requests of `app` on demand (requires PROFILING_ENABLED)"""
+    if not Config.PROFILING_ENABLED:
+        return
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_stop_profile)
+    query_stats.add_listener(_record_statement)
+    connect_mysql.add_connection_listener(_record_connection)
+    # jsonify() goes through app.json.response
+    app.json.response = _timed_serialization(app.json.response)
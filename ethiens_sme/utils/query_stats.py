@@ -0,0 +1,150 @@
+"""
+Instrumentation of the SQL statements run through connect_mysql.
+Each statement is timed and aggregated per fingerprint (the query with its
+values and IN/VALUES lists collapsed), logged through the "ethiens_sme.sql"
+logger with sampling, and forwarded to the registered listeners.
+Parameters are never logged.
+"""
+
+import functools
+import logging
+import random
+import re
+import sys
+import threading
+from collections import deque
+
+from ethiens_sme.config import Config
+
+logger = logging.getLogger("ethiens_sme.sql")
+
+
+def log_level(name: str) -> int:
+    """Level of a logging level name, DEBUG (with a warning) when the name is unknown"""
+    # getLevelName maps a known name to its level, and anything else to a "Level ..." string
+    level = logging.getLevelName(name.upper())
+    if isinstance(level, int):
+        return level
+    logger.warning("Unknown SQL_LOG_LEVEL %r, statements are logged at DEBUG", name)
+    return logging.DEBUG
+
+
+_LOG_LEVEL = log_level(Config.SQL_LOG_LEVEL)
+_MODULES_SKIPPED = ("ethiens_sme.connect_mysql", "ethiens_sme.utils.query_stats", "contextlib")
+
+_stats = {}
+_lock = threading.Lock()
+_listeners = []
+
+
+class _FingerprintStats:
+    """Counters of one query fingerprint, with the durations of its last executions"""
+
+    __slots__ = ("count", "errors", "rows", "total", "max", "durations", "callers")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.rows = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.durations = deque(maxlen=Config.SQL_STATS_SAMPLES)
+        self.callers = set()
+
+
+@functools.lru_cache(maxsize=2048)
+def fingerprint(query: str) -> str:
+    """Normalized form of a query, shared by all its executions"""
+    normalized = " ".join(query.split()).rstrip(";")
+    normalized = re.sub(r"'(?:[^'\\]|\\.)*'", "?", normalized)
+    normalized = re.sub(r"\b\d+\b", "?", normalized)
+    normalized = re.sub(r"\bIN \((?:%s|\?)(?:, ?(?:%s|\?))*\)", "IN (...)", normalized, flags=re.I)
+    normalized = re.sub(r"\bVALUES (\([^()]*\))(?:, ?\([^()]*\))+", r"VALUES \1, ...", normalized, flags=re.I)
+    return normalized
+
+
+def caller_name() -> str:
+    """`module.function` of the code that ran the statement, outside of connect_mysql"""
+    frame = sys._getframe(1)  # pylint: disable=protected-access
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith(_MODULES_SKIPPED):
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+def add_listener(listener):
+    """Call `listener(fingerprint, seconds, row_count, caller)` after each statement"""
+    _listeners.append(listener)
+
+
+def record(query: str, seconds: float, row_count: int, error: Exception = None):
+    """Account one execution of `query`"""
+    query_fingerprint = fingerprint(query)
+    caller = caller_name()
+
+    with _lock:
+        stats = _stats.get(query_fingerprint)
+        if stats is None:
+            stats = _stats[query_fingerprint] = _FingerprintStats()
+        stats.count += 1
+        stats.rows += row_count or 0
+        stats.total += seconds
+        stats.max = max(stats.max, seconds)
+        stats.durations.append(seconds)
+        stats.callers.add(caller)
+        if error is not None:
+            stats.errors += 1
+
+    milliseconds = seconds * 1000
+    if error is not None:
+        logger.error("%s failed after %.2f ms in %s: %s", query_fingerprint, milliseconds, caller, error)
+    elif milliseconds >= Config.SQL_SLOW_QUERY_MS:
+        logger.warning("Slow query %.2f ms, %s rows in %s: %s", milliseconds, row_count, caller, query_fingerprint)
+    elif logger.isEnabledFor(_LOG_LEVEL) and random.random() < Config.SQL_LOG_SAMPLE_RATE:  # nosec B311
+        logger.log(_LOG_LEVEL, "%.2f ms, %s rows in %s: %s", milliseconds, row_count, caller, query_fingerprint)
+
+    for listener in _listeners:
+        listener(query_fingerprint, seconds, row_count, caller)
+
+
+def _percentile(sorted_values: list, percent: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def snapshot() -> list:
+    """Aggregates per fingerprint, slowest total time first (percentiles over the last executions)"""
+    with _lock:
+        items = [
+            (query_fingerprint, stats.count, stats.errors, stats.rows, stats.total, stats.max,
+             sorted(stats.durations), sorted(stats.callers))
+            for query_fingerprint, stats in _stats.items()
+        ]
+
+    report = []
+    for query_fingerprint, count, errors, rows, total, maximum, durations, callers in items:
+        report.append(
+            {
+                "query": query_fingerprint,
+                "callers": callers,
+                "count": count,
+                "errors": errors,
+                "rows": rows,
+                "total_ms": round(total * 1000, 3),
+                "mean_ms": round(total * 1000 / count, 3),
+                "p50_ms": round(_percentile(durations, 50) * 1000, 3),
+                "p95_ms": round(_percentile(durations, 95) * 1000, 3),
+                "p99_ms": round(_percentile(durations, 99) * 1000, 3),
+                "max_ms": round(maximum * 1000, 3),
+            }
+        )
+    report.sort(key=lambda entry: entry["total_ms"], reverse=True)
+    return report
+
+
+def reset():
+    """Forget the aggregates"""
+    with _lock:
+        _stats.clear()
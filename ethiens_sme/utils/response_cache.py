@@ -0,0 +1,154 @@
+"""Response cache of the public read endpoints"""
+
+import functools
+import hashlib
+import logging
+import threading
+import uuid
+
+from flask import current_app, make_response, request
+
+from ethiens_sme import cache
+from ethiens_sme.config import Config
+from ethiens_sme.utils import metrics
+from ethiens_sme.utils.json_provider import json_bytes_response
+
+# Namespaces, invalidated by the service functions that mutate the matching tables
+MOVIES = "movies"
+SEANCES = "seances"
+CINEMAS = "cinemas"
+
+logger = logging.getLogger(__name__)
+
+# Headers that belong to a single response and must not be replayed from the cache
+_UNCACHED_HEADERS = {"content-length", "set-cookie"}
+
+# CACHE_TYPE values keeping their entries in the memory of each process
+PROCESS_LOCAL_TYPES = {"ethiens_sme.utils.cache_backend.LRUCache", "SimpleCache", "simple"}
+
+_generation_cache = None  # Cache of the generation tokens, see _generations_cache()
+_generation_lock = threading.Lock()
+_warned = set()
+
+
+def cached_response(endpoint: str, namespaces):
+    """
+    Cache the successful responses of a view.
+    The TTL is read from CACHE_TIMEOUTS[endpoint] (0 or missing disables the cache).
+    Keys cover the path, the query args and the current generation of each of
+    `namespaces`, so `invalidate` evicts every variant of the view at once.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            timeout = current_app.config.get("CACHE_TIMEOUTS", {}).get(endpoint)
+            if not timeout:
+                return view(*args, **kwargs)
+
+            try:
+                key = _response_key(endpoint, namespaces)
+                cached = cache.get(key)
+            except Exception as error:  # pylint: disable=broad-except
+                logger.warning("Response cache unavailable: %s", error)
+                return view(*args, **kwargs)
+
+            if cached is not None:
+                metrics.CACHE_REQUESTS.inc("response", endpoint, "hit")
+                # The body is stored already serialized, it is sent as is
+                body, status, headers = cached
+                return json_bytes_response(body, status, headers)
+
+            metrics.CACHE_REQUESTS.inc("response", endpoint, "miss")
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.direct_passthrough:
+                headers = [(name, value) for name, value in response.headers if name.lower() not in _UNCACHED_HEADERS]
+                try:
+                    cache.set(key, (response.get_data(), response.status_code, headers), timeout=timeout)
+                except Exception as error:  # pylint: disable=broad-except
+                    logger.warning("Response cache unavailable: %s", error)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate(*namespaces):
+    """Evict every cached response depending on one of `namespaces`"""
+    try:
+        _generations_cache().set_many(
+            {_generation_key(namespace): uuid.uuid4().hex for namespace in namespaces}, timeout=0
+        )
+    except Exception as error:  # pylint: disable=broad-except
+        logger.warning("Response cache invalidation failed: %s", error)
+
+
+def is_shared() -> bool:
+    """Whether an invalidation made by this process reaches the responses cached by the other ones"""
+    return bool(Config.CACHE_GENERATIONS_REDIS_URL) or Config.CACHE_TYPE not in PROCESS_LOCAL_TYPES
+
+
+def check_shared(writer: str):
+    """
+    Warn (once per process) when `writer`, a process writing outside of the web
+    workers, can't invalidate their cached responses: they stay stale until their TTL.
+    """
+    if not is_shared() and writer not in _warned:
+        _warned.add(writer)
+        logger.warning(
+            "%s: CACHE_TYPE %s is process-local, the web workers will serve their cached responses until "
+            "they expire. Set CACHE_GENERATIONS_REDIS_URL (or a shared CACHE_TYPE) to evict them.",
+            writer,
+            Config.CACHE_TYPE,
+        )
+
+
+def _generations_cache():
+    """
+    Cache of the generation tokens: the Redis of CACHE_GENERATIONS_REDIS_URL when
+    set, so every process sees the same generations, else the response cache.
+    """
+    global _generation_cache  # pylint: disable=global-statement
+    if _generation_cache is None:
+        with _generation_lock:
+            if _generation_cache is None:
+                if Config.CACHE_GENERATIONS_REDIS_URL:
+                    # pylint: disable=import-outside-toplevel
+                    import redis
+                    from flask_caching.backends.rediscache import RedisCache
+
+                    _generation_cache = RedisCache(
+                        host=redis.from_url(Config.CACHE_GENERATIONS_REDIS_URL),
+                        key_prefix=Config.CACHE_KEY_PREFIX,
+                        default_timeout=0,
+                    )
+                else:
+                    _generation_cache = cache
+    return _generation_cache
+
+
+def _generation_key(namespace: str) -> str:
+    return f"generation:{namespace}"
+
+
+def _generations(namespaces) -> list:
+    """
+    Current generation token of each namespace.
+    A missing token (never set, or evicted) gets a fresh random one rather than
+    a default value, so entries built on an older generation can't come back.
+    """
+    store = _generations_cache()
+    keys = [_generation_key(namespace) for namespace in namespaces]
+    generations = list(store.get_many(*keys))
+    for index, generation in enumerate(generations):
+        if generation is None:
+            store.add(keys[index], uuid.uuid4().hex, timeout=0)
+            generations[index] = store.get(keys[index])
+    return generations
+
+
+def _response_key(endpoint: str, namespaces) -> str:
+    args = sorted(request.args.items(multi=True))
+    digest = hashlib.sha256(repr((request.path, args)).encode("utf-8")).hexdigest()[:32]
+    return f"response:{endpoint}:{digest}:{'.'.join(str(g) for g in _generations(namespaces))}"
@@ -0,0 +1,88 @@
+"""Persistent key/value cache stored in a SQLite file"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class SqliteCache:
+    """
+    JSON values with a per-entry TTL, kept on disk so they survive restarts
+    and are shared by every worker process of the host.
+    Holds at most `max_entries` entries: the least recently read ones are
+    evicted first.
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_entry (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_entry_accessed ON cache_entry (accessed_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread, sqlite3 connections can't be shared between threads"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        """Value stored under `key`, or None when missing or expired"""
+        now = time.time()
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT value FROM cache_entry WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE cache_entry SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value, ttl: float):
+        """Store `value` for `ttl` seconds, evicting the oldest entries beyond `max_entries`"""
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entry (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now),
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM cache_entry").fetchone()
+            if count > self.max_entries:
+                conn.execute("DELETE FROM cache_entry WHERE expires_at <= ?", (now,))
+                conn.execute(
+                    """
+                    DELETE FROM cache_entry WHERE key IN (
+                        SELECT key FROM cache_entry ORDER BY accessed_at ASC
+                        LIMIT MAX(0, (SELECT COUNT(*) FROM cache_entry) - ?)
+                    )
+                    """,
+                    (self.max_entries,),
+                )
+
+    def delete(self, key: str):
+        """Remove `key` from the cache"""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM cache_entry WHERE key = ?", (key,))
+
+    def clear(self):
+        """Remove every entry"""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM cache_entry")
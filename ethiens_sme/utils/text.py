@@ -0,0 +1,17 @@
+"""Text helpers"""
+
+import re
+import unicodedata
+
+_WORD = re.compile(r"\w+")
+
+
+def fold(text: str) -> str:
+    """Case- and accent-insensitive form of a string ("Étienne" -> "etienne")"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def search_key(text: str) -> str:
+    """Folded words of a name, punctuation ignored ("Saint-Étienne" -> "saint etienne")"""
+    return " ".join(_WORD.findall(fold(text)))
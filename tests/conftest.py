@@ -0,0 +1,182 @@
+"""Shared fixtures: the Flask app and an in-memory stand-in for the MySQL connections"""
+
+import re
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from ethiens_sme import connect_mysql
+from ethiens_sme.rest_api import app as flask_app
+from ethiens_sme.route.admin_route import admin
+from ethiens_sme.route.export_route import export
+from ethiens_sme.route.frontend_route import frontend
+from ethiens_sme.route.metrics_route import metrics
+from ethiens_sme.route.movie_route import movie
+from ethiens_sme.route.report_route import report
+from ethiens_sme.route.seance_route import seance
+from ethiens_sme.route.user_route import user
+
+# Blueprints are registered by the __main__ block of rest_api
+for _blueprint in (user, seance, movie, frontend, admin, metrics, export, report):
+    if _blueprint.name not in flask_app.blueprints:
+        flask_app.register_blueprint(_blueprint)
+
+
+class FakeCursor:
+    """Cursor answering each query with the rows of the first matching handler"""
+
+    def __init__(self, database, dictionary=False, **_kwargs):
+        self._database = database
+        self._dictionary = dictionary
+        self._rows = []
+        self.description = None
+        self.column_names = ()
+        self.lastrowid = None
+        self.rowcount = 0
+
+    def execute(self, query, params=None):
+        self._database.log.append((query, params))
+        error = self._database.errors.get(_first_match(self._database.errors, query))
+        if error is not None:
+            raise error
+        columns, rows = [], []
+        pattern = _first_match(self._database.handlers, query)
+        if pattern is not None:
+            columns, rows = self._database.handlers[pattern](query, params)
+        self.description = [(column,) for column in columns] or None
+        self.column_names = tuple(columns)
+        self._rows = [dict(zip(columns, row)) if self._dictionary else tuple(row) for row in rows]
+        self.lastrowid = self._database.next_id() if _is_insert(query) else None
+        if columns:
+            self.rowcount = len(rows)
+        else:
+            self.rowcount = self._database.rowcounts.get(_first_match(self._database.rowcounts, query), 1)
+
+    def executemany(self, query, seq_params):
+        seq_params = list(seq_params)
+        self._database.log.append((query, seq_params))
+        error = self._database.errors.get(_first_match(self._database.errors, query))
+        if error is not None:
+            raise error
+        self.lastrowid = self._database.next_id(len(seq_params)) if _is_insert(query) else None
+        self.rowcount = len(seq_params)
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """MySQL connection of FakeDatabase"""
+
+    in_transaction = False
+    unread_result = False
+
+    def __init__(self, database):
+        self._database = database
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self._database, **kwargs)
+
+    def commit(self):
+        self._database.log.append(("COMMIT", None))
+
+    def rollback(self):
+        self._database.log.append(("ROLLBACK", None))
+
+    def consume_results(self):
+        pass
+
+    def ping(self, **_kwargs):
+        pass
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    """
+    Queries are matched against the regexes of `handlers` ({pattern: fn(query, params) -> (columns, rows)}),
+    of `errors` ({pattern: exception to raise}) and of `rowcounts` ({pattern: rows affected by a command,
+    1 otherwise}); every statement is appended to `log`.
+    """
+
+    def __init__(self):
+        self.handlers = {}
+        self.errors = {}
+        self.rowcounts = {}
+        self.log = []
+        self._last_id = 0
+
+    def next_id(self, count=1):
+        first = self._last_id + 1
+        self._last_id += count
+        return first
+
+    def returns(self, pattern, columns, rows):
+        """Answer the queries matching `pattern` with `rows`"""
+        self.handlers[pattern] = lambda _query, _params: (columns, rows)
+
+    def statements(self, pattern) -> list:
+        """(query, params) of the logged statements matching `pattern`"""
+        return [(query, params) for query, params in self.log if re.search(pattern, query, re.S | re.I)]
+
+
+def _is_insert(query):
+    return query.lstrip().upper().startswith("INSERT")
+
+
+def _first_match(patterns, query):
+    return next((pattern for pattern in patterns if re.search(pattern, query, re.S | re.I)), None)
+
+
+@pytest.fixture
+def app():
+    """The application, in testing mode"""
+    flask_app.config["TESTING"] = True
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    """Test client of the application"""
+    return app.test_client()
+
+
+@pytest.fixture
+def login(app, client):
+    """Log the test client in, as an admin or not"""
+
+    def log_in(is_admin=False):
+        with app.app_context():
+            token = create_access_token(identity="1", additional_claims={"is_admin": is_admin})
+        client.set_cookie("access_token_cookie", token)
+        return client
+
+    return log_in
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """Route every connection of connect_mysql to a FakeDatabase"""
+    database = FakeDatabase()
+    monkeypatch.setattr(connect_mysql, "connect", lambda: FakeConnection(database))
+    monkeypatch.setattr(connect_mysql, "_pool", None)
+    return database
@@ -0,0 +1,76 @@
+"""Multi-row INSERTs of movies and seances, and their row-by-row fallback"""
+
+# pylint: disable=protected-access
+
+import pytest
+
+from ethiens_sme.service import movie_search, movie_service, schedule_index, seance_service
+
+MOVIES = [{"title": "Le Samouraï"}, {"title": "Le Cercle rouge"}]
+SEANCES = [
+    {"date_time": "2025-12-25 20:00:00", "room": "Salle 1", "language": "VF", "movie_id": 10, "cinema_id": 20},
+    {"date_time": "2025-12-25 22:00:00", "room": "Salle 1", "language": "VF", "movie_id": 10, "cinema_id": 20},
+]
+
+
+@pytest.fixture(autouse=True)
+def no_index(monkeypatch):
+    """The in-memory indexes are not loaded"""
+    monkeypatch.setattr(movie_search, "_index", None)
+    monkeypatch.setattr(schedule_index, "_index", None)
+
+
+def inserts(fake_db, table):
+    """Logged INSERTs into `table`: a list of rows for a multi-row INSERT, a tuple for a single one"""
+    return [params for query, params in fake_db.statements(rf"^\s*INSERT INTO {table}\b")]
+
+
+def test_movies_are_inserted_in_one_statement(fake_db):
+    fake_db.returns(r"SELECT mo_title FROM et_movie", ["mo_title"], [(movie["title"],) for movie in MOVIES])
+
+    assert movie_service.create_movies(MOVIES) == [1, 2]
+    assert len(inserts(fake_db, "et_movie")) == 1
+    assert fake_db.log[-1] == ("COMMIT", None)
+
+
+def test_interleaved_movie_ids_are_inserted_again_row_by_row(fake_db):
+    # Another session inserted a movie in the middle of the batch
+    fake_db.returns(r"SELECT mo_title FROM et_movie", ["mo_title"], [("Le Samouraï",), ("Autre film",)])
+
+    movie_ids = movie_service.create_movies(MOVIES)
+
+    assert movie_ids == [3, 4]
+    assert [type(params) for params in inserts(fake_db, "et_movie")] == [list, tuple, tuple]
+    controls = [query for query, _ in fake_db.log if query in ("COMMIT", "ROLLBACK")]
+    assert controls == ["ROLLBACK", "COMMIT"]
+
+
+@pytest.fixture
+def schedule(fake_db):
+    """The movie and the cinema of SEANCES exist"""
+    fake_db.returns(r"SELECT mo_id_movie FROM et_movie WHERE", ["mo_id_movie"], [(10,)])
+    fake_db.returns(r"SELECT ci_id_cinema FROM et_cinema WHERE", ["ci_id_cinema"], [(20,)])
+    return fake_db
+
+
+def test_seances_are_inserted_in_one_statement(schedule):
+    params = [seance_service._seance_params(row) for row in SEANCES]
+    inserted = [(row_params[0], row_params[3], row_params[4]) for row_params in params]
+    schedule.returns(r"FROM et_seance\s+WHERE se_id_seance BETWEEN", ["se_date_time"], inserted)
+
+    assert seance_service.create_seances(SEANCES) == [1, 2]
+    assert len(inserts(schedule, "et_seance")) == 1
+    assert schedule.statements(r"^RELEASE SAVEPOINT")
+
+
+def test_interleaved_seance_ids_roll_back_the_savepoint_only(schedule):
+    params = seance_service._seance_params(SEANCES[0])
+    schedule.returns(r"FROM et_seance\s+WHERE se_id_seance BETWEEN", ["se_date_time"], [(params[0], 99, 99)])
+
+    seance_ids = seance_service.create_seances(SEANCES)
+
+    assert seance_ids == [3, 4]
+    assert [type(params) for params in inserts(schedule, "et_seance")] == [list, tuple, tuple]
+    assert schedule.statements(r"^ROLLBACK TO SAVEPOINT unit_of_work_1")
+    controls = [query for query, _ in schedule.log if query in ("COMMIT", "ROLLBACK")]
+    assert controls == ["COMMIT"]
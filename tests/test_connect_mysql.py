@@ -0,0 +1,162 @@
+"""Connection pool, borrowed connections and units of work"""
+
+# pylint: disable=protected-access
+
+import pytest
+from mysql.connector import Error
+
+from ethiens_sme import connect_mysql
+from ethiens_sme.utils.exception.exceptions import DatabaseUnavailableException
+
+from conftest import FakeConnection
+
+
+class DeadConnection(FakeConnection):
+    """Connection dropped by the server while idle"""
+
+    def ping(self, **_kwargs):
+        raise Error("MySQL server has gone away")
+
+
+@pytest.fixture
+def connections(fake_db, monkeypatch):
+    """The connections opened by connect(), in order"""
+    opened = []
+
+    def connect():
+        conn = FakeConnection(fake_db)
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(connect_mysql, "connect", connect)
+    return opened
+
+
+def test_released_connection_is_reused(connections):
+    pool = connect_mysql.ConnectionPool(size=2)
+    first = pool.acquire()
+    pool.release(first)
+
+    assert pool.acquire() is first
+    assert len(connections) == 1
+    assert pool.stats()["borrows"] == 2
+
+
+def test_exhausted_pool_times_out(connections):
+    pool = connect_mysql.ConnectionPool(size=1, timeout=0.01)
+    pool.acquire()
+
+    with pytest.raises(DatabaseUnavailableException) as raised:
+        pool.acquire()
+    assert raised.value.message == "DATABASE_POOL_EXHAUSTED"
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_overflow_connections_are_closed_on_release(connections):
+    pool = connect_mysql.ConnectionPool(size=1, max_overflow=1)
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first)
+    pool.release(second)
+
+    stats = pool.stats()
+    assert (stats["opened"], stats["idle"], stats["discarded"]) == (1, 1, 1)
+
+
+def test_pending_transaction_is_rolled_back_on_release(fake_db, connections):
+    pool = connect_mysql.ConnectionPool(size=1)
+    conn = pool.acquire()
+    conn.in_transaction = True
+    pool.release(conn)
+
+    assert fake_db.log == [("ROLLBACK", None)]
+
+
+def test_dead_idle_connection_is_replaced(fake_db, monkeypatch):
+    pool = connect_mysql.ConnectionPool(size=1)
+    monkeypatch.setattr(connect_mysql, "connect", lambda: DeadConnection(fake_db))
+    pool.release(pool.acquire())
+    monkeypatch.setattr(connect_mysql, "connect", lambda: FakeConnection(fake_db))
+
+    assert not isinstance(pool.acquire(), DeadConnection)
+    assert pool.stats()["opened"] == 1
+
+
+def test_failed_connect_gives_its_slot_back(monkeypatch):
+    pool = connect_mysql.ConnectionPool(size=1, timeout=0.01)
+    monkeypatch.setattr(connect_mysql, "connect", lambda: None)
+
+    with pytest.raises(DatabaseUnavailableException):
+        pool.acquire()
+    assert (pool.stats()["opened"], pool.stats()["borrowed"]) == (0, 0)
+
+
+def test_borrow_discards_the_connection_after_a_database_error(connections):
+    with pytest.raises(Error):
+        with connect_mysql.borrow():
+            raise Error("Lost connection")
+
+    with connect_mysql.borrow() as conn:
+        assert conn is connections[1]
+    assert connect_mysql.get_pool().stats()["discarded"] == 1
+
+
+def test_borrow_shares_one_connection_per_app_context(app, connections):
+    with app.app_context():
+        with connect_mysql.borrow() as first:
+            pass
+        with connect_mysql.borrow() as second:
+            assert second is first
+        assert connect_mysql.get_pool().stats()["borrowed"] == 1
+    assert connect_mysql.get_pool().stats()["borrowed"] == 0
+
+
+def test_unit_of_work_commits_once(fake_db):
+    with connect_mysql.unit_of_work() as conn:
+        connect_mysql.execute_command(conn, "UPDATE et_movie SET mo_title = %s", ("A",))
+        connect_mysql.execute_command(conn, "UPDATE et_movie SET mo_title = %s", ("B",))
+
+    assert [query for query, _ in fake_db.log].count("COMMIT") == 1
+    assert fake_db.log[-1] == ("COMMIT", None)
+
+
+def test_failing_nested_block_only_rolls_back_its_savepoint(fake_db):
+    with connect_mysql.unit_of_work() as conn:
+        connect_mysql.execute_command(conn, "UPDATE et_movie SET mo_title = %s", ("A",))
+        with pytest.raises(ValueError):
+            with connect_mysql.transaction(conn):
+                connect_mysql.execute_command(conn, "UPDATE et_movie SET mo_title = %s", ("B",))
+                raise ValueError("invalid")
+        with connect_mysql.transaction(conn):
+            connect_mysql.execute_command(conn, "UPDATE et_movie SET mo_title = %s", ("C",))
+
+    assert [query if params is None else params[0] for query, params in fake_db.log] == [
+        "A",
+        "SAVEPOINT unit_of_work_1",
+        "B",
+        "ROLLBACK TO SAVEPOINT unit_of_work_1",
+        "SAVEPOINT unit_of_work_1",
+        "C",
+        "RELEASE SAVEPOINT unit_of_work_1",
+        "COMMIT",
+    ]
+
+
+def test_failing_unit_of_work_is_rolled_back(fake_db):
+    with pytest.raises(ValueError):
+        with connect_mysql.unit_of_work() as conn:
+            connect_mysql.execute_command(conn, "UPDATE et_movie SET mo_title = %s", ("A",))
+            raise ValueError("invalid")
+
+    assert fake_db.log[-1] == ("ROLLBACK", None)
+    assert ("COMMIT", None) not in fake_db.log
+
+
+def test_execute_many_returns_the_first_inserted_id(fake_db):
+    with connect_mysql.borrow() as conn:
+        assert connect_mysql.execute_many(conn, "INSERT INTO et_actors (ac_actor_name) VALUES (%s)", []) is None
+        first_id = connect_mysql.execute_many(
+            conn, "INSERT INTO et_actors (ac_actor_name) VALUES (%s)", [("A",), ("B",), ("C",)]
+        )
+        next_id = connect_mysql.execute_command(conn, "INSERT INTO et_actors (ac_actor_name) VALUES (%s)", ("D",))
+
+    assert next_id == first_id + 3
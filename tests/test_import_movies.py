@@ -0,0 +1,60 @@
+"""Bulk movie import: batches and failure summary"""
+
+import io
+import json
+
+import pytest
+from mysql.connector import Error
+
+from ethiens_sme import import_movies
+from ethiens_sme.service import movie_service
+
+
+@pytest.fixture
+def created(monkeypatch):
+    """Batches passed to create_movies; the second one fails"""
+    batches = []
+
+    def create_movies(movies, actor_ids):
+        batches.append([movie["title"] for movie in movies])
+        if len(batches) == 2:
+            raise Error("Lock wait timeout exceeded")
+        return list(range(len(movies)))
+
+    monkeypatch.setattr(movie_service, "create_movies", create_movies)
+    return batches
+
+
+def _catalogue(count: int) -> io.StringIO:
+    return io.StringIO("".join(json.dumps({"title": f"Movie {index}"}) + "\n" for index in range(count)))
+
+
+def test_import_stops_at_the_failed_batch(created):
+    stats = import_movies.import_catalogue(_catalogue(7), "jsonl", batch_size=2)
+
+    assert len(created) == 2
+    assert stats["imported"] == 2
+    assert stats["failed"] == 2
+    assert stats["failed_batches"] == [{"first_line": 3, "last_line": 4, "error": "Lock wait timeout exceeded"}]
+    assert stats["resume_line"] == 3
+
+
+def test_import_keeps_going_after_a_failed_batch(created):
+    stats = import_movies.import_catalogue(_catalogue(7), "jsonl", batch_size=2, keep_going=True)
+
+    assert len(created) == 4
+    assert stats["imported"] == 5
+    assert stats["failed"] == 2
+    assert stats["resume_line"] is None
+
+
+def test_main_prints_the_summary_and_fails(created, tmp_path, capsys):
+    path = tmp_path / "catalogue.jsonl"
+    path.write_text(_catalogue(5).getvalue(), encoding="utf-8")
+
+    with pytest.raises(SystemExit) as exit_info:
+        import_movies.main([str(path), "--batch-size", "2"])
+
+    assert exit_info.value.code == 1
+    summary = json.loads(capsys.readouterr().out)
+    assert (summary["imported"], summary["failed"], summary["resume_line"]) == (2, 2, 3)
@@ -0,0 +1,28 @@
+"""JSON provider: same output as Flask's DefaultJSONProvider"""
+
+from datetime import datetime
+
+import pytest
+from flask.json.provider import DefaultJSONProvider
+
+from ethiens_sme.model.seance_model import SeanceModel
+
+SEANCE = SeanceModel("Le Samouraï", datetime(2025, 12, 25, 20, 0), "Salle 1", "VF", "Le Champo", "Paris")
+
+
+def test_dataclass_keys_are_sorted_like_the_default_provider(app):
+    value = {"seances": [SEANCE], "count": 1}
+
+    assert app.json.dumps(value) == DefaultJSONProvider(app).dumps(value, separators=(",", ":"), ensure_ascii=False)
+    assert app.json.dumps(SEANCE).startswith('{"cinema_name":"Le Champo","city":"Paris","date_time":"Thu, 25 Dec 2025')
+
+
+def test_unsorted_output_keeps_the_field_order(app, monkeypatch):
+    monkeypatch.setattr(app.json, "sort_keys", False)
+
+    assert app.json.dumps(SEANCE).startswith('{"movie_title":"Le Samouraï","date_time":')
+
+
+@pytest.mark.parametrize("obj", [[SEANCE], {"b": SEANCE, "a": [1, None]}])
+def test_bytes_and_text_agree(app, obj):
+    assert app.json.dumps_bytes(obj) == app.json.dumps(obj).encode("utf-8")
@@ -0,0 +1,49 @@
+"""Prometheus text exposition of GET /metrics"""
+
+import re
+
+from ethiens_sme.utils import metrics
+
+# name{labels} value, as in the text exposition format 0.0.4
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*",?)*\})? \S+$')
+
+
+def test_counter_series_and_label_escaping():
+    counter = metrics.Counter("test_total", "Test counter", ("path",))
+    counter.inc('a"b\\c\nd')
+    counter.inc('a"b\\c\nd', amount=2)
+
+    assert list(counter.samples()) == [("test_total", '{path="a\\"b\\\\c\\nd"}', 3)]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("test_seconds", "Test histogram", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, "/x")
+
+    samples = {(name, labels): value for name, labels, value in histogram.samples()}
+    assert samples[("test_seconds_bucket", '{route="/x",le="0.1"}')] == 1
+    assert samples[("test_seconds_bucket", '{route="/x",le="1.0"}')] == 3
+    assert samples[("test_seconds_bucket", '{route="/x",le="+Inf"}')] == 4
+    assert samples[("test_seconds_count", '{route="/x"}')] == 4
+    assert samples[("test_seconds_sum", '{route="/x"}')] == 4.05
+
+
+def test_metrics_endpoint_uses_the_text_format(client):
+    client.get("/login")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    lines = response.get_data(as_text=True).splitlines()
+    for line in lines:
+        assert line.startswith(("# HELP ", "# TYPE ")) or SAMPLE.match(line), line
+    for metric in metrics._registry:  # pylint: disable=protected-access
+        assert f"# TYPE {metric.name} {metric.kind}" in lines
+    assert any(
+        line.startswith('ethiens_sme_http_requests_total{method="GET",route="/login",status="200"} ') for line in lines
+    )
+    assert any(
+        line.startswith('ethiens_sme_http_request_duration_seconds_bucket{method="GET",route="/login",le="+Inf"} ')
+        for line in lines
+    )
@@ -0,0 +1,39 @@
+"""EXPLAIN check of the service statements"""
+
+import re
+
+from mysql.connector import Error
+
+from ethiens_sme import migrate
+
+SAMPLE = {"movie_id": 1, "movie_title": "A", "cinema_id": 2, "city": "Paris", "login": "admin", "actor_name": "B"}
+
+
+def test_every_statement_gets_one_parameter_per_placeholder():
+    for query, params in migrate._statements(SAMPLE):  # pylint: disable=protected-access
+        assert query.count("%s") == len(params or ()), query
+        assert not re.search(r"{\w+}", query), query
+
+
+def test_explain_only_runs_explain(fake_db):
+    full_scans, errors = migrate.explain()
+
+    assert (full_scans, errors) == ([], [])
+    statements = [query for query, _ in fake_db.log]
+    explained = [query for query in statements if query.startswith("EXPLAIN")]
+    assert len(explained) == len(migrate._statements(SAMPLE))  # pylint: disable=protected-access
+    assert all(query.startswith("EXPLAIN") or query.lstrip().startswith("SELECT") for query in statements)
+
+
+def test_explain_reports_full_scans_and_failures(fake_db):
+    plan = ["id", "select_type", "table", "type", "key", "rows"]
+    full_scan = (1, "SIMPLE", "et_movie", "ALL", None, 500)
+    fake_db.returns(r"^EXPLAIN\s+SELECT mo_id_movie FROM et_movie;", plan, [full_scan])
+    fake_db.returns(r"^EXPLAIN\s+INSERT INTO et_casting", plan, [(1, "INSERT", "et_casting", "ALL", None, None)])
+    fake_db.errors[r"^EXPLAIN SELECT \* FROM et_user"] = Error("Unknown column")
+
+    full_scans, errors = migrate.explain(min_rows=100)
+
+    assert [query for query, _ in full_scans] == ["SELECT mo_id_movie FROM et_movie;"]
+    assert errors == ["SELECT * FROM et_user WHERE us_pseudo = %s"]
+    assert migrate.explain(min_rows=1000)[0] == []
@@ -0,0 +1,14 @@
+"""Movie import endpoints"""
+
+
+def test_import_status_requires_an_admin(login):
+    client = login(is_admin=False)
+
+    response = client.get("/movie/import/status/any-job")
+
+    assert response.status_code == 403
+    assert response.get_json() == {"message": "Admin privileges required"}
+
+
+def test_import_requires_an_admin(login):
+    assert login(is_admin=False).post("/movie/import/42").status_code == 403
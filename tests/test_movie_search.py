@@ -0,0 +1,79 @@
+"""Saving of the movie search index"""
+
+# pylint: disable=protected-access
+
+import json
+import threading
+
+import pytest
+
+from ethiens_sme.config import Config
+from ethiens_sme.service import movie_search
+
+
+@pytest.fixture
+def index(monkeypatch, tmp_path):
+    """An index with one movie, saved under tmp_path"""
+    monkeypatch.setattr(Config, "MOVIE_SEARCH_INDEX_PATH", str(tmp_path / "index" / "movies.json"))
+    monkeypatch.setattr(Config, "MOVIE_SEARCH_SAVE_INTERVAL", 30)
+    search_index = movie_search.MovieSearchIndex()
+    search_index.add(1, "Le Samouraï", None, ["Alain Delon"], "Eugène Lépicier", "Un tueur à gages")
+    monkeypatch.setattr(movie_search, "_index", search_index)
+    monkeypatch.setattr(movie_search, "_save_timer", None)
+    monkeypatch.setattr(movie_search, "_saved_at", 0.0)
+    yield search_index
+    timer = movie_search._save_timer
+    if timer is not None:
+        timer.cancel()
+        timer.join(5)
+
+
+def test_concurrent_saves_leave_one_whole_file(index, tmp_path):
+    threads = [threading.Thread(target=movie_search.save, args=(index,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert [path.name for path in (tmp_path / "index").iterdir()] == ["movies.json"]
+    with open(Config.MOVIE_SEARCH_INDEX_PATH, encoding="utf-8") as stream:
+        saved = movie_search.MovieSearchIndex.from_json(json.load(stream))
+    assert [result[1] for result in saved.search("samourai")] == ["Le Samouraï"]
+    assert not index.dirty
+
+
+def test_save_is_written_by_a_timer_thread(index, monkeypatch):
+    writers = []
+    saved = threading.Event()
+
+    def save(saved_index):
+        writers.append(threading.current_thread())
+        saved_index.dirty = False
+        saved.set()
+
+    monkeypatch.setattr(movie_search, "save", save)
+    movie_search._save_if_due()
+
+    assert saved.wait(5)
+    assert len(writers) == 1 and isinstance(writers[0], threading.Timer)
+    assert writers[0] is not threading.current_thread()
+
+
+def test_next_save_waits_for_the_interval(index, monkeypatch):
+    monkeypatch.setattr(movie_search, "save", lambda _index: None)
+    monkeypatch.setattr(movie_search, "_saved_at", movie_search.time.monotonic())
+
+    movie_search._save_if_due()
+    timer = movie_search._save_timer
+    assert timer.interval > 25
+    movie_search._save_if_due()
+    assert movie_search._save_timer is timer
+
+    movie_search._save_if_due(force=True)
+    assert movie_search._save_timer.interval == 0
+
+
+def test_clean_index_is_not_saved(index):
+    index.dirty = False
+    movie_search._save_if_due(force=True)
+    assert movie_search._save_timer is None
@@ -0,0 +1,55 @@
+"""Profiled requests: Server-Timing and cProfile"""
+
+import sys
+
+import pytest
+from flask import Flask, jsonify
+
+from ethiens_sme import connect_mysql
+from ethiens_sme.config import Config
+from ethiens_sme.utils import profiler, query_stats
+
+
+@pytest.fixture
+def profiled_app(fake_db, monkeypatch):
+    """An app profiling every request, with a view using the database and one raising"""
+    monkeypatch.setattr(Config, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(Config, "PROFILING_CPROFILE", True)
+    monkeypatch.setattr(Config, "PROFILING_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(Config, "PROFILING_SLOW_MS", 60_000)
+    monkeypatch.setattr(connect_mysql, "_connection_listeners", [])
+    monkeypatch.setattr(query_stats, "_listeners", [])
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+    connect_mysql.init_app(app)
+    profiler.init_app(app)
+
+    @app.route("/query")
+    def query():
+        with connect_mysql.borrow() as conn:
+            connect_mysql.get_query(conn, "SELECT 1")
+        return jsonify({"ok": True})
+
+    @app.route("/fail")
+    def fail():
+        raise KeyError("fail")
+
+    return app
+
+
+def test_server_timing_reports_the_connection_release(profiled_app):
+    response = profiled_app.test_client().get("/query")
+
+    timings = {part.split(";")[0]: part for part in response.headers["Server-Timing"].split(", ")}
+    assert set(timings) == {"db", "db-acquire", "db-release", "serialize", "app", "total"}
+    assert 'desc="1 statements"' in timings["db"]
+    # The connection went back to the pool before the header was written
+    assert connect_mysql.get_pool().stats()["borrowed"] == 0
+
+
+def test_profiler_is_disabled_when_the_view_raises(profiled_app):
+    # TESTING propagates the exception: the after_request hooks are skipped
+    with pytest.raises(KeyError):
+        profiled_app.test_client().get("/fail")
+
+    assert sys.getprofile() is None
@@ -0,0 +1,16 @@
+"""Level of the SQL statements log"""
+
+import logging
+
+from ethiens_sme.utils import query_stats
+
+
+def test_log_level_names_are_case_insensitive():
+    assert query_stats.log_level("info") == logging.INFO
+    assert query_stats.log_level("WARNING") == logging.WARNING
+
+
+def test_unknown_log_level_falls_back_to_debug(caplog):
+    with caplog.at_level(logging.WARNING, logger=query_stats.logger.name):
+        assert query_stats.log_level("verbose") == logging.DEBUG
+    assert "SQL_LOG_LEVEL" in caplog.text
@@ -0,0 +1,108 @@
+"""Response cache: hits, invalidation by generation and generations shared through Redis"""
+
+# pylint: disable=protected-access
+
+import logging
+
+import fakeredis
+import pytest
+from flask import jsonify, request
+from flask_caching.backends.rediscache import RedisCache
+
+from ethiens_sme import cache
+from ethiens_sme.config import Config
+from ethiens_sme.utils import response_cache
+
+
+@pytest.fixture
+def view(app, monkeypatch):
+    """A cached view counting its calls, and a function requesting it"""
+    monkeypatch.setitem(app.config, "CACHE_TIMEOUTS", {"test_view": 60})
+    monkeypatch.setattr(response_cache, "_generation_cache", None)
+    cache.clear()
+    calls = []
+
+    @response_cache.cached_response("test_view", [response_cache.MOVIES])
+    def test_view():
+        calls.append(dict(request.args))
+        return jsonify({"call": len(calls)}), 200
+
+    def get(query_string=""):
+        with app.test_request_context(f"/test?{query_string}"):
+            response = app.make_response(test_view())
+            return response.get_json()
+
+    get.calls = calls
+    return get
+
+
+def test_second_request_is_served_from_the_cache(view):
+    assert view("page=1") == {"call": 1}
+    assert view("page=1") == {"call": 1}
+    assert len(view.calls) == 1
+
+
+def test_query_args_are_part_of_the_key(view):
+    view("page=1")
+    assert view("page=2") == {"call": 2}
+
+
+def test_invalidate_evicts_the_cached_responses(view):
+    view("page=1")
+    response_cache.invalidate(response_cache.MOVIES)
+    assert view("page=1") == {"call": 2}
+
+
+def test_invalidate_of_another_namespace_keeps_them(view):
+    view("page=1")
+    response_cache.invalidate(response_cache.SEANCES)
+    assert view("page=1") == {"call": 1}
+
+
+def test_invalidate_bumps_the_generation(app):
+    cache.clear()
+    with app.app_context():
+        before = response_cache._generations([response_cache.MOVIES])
+        response_cache.invalidate(response_cache.MOVIES)
+        after = response_cache._generations([response_cache.MOVIES])
+    assert before != after
+    assert None not in after
+
+
+def test_missing_generation_gets_a_new_token(app):
+    cache.clear()
+    with app.app_context():
+        first = response_cache._generations([response_cache.SEANCES])
+        cache.clear()
+        second = response_cache._generations([response_cache.SEANCES])
+    assert first != second
+
+
+def test_generations_in_redis_are_shared_with_the_other_processes(view, monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        response_cache,
+        "_generation_cache",
+        RedisCache(host=fakeredis.FakeRedis(server=server), key_prefix="test:", default_timeout=0),
+    )
+    view("page=1")
+    assert view("page=1") == {"call": 1}
+
+    # Another process (RQ worker, import script) invalidating through the same Redis
+    worker = RedisCache(host=fakeredis.FakeRedis(server=server), key_prefix="test:", default_timeout=0)
+    worker.set(response_cache._generation_key(response_cache.MOVIES), "new", timeout=0)
+
+    assert view("page=1") == {"call": 2}
+
+
+def test_check_shared_warns_when_the_cache_is_process_local(monkeypatch, caplog):
+    monkeypatch.setattr(Config, "CACHE_TYPE", "ethiens_sme.utils.cache_backend.LRUCache")
+    monkeypatch.setattr(Config, "CACHE_GENERATIONS_REDIS_URL", None)
+    monkeypatch.setattr(response_cache, "_warned", set())
+    with caplog.at_level(logging.WARNING, logger=response_cache.logger.name):
+        response_cache.check_shared("import_movies")
+        response_cache.check_shared("import_movies")
+    assert len(caplog.records) == 1
+
+    monkeypatch.setattr(Config, "CACHE_GENERATIONS_REDIS_URL", "redis://localhost:6379/1")
+    assert response_cache.is_shared()
@@ -0,0 +1,68 @@
+"""Reload of the in-memory schedule index"""
+
+# pylint: disable=protected-access
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from ethiens_sme.config import Config
+from ethiens_sme.service import schedule_index
+
+TOMORROW = datetime.now().replace(microsecond=0) + timedelta(days=1)
+
+
+def row(seance_id, city="Paris", language="VF"):
+    return (seance_id, TOMORROW, 1, language, 10, "Le Samouraï", 20, "Le Champo", city)
+
+
+class FakeFetch:
+    """Rows answered by the next loads of the index; a load waits while `gate` is cleared"""
+
+    def __init__(self):
+        self.answers = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.started = threading.Event()
+
+    def __call__(self, condition="", params=()):  # pylint: disable=unused-argument
+        self.started.set()
+        self.gate.wait(5)
+        return self.answers.pop(0)
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    """Fake loads of the schedule index, starting without an index"""
+    fetch = FakeFetch()
+    monkeypatch.setattr(schedule_index, "_fetch", fetch)
+    monkeypatch.setattr(schedule_index, "_index", None)
+    return fetch
+
+
+def test_expired_index_is_served_while_another_thread_reloads_it(fetches, monkeypatch):
+    fetches.answers.append([row(1)])
+    first = schedule_index.get_index()
+    monkeypatch.setattr(Config, "SCHEDULE_INDEX_TTL", 0)
+
+    fetches.answers.append([row(1), row(2)])
+    fetches.gate.clear()
+    fetches.started.clear()
+    reloader = threading.Thread(target=schedule_index.get_index)
+    reloader.start()
+    assert fetches.started.wait(5)
+
+    # The reload is blocked on the database: the other callers get the current index
+    assert schedule_index.get_index() is first
+
+    fetches.gate.set()
+    reloader.join(5)
+    assert len(schedule_index._index) == 2
+    assert schedule_index._index is not first
+
+
+def test_first_load_is_waited_for(fetches):
+    fetches.answers.append([row(1)])
+    assert len(schedule_index.get_index()) == 1
+    assert schedule_index.get_index().seances("paris")[0].movie_title == "Le Samouraï"
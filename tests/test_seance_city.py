@@ -0,0 +1,100 @@
+"""Seances of a city: resolution of the city name"""
+
+# pylint: disable=protected-access
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from mysql.connector import Error
+
+from ethiens_sme import cache
+from ethiens_sme.config import Config
+from ethiens_sme.service import place_index, schedule_index
+
+TOMORROW = datetime.now().replace(microsecond=0) + timedelta(days=1)
+CINEMAS = [(1, "Le Champo", "Paris"), (2, "Comoedia", "Lyon"), (3, "Le Méliès", "Saint-Étienne")]
+
+
+@pytest.fixture
+def cities(fake_db, monkeypatch):
+    """Three cinemas, with one seance each"""
+    monkeypatch.setattr(place_index, "_index", None)
+    monkeypatch.setattr(schedule_index, "_index", None)
+    cache.clear()
+    fake_db.returns(r"ci_city FROM et_cinema", ["ci_id_cinema", "ci_cinema_name", "ci_city"], CINEMAS)
+    fake_db.returns(
+        r"s\.se_id_seance, s\.se_date_time",
+        ["se_id_seance", "se_date_time", "se_room", "se_language", "mo_id_movie", "mo_title"]
+        + ["ci_id_cinema", "ci_cinema_name", "ci_city"],
+        [(ident, TOMORROW, 1, "VF", 10, "Le Samouraï", ident, name, city) for ident, name, city in CINEMAS],
+    )
+    return fake_db
+
+
+def test_city_name_ignores_case_accents_and_punctuation(cities, client):
+    response = client.get("/seance/saint etienne")
+
+    assert response.status_code == 200
+    assert [(seance["cinema_name"], seance["city"]) for seance in response.get_json()] == [
+        ("Le Méliès", "Saint-Étienne")
+    ]
+
+
+def test_misspelled_city_is_not_served_but_suggested(cities, client):
+    response = client.get("/seance/Lyonn")
+
+    assert response.status_code == 404
+    assert response.get_json() == {"message": "CITY_NOT_FOUND", "suggestions": ["Lyon"]}
+
+
+def test_city_prefix_is_suggested(cities, client):
+    response = client.get("/seance/par")
+
+    assert response.status_code == 404
+    assert response.get_json()["suggestions"] == ["Paris"]
+
+
+def test_unknown_city_has_no_suggestion(cities, client):
+    assert client.get("/seance/Zzyzx").get_json() == {"message": "CITY_NOT_FOUND", "suggestions": []}
+
+
+@pytest.mark.parametrize("query", [r"ci_city FROM et_cinema", r"s\.se_id_seance, s\.se_date_time"])
+def test_failing_index_query_answers_503(cities, client, query):
+    cities.errors[query] = Error("Lost connection")
+
+    response = client.get("/seance/Paris")
+
+    assert response.status_code == 503
+    assert response.get_json() == {"message": "DATABASE_UNAVAILABLE"}
+
+
+def test_expired_place_index_is_served_while_another_thread_syncs_it(monkeypatch):
+    rows = [CINEMAS[:1], CINEMAS]
+    gate, started = threading.Event(), threading.Event()
+
+    def fetch():
+        started.set()
+        gate.wait(5)
+        return rows.pop(0)
+
+    monkeypatch.setattr(place_index, "_fetch", fetch)
+    monkeypatch.setattr(place_index, "_index", None)
+    gate.set()
+    index = place_index.get_index()
+    monkeypatch.setattr(Config, "PLACE_INDEX_TTL", 0)
+
+    gate.clear()
+    started.clear()
+    syncer = threading.Thread(target=place_index.get_index)
+    syncer.start()
+    assert started.wait(5)
+
+    # The sync waits for et_cinema: the other callers are served the current index
+    assert place_index.get_index() is index
+    assert place_index.resolve_city("lyon") is None
+
+    gate.set()
+    syncer.join(5)
+    monkeypatch.setattr(Config, "PLACE_INDEX_TTL", 600)
+    assert place_index.resolve_city("lyon") == "Lyon"
@@ -0,0 +1,81 @@
+"""Dashboard stats: seances without a language"""
+
+# pylint: disable=protected-access
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from ethiens_sme import cache
+from ethiens_sme.config import Config
+from ethiens_sme.service import movie_search, movie_service, schedule_index, stats_service
+
+TOMORROW = datetime.now().replace(hour=20, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+
+@pytest.fixture(params=[True, False], ids=["schedule_index", "sql"])
+def seances(request, fake_db, monkeypatch):
+    """Three seances tomorrow in one cinema, one of them with a NULL language"""
+    monkeypatch.setattr(Config, "SCHEDULE_INDEX_ENABLED", request.param)
+    monkeypatch.setattr(Config, "STATS_MODE", "query")
+    monkeypatch.setattr(schedule_index, "_index", None)
+    cache.clear()
+    breakdown = [
+        (1, "Le Champo", "Paris", TOMORROW.date(), "VF", 2),
+        (1, "Le Champo", "Paris", TOMORROW.date(), None, 1),
+    ]
+    fake_db.returns(r"AS breakdown ON TRUE", ["movies", "cinemas", "ci_id_cinema"], [(4, 1) + row for row in breakdown])
+    fake_db.returns(r"AS movies", ["movies", "cinemas"], [(4, 1)])
+    fake_db.returns(
+        r"s\.se_id_seance, s\.se_date_time",
+        ["se_id_seance", "se_date_time", "se_room", "se_language", "mo_id_movie", "mo_title"]
+        + ["ci_id_cinema", "ci_cinema_name", "ci_city"],
+        [
+            (seance_id, TOMORROW + timedelta(hours=seance_id), 1, language, 10, "Le Samouraï", 1, "Le Champo", "Paris")
+            for seance_id, language in ((1, "VF"), (2, None), (3, "VF"))
+        ],
+    )
+    fake_db.returns(
+        r"GROUP BY s\.ci_id_cinema",
+        ["ci_id_cinema", "ci_cinema_name", "ci_city", "day", "se_language", "count"],
+        breakdown,
+    )
+    return fake_db
+
+
+def test_seances_without_language_are_counted_under_an_empty_label(seances, client):
+    response = client.get("/seance/stats")
+
+    assert response.status_code == 200
+    stats = response.get_json()
+    assert stats["seances"] == 3
+    assert stats["breakdown"]["languages"] == {"VF": 2, "": 1}
+    assert stats["breakdown"]["cinemas"][0]["per_day"][1] == 3
+
+
+def test_counts_and_breakdown_are_read_in_one_query_without_the_index(seances, client):
+    stats = client.get("/seance/stats").get_json()
+
+    assert (stats["movies"], stats["cinemas"]) == (4, 1)
+    queries = [query for query, _ in seances.log if query not in ("COMMIT", "ROLLBACK")]
+    assert len(queries) == (1 if not Config.SCHEDULE_INDEX_ENABLED else 2)
+
+
+def test_no_seance_still_gives_the_counts(fake_db, monkeypatch):
+    monkeypatch.setattr(Config, "SCHEDULE_INDEX_ENABLED", False)
+    fake_db.returns(r"AS breakdown ON TRUE", ["movies", "cinemas", "ci_id_cinema"], [(4, 1) + (None,) * 6])
+
+    assert stats_service.get_counts_and_breakdown(TOMORROW) == ({"movies": 4, "cinemas": 1}, [])
+
+
+def test_deleting_a_missing_movie_keeps_the_counter(fake_db, monkeypatch):
+    monkeypatch.setattr(stats_service, "_counters", {"movies": 4, "cinemas": 1})
+    monkeypatch.setattr(schedule_index, "_index", None)
+    monkeypatch.setattr(movie_search, "_index", None)
+    fake_db.rowcounts[r"DELETE FROM et_movie"] = 0
+    movie_service.delete_movie(99)
+    assert stats_service._counters["movies"] == 4
+
+    fake_db.rowcounts[r"DELETE FROM et_movie"] = 1
+    movie_service.delete_movie(1)
+    assert stats_service._counters["movies"] == 3
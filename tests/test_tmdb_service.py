@@ -0,0 +1,188 @@
+"""TMDB client against a local fake TMDB server (http.server)"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from ethiens_sme.config import Config
+from ethiens_sme.service import movie_service, tmdb_service
+
+MOVIE = {
+    "title": "Le Samouraï",
+    "overview": "Un tueur à gages...",
+    "release_date": "1967-10-25",
+    "runtime": 105,
+    "poster_path": "/samourai.jpg",
+    "production_countries": [{"name": "France"}],
+    "production_companies": [],
+    "credits": {
+        "cast": [{"name": "Alain Delon"}, {"name": "Nathalie Delon"}],
+        "crew": [{"job": "Writer", "name": "Joan McLeod"}, {"job": "Director", "name": "Jean-Pierre Melville"}],
+    },
+}
+
+
+class FakeTmdb(ThreadingHTTPServer):
+    """
+    Fake TMDB API: `responses` maps a path to the (status, body) answered in
+    turn, the last one being repeated. Requests and TCP connections are counted.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.responses = {}
+        self.requests = []
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/3"
+
+    def answer(self, path: str) -> tuple:
+        with self._lock:
+            responses = self.responses.get(path, [(404, {"status_message": "not found"})])
+            return responses.pop(0) if len(responses) > 1 else responses[0]
+
+    def calls(self, path: str) -> int:
+        return sum(1 for request_path, _ in self.requests if request_path == path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so the pooled connections are reused
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:  # pylint: disable=protected-access
+            self.server.connections += 1
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        url = urlparse(self.path)
+        path = url.path.removeprefix("/3")
+        self.server.requests.append((path, parse_qs(url.query)))
+        status, body = self.server.answer(path)
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def tmdb(monkeypatch, tmp_path):
+    """Fake TMDB server, with a fresh session and an empty disk cache pointing at it"""
+    server = FakeTmdb()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    monkeypatch.setattr(Config, "TMDB_BASE_URL", server.base_url)
+    monkeypatch.setattr(Config, "TMDB_API_KEY", "test-key")
+    monkeypatch.setattr(Config, "TMDB_BACKOFF", 0)
+    monkeypatch.setattr(Config, "TMDB_RETRIES", 2)
+    monkeypatch.setattr(Config, "TMDB_CACHE_PATH", str(tmp_path / "tmdb.sqlite3"))
+    monkeypatch.setattr(tmdb_service, "_session", None)
+    monkeypatch.setattr(tmdb_service, "_cache", None)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_search_movie(tmdb):
+    result = {"id": 42, "title": "Le Samouraï", "release_date": "1967"}
+    tmdb.responses["/search/movie"] = [(200, {"results": [result]})]
+
+    assert tmdb_service.search_movie("samourai") == [result]
+    _, params = tmdb.requests[0]
+    assert params["query"] == ["samourai"]
+    assert params["api_key"] == ["test-key"]
+
+
+def test_movie_details_keep_the_cast_and_director(tmdb):
+    tmdb.responses["/movie/42"] = [(200, MOVIE)]
+
+    details = tmdb_service.get_movie_details("42")
+
+    assert details["director"] == "Jean-Pierre Melville"
+    assert tmdb_service.to_movie_data(details, cast_limit=1)["actor_names"] == ["Alain Delon"]
+
+
+def test_calls_share_one_pooled_connection(tmdb):
+    for tmdb_id in range(5):
+        tmdb.responses[f"/movie/{tmdb_id}"] = [(200, MOVIE)]
+        tmdb_service.get_movie_details(str(tmdb_id))
+
+    assert len(tmdb.requests) == 5
+    assert tmdb.connections == 1
+
+
+def test_server_errors_are_retried(tmdb):
+    tmdb.responses["/movie/42"] = [(503, {}), (502, {}), (200, MOVIE)]
+
+    assert tmdb_service.get_movie_details("42")["title"] == "Le Samouraï"
+    assert tmdb.calls("/movie/42") == 3
+
+
+def test_persistent_server_error_raises_after_the_retries(tmdb):
+    tmdb.responses["/movie/42"] = [(500, {})]
+
+    with pytest.raises(requests.RequestException):
+        tmdb_service.get_movie_details("42")
+    assert tmdb.calls("/movie/42") == Config.TMDB_RETRIES + 1
+
+
+def test_not_found_is_not_retried_nor_cached(tmdb):
+    with pytest.raises(requests.HTTPError):
+        tmdb_service.get_movie_details("404")
+    assert tmdb.calls("/movie/404") == 1
+
+    tmdb.responses["/movie/404"] = [(200, MOVIE)]
+    assert tmdb_service.get_movie_details("404")["title"] == "Le Samouraï"
+
+
+def test_results_are_served_from_the_disk_cache(tmdb):
+    tmdb.responses["/search/movie"] = [(200, {"results": [{"id": 42, "title": "Le Samouraï"}]})]
+    tmdb.responses["/movie/42"] = [(200, MOVIE)]
+
+    first = tmdb_service.search_movie("Samouraï")
+    details = tmdb_service.get_movie_details("42")
+    # A new process: no session, same cache file
+    tmdb_service._session = None  # pylint: disable=protected-access
+    tmdb_service._cache = None  # pylint: disable=protected-access
+
+    assert tmdb_service.search_movie("  samouraï ") == first
+    assert tmdb_service.get_movie_details("42") == details
+    assert len(tmdb.requests) == 2
+
+
+def test_expired_entries_are_fetched_again(tmdb, monkeypatch):
+    monkeypatch.setattr(Config, "TMDB_CACHE_TTL_DETAILS", 0)
+    tmdb.responses["/movie/42"] = [(200, MOVIE)]
+
+    tmdb_service.get_movie_details("42")
+    tmdb_service.get_movie_details("42")
+
+    assert tmdb.calls("/movie/42") == 2
+
+
+def test_details_endpoint_answers_404_when_tmdb_does(tmdb, client):
+    assert client.get("/movie/tmdb/404").status_code == 404
+
+    tmdb.responses["/movie/42"] = [(200, MOVIE)]
+    response = client.get("/movie/tmdb/42")
+    assert response.status_code == 200
+    assert response.get_json()["title"] == "Le Samouraï"
+
+
+def test_search_answers_no_result_when_tmdb_fails(tmdb):
+    tmdb.responses["/search/movie"] = [(503, {})]
+
+    assert movie_service.search_tmdb_movie("samourai") == []